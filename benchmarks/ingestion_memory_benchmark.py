@@ -0,0 +1,75 @@
+"""
+Compare the peak and retained memory of MIB ingestion with and without --low-memory.
+
+Usage:
+    python -m benchmarks.ingestion_memory_benchmark [--rows 100000] [--formats xlsx csv jsonl parquet]
+
+Memory is traced with tracemalloc, which slows the runs down several times over, so the
+times printed are only comparable with each other.
+"""
+import argparse
+import contextlib
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Tuple
+
+from benchmarks.source_benchmark import FORMATS, benchmark_sheets
+from benchmarks.synthetic import write_sheets
+from utils.mib_validator import MIBValidator
+
+
+def measure(path: str, low_memory: bool) -> Tuple[int, int, float, Any]:
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        items, traps, template_info, mib_index = MIBValidator.extract_from_excel(
+            path, low_memory=low_memory
+        )
+        seconds = time.perf_counter() - start_time
+        gc.collect()
+        retained_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_bytes, retained_bytes, seconds, (items, traps, mib_index.discovery_rule_tables)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    args = parser.parse_args()
+
+    sheets = benchmark_sheets(args.rows)
+    print(f"{args.rows} MIB rows")
+    print(
+        f"{'format':<10}{'mode':<12}{'peak':>12}{'retained':>12}{'time':>9}"
+        f"{'peak saved':>12}  same output"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in args.formats:
+            path = os.path.join(directory, f"benchmark.{extension}")
+            write_sheets(path, sheets)
+
+            results = {}
+            # The extraction prints its progress, which is not part of the results
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                for mode, low_memory in (("default", False), ("low-memory", True)):
+                    results[mode] = measure(path, low_memory)
+
+            reference_peak = results["default"][0]
+            reference_output = results["default"][3]
+            for mode, (peak_bytes, retained_bytes, seconds, output) in results.items():
+                print(
+                    f"{extension:<10}{mode:<12}{peak_bytes / (1024 * 1024):>8.1f} MiB"
+                    f"{retained_bytes / (1024 * 1024):>8.1f} MiB{seconds:>8.2f}s"
+                    f"{reference_peak / peak_bytes:>11.1f}x  "
+                    f"{'yes' if output == reference_output else 'NO'}"
+                )
+
+
+if __name__ == "__main__":
+    main()
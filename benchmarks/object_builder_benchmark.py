@@ -0,0 +1,122 @@
+"""
+Compare the ObjectBuilder backends on synthetic Items, Traps and Discovery Rules.
+
+Usage:
+    python -m benchmarks.object_builder_benchmark [--sizes 100 1000 10000] [--jobs N]
+"""
+import argparse
+import functools
+import os
+import pickle
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.synthetic import mib_entries, notification_entries, scalar_entries
+from utils.mib_index import MIBIndex
+from utils.mib_validator import MIBValidator
+from utils.object_builder import ObjectBuilder
+from zabbix_objects.discovery_rule import DiscoveryRule
+from zabbix_objects.snmp_item import SNMPItem
+from zabbix_objects.snmp_trap import SNMPTrap
+
+TEMPLATE_NAME = "Benchmark Device 1000"
+BACKENDS = ("serial", "thread", "process")
+COLUMNS_PER_TABLE = 8
+
+
+def time_backend(
+    backend: str,
+    build_all: Callable[[List[Any]], List[Any]],
+    rows: List[Any],
+    jobs: int,
+    repeat: int,
+) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # Each run starts its own pool, as a template generation run would
+        start_time = time.perf_counter()
+        with ObjectBuilder(backend, jobs=jobs) as builder:
+            builder.build(build_all, rows)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def per_row_costs(
+    build_all: Callable[[List[Any]], List[Any]], rows: List[Any]
+) -> Dict[str, float]:
+    start_time = time.perf_counter()
+    objects = build_all(rows)
+    build_seconds = time.perf_counter() - start_time
+
+    # The process backend pickles the rows out and the built objects back
+    start_time = time.perf_counter()
+    pickle.loads(pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL))
+    pickle.loads(pickle.dumps(objects, protocol=pickle.HIGHEST_PROTOCOL))
+    transfer_seconds = time.perf_counter() - start_time
+
+    return {
+        "build_us": build_seconds / len(rows) * 1e6,
+        "transfer_us": transfer_seconds / len(rows) * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Tables are kept narrow enough for their walk OIDs to fit in one walk item, as
+    # most device tables do
+    entries = mib_entries(max(args.sizes) * 4, columns_per_table=COLUMNS_PER_TABLE)
+    mib_index = MIBIndex(entries)
+    tables = list(MIBValidator._collect_discovery_rule_tables(mib_index).values())
+    kinds = {
+        "item": (
+            functools.partial(SNMPItem.generate_snmp_items, template_name=TEMPLATE_NAME),
+            scalar_entries(entries),
+        ),
+        "trap": (
+            functools.partial(SNMPTrap.generate_snmp_traps, template_name=TEMPLATE_NAME),
+            notification_entries(entries),
+        ),
+        "discovery_rule": (
+            functools.partial(
+                DiscoveryRule.generate_discovery_rules, template_name=TEMPLATE_NAME
+            ),
+            tables,
+        ),
+    }
+
+    print(f"{os.cpu_count()} CPU(s), {args.jobs} job(s), best of {args.repeat}")
+    print(
+        f"{'kind':<15}{'rows':>7}{'serial':>10}{'thread':>10}{'process':>10}"
+        f"{'build/row':>12}{'transfer/row':>14}  winner"
+    )
+    for kind, (build_all, all_rows) in kinds.items():
+        for size in args.sizes:
+            # Discovery rules are sized by their number of table rows, not of tables
+            rows = (
+                all_rows[: max(1, size // (COLUMNS_PER_TABLE + 2))]
+                if kind == "discovery_rule"
+                else all_rows[:size]
+            )
+            if kind != "discovery_rule" and len(rows) < size:
+                continue
+
+            seconds = {
+                backend: time_backend(backend, build_all, rows, args.jobs, args.repeat)
+                for backend in BACKENDS
+            }
+            costs = per_row_costs(build_all, rows)
+            print(
+                f"{kind:<15}{size:>7}"
+                + "".join(f"{seconds[backend]:>9.3f}s" for backend in BACKENDS)
+                + f"{costs['build_us']:>10.1f}us{costs['transfer_us']:>12.1f}us"
+                + f"  {min(seconds, key=seconds.get)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Measure the memory held by built Items, Traps, Discovery Rules and Item Prototypes.
+
+Usage:
+    python -m benchmarks.object_memory_benchmark [--rows 100000]
+"""
+import argparse
+import functools
+import gc
+import time
+import tracemalloc
+
+from benchmarks.synthetic import mib_entries, notification_entries, scalar_entries
+from utils.mib_index import MIBIndex
+from utils.mib_validator import MIBValidator
+from zabbix_objects.discovery_rule import DiscoveryRule
+from zabbix_objects.snmp_item import SNMPItem
+from zabbix_objects.snmp_trap import SNMPTrap
+
+TEMPLATE_NAME = "Benchmark Device 1000"
+COLUMNS_PER_TABLE = 8
+
+
+def measure(label: str, build, rows) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    objects = [build(row) for row in rows]
+    seconds = time.perf_counter() - start_time
+    gc.collect()
+    held_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    count = len(objects)
+    if label == "discovery_rule":
+        count += sum(len(rule.item_prototypes) + 1 for rule in objects)
+    print(
+        f"{label:<15}{len(rows):>8}{count:>10}{held_bytes / (1024 * 1024):>10.1f} MiB"
+        f"{held_bytes / count:>10.0f} B{seconds:>9.2f}s"
+    )
+    del objects
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    # The source rows stay alive, as they do in the MIB index during a real run, so only
+    # the memory added by the built objects is counted
+    entries = mib_entries(args.rows, columns_per_table=COLUMNS_PER_TABLE)
+    tables = list(
+        MIBValidator._collect_discovery_rule_tables(MIBIndex(entries)).values()
+    )
+
+    print(f"{'kind':<15}{'rows':>8}{'objects':>10}{'held':>14}{'per object':>12}{'time':>10}")
+    measure("item", functools.partial(SNMPItem, template_name=TEMPLATE_NAME), scalar_entries(entries))
+    measure("trap", functools.partial(SNMPTrap, template_name=TEMPLATE_NAME), notification_entries(entries))
+    measure("discovery_rule", functools.partial(DiscoveryRule, template_name=TEMPLATE_NAME), tables)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Time and memory-profile every stage of template generation on a synthetic workbook.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark [--items 1000] [--traps 200] [--tables 100]
+        [--columns 20] [--description-length 300] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.2]
+
+The results are written as JSON. With --baseline, each stage is compared with the same
+stage of an earlier run, and the exit status is non-zero if any stage got slower by more
+than the threshold.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.synthetic import workbook_sheets, write_sheets
+from main import create_all_yaml
+from utils.mib_index import MIBIndex
+from utils.mib_validator import MIBValidator
+from utils.normalization import clear_caches
+from utils.object_builder import ObjectBuilder
+from utils.sheet_reader import SheetReader
+from utils.yaml_writer import write_template_yaml
+from zabbix_objects.template import Template
+
+STAGES = (
+    "load",
+    "index",
+    "validate",
+    "discovery_rules",
+    "template",
+    "yaml",
+    "write",
+)
+
+
+def pipeline_stages(workbook: str, output_file: str) -> List[Tuple[str, Callable[[], Any]]]:
+    """
+    Split template generation into stages that each run on the results of the previous ones.
+
+    Args:
+        workbook (str): Path of the workbook.
+        output_file (str): Path the YAML file is written to.
+
+    Returns:
+        List[Tuple[str, Callable[[], Any]]]: Name and function of each stage, in order.
+    """
+    state: Dict[str, Any] = {}
+
+    def load() -> None:
+        with SheetReader(workbook) as reader:
+            state["items"] = reader.read_records("SNMP Items", MIBValidator.ITEM_COLUMNS)
+            state["traps"] = reader.read_records("SNMP Traps", MIBValidator.ITEM_COLUMNS)
+            state["template_info"] = reader.read_records(
+                "Template Information", MIBValidator.TEMPLATE_COLUMNS
+            )[0]
+            mib_sheet_name = next(sheet for sheet in reader.sheet_names if "MIB" in sheet)
+            state["mib_data"] = reader.read_records(mib_sheet_name, MIBValidator.MIB_COLUMNS)
+
+    def index() -> None:
+        state["mib_index"] = MIBIndex(state["mib_data"])
+
+    def validate() -> None:
+        state["validated_items"] = MIBValidator._preprocess_and_validate(
+            state["items"], state["mib_index"], "SNMP Items"
+        )
+        state["validated_traps"] = MIBValidator._preprocess_and_validate(
+            state["traps"], state["mib_index"], "SNMP Traps"
+        )
+
+    def discovery_rules() -> None:
+        mib_index = state["mib_index"]
+        mib_index.discovery_rule_tables = MIBValidator._collect_discovery_rule_tables(
+            mib_index
+        )
+
+    def template() -> None:
+        with ObjectBuilder("serial") as object_builder:
+            state["template"] = Template(
+                state["template_info"],
+                state["validated_items"],
+                state["validated_traps"],
+                state["mib_index"],
+                object_builder=object_builder,
+            )
+
+    def yaml() -> None:
+        state["yaml"] = create_all_yaml(state["template"])
+
+    def write() -> None:
+        with open(output_file, "w", encoding="utf-8") as f:
+            write_template_yaml(state["template"], f)
+
+    return [
+        ("load", load),
+        ("index", index),
+        ("validate", validate),
+        ("discovery_rules", discovery_rules),
+        ("template", template),
+        ("yaml", yaml),
+        ("write", write),
+    ]
+
+
+def time_stages(workbook: str, output_file: str, repeat: int) -> Dict[str, float]:
+    best = dict.fromkeys(STAGES, float("inf"))
+    for _ in range(repeat):
+        # Every run starts cold, as a new process would
+        clear_caches()
+        gc.collect()
+        for stage, run in pipeline_stages(workbook, output_file):
+            start_time = time.perf_counter()
+            run()
+            best[stage] = min(best[stage], time.perf_counter() - start_time)
+    return best
+
+
+def profile_stages(workbook: str, output_file: str) -> Dict[str, Dict[str, int]]:
+    """
+    Measure the memory of each stage with tracemalloc, in a separate run since tracing
+    slows allocations down several times over.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Peak bytes allocated while each stage ran, and bytes
+            still held by what it allocated once it finished, keyed by stage.
+    """
+    clear_caches()
+    gc.collect()
+    memory = {}
+    tracemalloc.start()
+    try:
+        for stage, run in pipeline_stages(workbook, output_file):
+            start_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            run()
+            gc.collect()
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            memory[stage] = {
+                "peak_bytes": peak_bytes - start_bytes,
+                "retained_bytes": current_bytes - start_bytes,
+            }
+    finally:
+        tracemalloc.stop()
+    return memory
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_seconds: float
+) -> List[str]:
+    """
+    Compare the stage times of a run with those of a baseline run.
+
+    Args:
+        results (Dict[str, Any]): Results of this run.
+        baseline (Dict[str, Any]): Results of the baseline run.
+        threshold (float): Relative slowdown over which a stage counts as a regression.
+        min_seconds (float): Stages faster than this in both runs are never regressions,
+            since their timings are mostly noise.
+
+    Returns:
+        List[str]: Stages that regressed.
+    """
+    if baseline.get("parameters") != results["parameters"]:
+        print("Warning: the baseline was run with different parameters.")
+
+    regressions = []
+    print(f"{'stage':<17}{'baseline':>10}{'this run':>10}{'change':>9}")
+    for stage, stage_results in results["stages"].items():
+        baseline_seconds = baseline["stages"].get(stage, {}).get("seconds")
+        seconds = stage_results["seconds"]
+        if not baseline_seconds:
+            print(f"{stage:<17}{'-':>10}{seconds:>9.3f}s")
+            continue
+
+        change = seconds / baseline_seconds - 1
+        regressed = change > threshold and max(seconds, baseline_seconds) >= min_seconds
+        if regressed:
+            regressions.append(stage)
+        print(
+            f"{stage:<17}{baseline_seconds:>9.3f}s{seconds:>9.3f}s{change:>+8.0%}"
+            + ("  REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--traps", type=int, default=200)
+    parser.add_argument("--tables", type=int, default=100)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--description-length", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON file the results are written to.")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown of a stage that fails the run (default: 0.2, i.e. 20%%).",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.05,
+        help="Stages faster than this are not checked against the threshold.",
+    )
+    args = parser.parse_args()
+
+    parameters = {
+        "items": args.items,
+        "traps": args.traps,
+        "tables": args.tables,
+        "columns": args.columns,
+        "description_length": args.description_length,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        workbook = os.path.join(directory, "benchmark.xlsx")
+        output_file = os.path.join(directory, "benchmark.yaml")
+        write_sheets(workbook, workbook_sheets(**parameters))
+
+        # The stages print their progress, which is not part of the results
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            seconds = time_stages(workbook, output_file, args.repeat)
+            memory = profile_stages(workbook, output_file)
+        workbook_bytes = os.path.getsize(workbook)
+        yaml_bytes = os.path.getsize(output_file)
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": parameters,
+        "repeat": args.repeat,
+        "workbook_bytes": workbook_bytes,
+        "yaml_bytes": yaml_bytes,
+        "stages": {
+            stage: {"seconds": round(seconds[stage], 6), **memory[stage]}
+            for stage in STAGES
+        },
+        "total_seconds": round(sum(seconds.values()), 6),
+    }
+
+    print(f"commit {results['commit']}, best of {args.repeat}, {parameters}")
+    print(f"{'stage':<17}{'time':>10}{'peak':>12}{'retained':>12}")
+    for stage, stage_results in results["stages"].items():
+        print(
+            f"{stage:<17}{stage_results['seconds']:>9.3f}s"
+            f"{stage_results['peak_bytes'] / (1024 * 1024):>8.1f} MiB"
+            f"{stage_results['retained_bytes'] / (1024 * 1024):>8.1f} MiB"
+        )
+    print(f"{'total':<17}{results['total_seconds']:>9.3f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved as '{args.output}'")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(
+                f"Regression: {', '.join(regressions)} slower than the baseline by more "
+                f"than {args.threshold:.0%}."
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
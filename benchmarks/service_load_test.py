@@ -0,0 +1,235 @@
+"""
+Load-test the template service on localhost and compare it with a subprocess per request.
+
+Usage:
+    python -m benchmarks.service_load_test [--workbook sample_template_file.xlsx]
+        [--requests 50] [--concurrency 4] [--url http://127.0.0.1:8080 | --socket PATH]
+        [--by-path] [--subprocess-runs 5]
+
+Without --url or --socket, a service is started on a free port for the duration of the
+test, with its MIB cache in a temporary directory, so the first request runs cold.
+"""
+import argparse
+import concurrent.futures
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(REPOSITORY, "main.py")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def connect(url: Optional[str], socket_path: Optional[str]) -> http.client.HTTPConnection:
+    if socket_path is not None:
+        return UnixHTTPConnection(socket_path, timeout=600)
+    parts = urllib.parse.urlsplit(url)
+    return http.client.HTTPConnection(parts.hostname, parts.port, timeout=600)
+
+
+def start_service(directory: str) -> subprocess.Popen:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, MAIN, "serve", "--port", str(port), "--deterministic-uuids"],
+        cwd=directory,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    process.url = f"http://127.0.0.1:{port}"
+    return process
+
+
+def wait_until_ready(url: Optional[str], socket_path: Optional[str], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connection = connect(url, socket_path)
+            connection.request("GET", "/health")
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def send_requests(
+    url: Optional[str],
+    socket_path: Optional[str],
+    workbook: str,
+    count: int,
+    by_path: bool,
+) -> List[Dict[str, Any]]:
+    """
+    Send template requests one after the other over one keep-alive connection.
+
+    Returns:
+        List[Dict[str, Any]]: Status, latency and server timings of each request.
+    """
+    if by_path:
+        target = f"/templates?{urllib.parse.urlencode({'path': os.path.abspath(workbook)})}"
+        body = b""
+    else:
+        target = "/templates"
+        with open(workbook, "rb") as f:
+            body = f.read()
+
+    results = []
+    connection = connect(url, socket_path)
+    try:
+        for _ in range(count):
+            start_time = time.perf_counter()
+            connection.request(
+                "POST",
+                target,
+                body=body,
+                headers={"Content-Type": "application/octet-stream"},
+            )
+            response = connection.getresponse()
+            response.read()
+            results.append(
+                {
+                    "status": response.status,
+                    "seconds": time.perf_counter() - start_time,
+                    "queue_seconds": float(response.getheader("X-Queue-Seconds") or 0),
+                    "generation_seconds": float(
+                        response.getheader("X-Generation-Seconds") or 0
+                    ),
+                }
+            )
+    finally:
+        connection.close()
+    return results
+
+
+def time_subprocesses(workbook: str, runs: int) -> List[float]:
+    seconds = []
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(runs):
+            start_time = time.perf_counter()
+            subprocess.run(
+                [sys.executable, MAIN, os.path.abspath(workbook)],
+                cwd=directory,
+                stdout=subprocess.DEVNULL,
+                check=True,
+            )
+            seconds.append(time.perf_counter() - start_time)
+    return seconds
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--workbook", default=os.path.join(REPOSITORY, "sample_template_file.xlsx")
+    )
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    target_group = parser.add_mutually_exclusive_group()
+    target_group.add_argument("--url", help="URL of a running service.")
+    target_group.add_argument("--socket", help="Unix socket of a running service.")
+    parser.add_argument(
+        "--by-path",
+        action="store_true",
+        help="Send the workbook's path instead of uploading it.",
+    )
+    parser.add_argument(
+        "--subprocess-runs",
+        type=int,
+        default=5,
+        help="Number of 'python main.py' runs timed for comparison, 0 to skip.",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        process = None
+        url, socket_path = args.url, args.socket
+        if url is None and socket_path is None:
+            process = start_service(directory)
+            url = process.url
+        try:
+            wait_until_ready(url, socket_path, timeout=30)
+
+            # Each client sends its share of the requests over its own connection
+            shares = [
+                args.requests // args.concurrency
+                + (1 if client < args.requests % args.concurrency else 0)
+                for client in range(args.concurrency)
+            ]
+            start_time = time.perf_counter()
+            with concurrent.futures.ThreadPoolExecutor(args.concurrency) as executor:
+                futures = [
+                    executor.submit(
+                        send_requests, url, socket_path, args.workbook, share, args.by_path
+                    )
+                    for share in shares
+                    if share
+                ]
+                results = [result for future in futures for result in future.result()]
+            wall_seconds = time.perf_counter() - start_time
+
+            connection = connect(url, socket_path)
+            connection.request("GET", "/health")
+            health = json.loads(connection.getresponse().read())
+            connection.close()
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    succeeded = [result for result in results if result["status"] == 200]
+    latencies = [result["seconds"] for result in succeeded]
+    print(
+        f"{len(results)} requests, {args.concurrency} clients, "
+        f"{'by path' if args.by_path else 'uploaded'}: {len(succeeded)} succeeded, "
+        f"{len(results) - len(succeeded)} failed in {wall_seconds:.2f}s "
+        f"({len(results) / wall_seconds:.1f} requests/s)"
+    )
+    if latencies:
+        print(
+            f"latency    p50 {percentile(latencies, 0.5):.3f}s  "
+            f"p90 {percentile(latencies, 0.9):.3f}s  p99 {percentile(latencies, 0.99):.3f}s  "
+            f"max {max(latencies):.3f}s  first {latencies[0]:.3f}s"
+        )
+        print(
+            f"server     generation mean "
+            f"{statistics.mean(r['generation_seconds'] for r in succeeded):.3f}s  "
+            f"queue mean {statistics.mean(r['queue_seconds'] for r in succeeded):.3f}s"
+        )
+    print(f"health     {json.dumps(health.get('mib_cache', {}))}")
+
+    if args.subprocess_runs:
+        seconds = time_subprocesses(args.workbook, args.subprocess_runs)
+        print(
+            f"subprocess {args.subprocess_runs} runs of 'python main.py': "
+            f"mean {statistics.mean(seconds):.3f}s, min {min(seconds):.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
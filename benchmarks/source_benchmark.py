@@ -0,0 +1,101 @@
+"""
+Compare the load times of the same synthetic MIB stored in each input source format.
+
+Usage:
+    python -m benchmarks.source_benchmark [--rows 100000] [--formats xlsx csv jsonl parquet]
+"""
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.synthetic import (
+    mib_entries,
+    notification_entries,
+    scalar_entries,
+    write_sheets,
+)
+from utils.mib_validator import MIBValidator
+from utils.sources import MAIN_SHEET, open_source
+
+FORMATS = ("xlsx", "csv", "jsonl", "parquet")
+
+
+def benchmark_sheets(rows: int) -> Dict[str, List[Dict[str, Any]]]:
+    entries = mib_entries(rows)
+    return {
+        "Template Information": [
+            {
+                "Group": "Templates/Benchmark",
+                "Manufacturer": "Benchmark",
+                "Model": "1000",
+                "Device": "Device",
+            }
+        ],
+        "SNMP Items": [
+            {"OID": entry["OID"], "Name": entry["Name"]}
+            for entry in scalar_entries(entries)[:500]
+        ],
+        "SNMP Traps": [
+            {"OID": entry["OID"], "Name": entry["Name"]}
+            for entry in notification_entries(entries)[:100]
+        ],
+        MAIN_SHEET: entries,
+    }
+
+
+def time_read(path: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        with open_source(path) as source:
+            source.read_records(MAIN_SHEET, MIBValidator.MIB_COLUMNS)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def time_extract(path: str, repeat: int) -> Tuple[float, Tuple[Any, ...]]:
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        extracted = MIBValidator.extract_from_excel(path)
+        best = min(best, time.perf_counter() - start_time)
+
+    items, traps, template_info, mib_index = extracted
+    return best, (items, traps, template_info, mib_index.discovery_rule_tables)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sheets = benchmark_sheets(args.rows)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in args.formats:
+            path = os.path.join(directory, f"benchmark.{extension}")
+            size = sum(os.path.getsize(p) for p in write_sheets(path, sheets))
+
+            read_seconds = time_read(path, args.repeat)
+            # The extraction prints its progress, which is not part of the results
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                extract_seconds, output = time_extract(path, args.repeat)
+            results[extension] = (size, read_seconds, extract_seconds, output)
+
+    reference = next(iter(results.values()))[3]
+    print(f"{args.rows} MIB rows, best of {args.repeat}")
+    print(f"{'format':<10}{'size':>10}{'read MIB':>11}{'extract':>10}  same output")
+    for extension, (size, read_seconds, extract_seconds, output) in results.items():
+        print(
+            f"{extension:<10}{size / 1024 / 1024:>8.1f}MB{read_seconds:>10.3f}s"
+            f"{extract_seconds:>9.3f}s  {'yes' if output == reference else 'NO'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
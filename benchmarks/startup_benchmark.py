@@ -0,0 +1,100 @@
+"""
+Time the start of the CLI and a small end-to-end run, and list the slowest imports.
+
+Usage:
+    python -m benchmarks.startup_benchmark [--workbook sample_template_file.xlsx]
+        [--runs 10] [--top 15]
+
+Runs are made in a temporary directory whose MIB cache is warmed by a first, untimed
+run, as repeated automation runs would find it.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(REPOSITORY, "main.py")
+
+
+def time_command(command: List[str], directory: str, runs: int) -> List[float]:
+    seconds = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.run(command, cwd=directory, stdout=subprocess.DEVNULL, check=True)
+        seconds.append(time.perf_counter() - start_time)
+    return seconds
+
+
+def slowest_imports(directory: str) -> Tuple[int, List[Tuple[int, int, str]]]:
+    """
+    Import main.py under -X importtime.
+
+    Returns:
+        Tuple containing:
+        - The cumulative import time of main.py in microseconds
+        - The self time, cumulative time and name of every imported module
+    """
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys; sys.path.insert(0, {REPOSITORY!r}); import main",
+        ],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in completed.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[0].strip().isdigit():
+            modules.append((int(fields[0]), int(fields[1]), fields[2].strip()))
+    total = next(cumulative for _, cumulative, name in modules if name == "main")
+    return total, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--workbook", default=os.path.join(REPOSITORY, "sample_template_file.xlsx")
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    workbook = os.path.abspath(args.workbook)
+    with tempfile.TemporaryDirectory() as directory:
+        interpreter = time_command([sys.executable, "-c", "pass"], directory, args.runs)
+        help_runs = time_command([sys.executable, MAIN, "--help"], directory, args.runs)
+        time_command([sys.executable, MAIN, workbook], directory, 1)
+        template_runs = time_command([sys.executable, MAIN, workbook], directory, args.runs)
+        total, modules = slowest_imports(directory)
+
+    for label, seconds in (
+        ("python -c pass", interpreter),
+        ("main.py --help", help_runs),
+        (f"main.py {os.path.basename(workbook)}", template_runs),
+    ):
+        print(
+            f"{label:<40} median {statistics.median(seconds):.3f}s  "
+            f"min {min(seconds):.3f}s"
+        )
+
+    print(f"\nimport main: {total / 1000:.1f} ms, {len(modules)} modules")
+    print(f"{'self':>10}{'cumulative':>12}  module")
+    for self_us, cumulative_us, name in sorted(modules, key=lambda module: -module[0])[
+        : args.top
+    ]:
+        print(f"{self_us / 1000:>8.1f}ms{cumulative_us / 1000:>10.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+import csv
+import json
+import os
+import random
+import zipfile
+from typing import Any, Dict, List
+from xml.sax.saxutils import escape
+
+from utils.sources import MAIN_SHEET
+
+_WORDS = (
+    "the value of this object indicates status interface counter octets received "
+    "packets error number entries table agent"
+).split()
+_SCALAR_TYPES = ("Integer32", "OCTET STRING", "Float", "DISPLAYSTRING")
+_COLUMN_TYPES = ("Integer32", "OCTET STRING", "COUNTER32", "DISPLAYSTRING")
+
+_SPREADSHEET_NAMESPACE = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_RELATIONSHIPS_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/relationships"
+_RELATIONSHIP_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+BASE_OID = ".1.3.6.1.4.1.99999"
+MIB_MODULE = "BENCHMARK-MIB"
+
+
+def mib_entries(
+    count: int,
+    seed: int = 1,
+    table_every: int = 5,
+    columns_per_table: int = 20,
+    description_length: int = 300,
+) -> List[Dict[str, Any]]:
+    """
+    Generate the rows of a synthetic MIB sheet.
+
+    Every table_every-th group is a table with columns_per_table columns. The other
+    groups hold 20 scalars and one notification. Descriptions are random words split
+    into two paragraphs, like MIB Browser exports.
+
+    Args:
+        count (int): Approximate number of rows to generate.
+        seed (int): Random seed, so the same arguments always give the same rows.
+        table_every (int): Frequency of table groups.
+        columns_per_table (int): Number of columns of each table.
+        description_length (int): Approximate length of each description.
+
+    Returns:
+        List[Dict[str, Any]]: MIB rows keyed by the MIB sheet columns.
+    """
+    rnd = random.Random(seed)
+
+    def description() -> str:
+        text = " ".join(rnd.choice(_WORDS) for _ in range(description_length // 6))
+        middle = len(text) // 2
+        return f"{text[:middle]}\n\n   {text[middle:]}"
+
+    def entry(name: str, oid: str, entry_type: str) -> Dict[str, Any]:
+        return {
+            "MIB Module": MIB_MODULE,
+            "OID": oid,
+            "Name": name,
+            "Description": description(),
+            "Type": entry_type,
+        }
+
+    entries: List[Dict[str, Any]] = []
+    group = 0
+    while len(entries) < count:
+        group += 1
+        if group % table_every == 0:
+            table_oid = f"{BASE_OID}.{group}.1"
+            entries.append(
+                entry(f"bench{group}Table", table_oid, f"SEQUENCE OF Bench{group}Entry")
+            )
+            entries.append(entry(f"bench{group}Entry", f"{table_oid}.1", f"Bench{group}Entry"))
+            for column in range(1, columns_per_table + 1):
+                entries.append(
+                    entry(
+                        f"bench{group}Column{column}",
+                        f"{table_oid}.1.{column}",
+                        rnd.choice(_COLUMN_TYPES),
+                    )
+                )
+        else:
+            for scalar in range(1, 21):
+                entries.append(
+                    entry(
+                        f"bench{group}Scalar{scalar}",
+                        f"{BASE_OID}.{group}.{scalar}",
+                        rnd.choice(_SCALAR_TYPES),
+                    )
+                )
+            entries.append(
+                entry(f"bench{group}Notification", f"{BASE_OID}.0.{group}", "NOTIFICATION-TYPE")
+            )
+
+    return entries[:count]
+
+
+def workbook_sheets(
+    items: int,
+    traps: int,
+    tables: int,
+    columns: int,
+    description_length: int = 300,
+    seed: int = 1,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Generate the sheets of a synthetic workbook.
+
+    The MIB Data sheet holds one scalar per SNMP item, one notification per SNMP trap
+    and the given number of tables, so every item and trap validates, and every table
+    becomes a discovery rule.
+
+    Args:
+        items (int): Number of SNMP items.
+        traps (int): Number of SNMP traps.
+        tables (int): Number of tables in the MIB Data sheet.
+        columns (int): Number of columns of each table.
+        description_length (int): Approximate length of each description.
+        seed (int): Random seed, so the same arguments always give the same sheets.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Rows of each sheet, keyed by sheet name.
+    """
+    rnd = random.Random(seed)
+
+    def entry(name: str, oid: str, entry_type: str) -> Dict[str, Any]:
+        text = " ".join(rnd.choice(_WORDS) for _ in range(description_length // 6))
+        middle = len(text) // 2
+        return {
+            "MIB Module": MIB_MODULE,
+            "OID": oid,
+            "Name": name,
+            "Description": f"{text[:middle]}\n\n   {text[middle:]}",
+            "Type": entry_type,
+        }
+
+    scalars = [
+        entry(f"benchScalar{number}", f"{BASE_OID}.1.{number}", rnd.choice(_SCALAR_TYPES))
+        for number in range(1, items + 1)
+    ]
+    notifications = [
+        entry(f"benchNotification{number}", f"{BASE_OID}.0.{number}", "NOTIFICATION-TYPE")
+        for number in range(1, traps + 1)
+    ]
+    table_entries = []
+    for table in range(1, tables + 1):
+        table_oid = f"{BASE_OID}.2.{table}"
+        table_entries.append(
+            entry(f"bench{table}Table", table_oid, f"SEQUENCE OF Bench{table}Entry")
+        )
+        table_entries.append(entry(f"bench{table}Entry", f"{table_oid}.1", f"Bench{table}Entry"))
+        table_entries.extend(
+            entry(
+                f"bench{table}Column{column}",
+                f"{table_oid}.1.{column}",
+                rnd.choice(_COLUMN_TYPES),
+            )
+            for column in range(1, columns + 1)
+        )
+
+    return {
+        "Template Information": [
+            {
+                "Group": "Templates/Benchmark",
+                "Manufacturer": "Benchmark",
+                "Model": "1000",
+                "Device": "Device",
+            }
+        ],
+        "SNMP Items": [{"OID": row["OID"], "Name": row["Name"]} for row in scalars],
+        "SNMP Traps": [{"OID": row["OID"], "Name": row["Name"]} for row in notifications],
+        MAIN_SHEET: scalars + notifications + table_entries,
+    }
+
+
+def scalar_entries(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [entry for entry in entries if "Scalar" in entry["Name"]]
+
+
+def notification_entries(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [entry for entry in entries if entry["Type"] == "NOTIFICATION-TYPE"]
+
+
+def write_sheets(path: str, sheets: Dict[str, List[Dict[str, Any]]]) -> List[str]:
+    """
+    Write sheets in the format picked by the file extension, as utils.sources reads them.
+
+    An .xlsx path gets one workbook. Other formats get one file per sheet: the MIB Data
+    sheet goes to path and every other sheet to a companion file next to it.
+
+    Args:
+        path (str): Path of the workbook, or of the MIB Data file.
+        sheets (Dict[str, List[Dict[str, Any]]]): Rows of each sheet, keyed by sheet name.
+
+    Returns:
+        List[str]: Paths of the files written.
+    """
+    stem, extension = os.path.splitext(path)
+    if extension == ".xlsx":
+        _write_workbook(path, sheets)
+        return [path]
+
+    writers = {
+        ".csv": _write_csv,
+        ".jsonl": _write_json_lines,
+        ".parquet": _write_parquet,
+    }
+    paths = []
+    for sheet_name, rows in sheets.items():
+        sheet_path = path if sheet_name == MAIN_SHEET else f"{stem}.{sheet_name}{extension}"
+        writers[extension](sheet_path, rows)
+        paths.append(sheet_path)
+    return paths
+
+
+def _columns(rows: List[Dict[str, Any]]) -> List[str]:
+    return list(dict.fromkeys(column for row in rows for column in row))
+
+
+def _write_csv(path: str, rows: List[Dict[str, Any]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, _columns(rows))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _write_json_lines(path: str, rows: List[Dict[str, Any]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def _write_parquet(path: str, rows: List[Dict[str, Any]]) -> None:
+    import pyarrow
+    import pyarrow.parquet
+
+    columns = _columns(rows)
+    table = pyarrow.table({column: [row.get(column) for row in rows] for column in columns})
+    pyarrow.parquet.write_table(table, path)
+
+
+def _write_workbook(path: str, sheets: Dict[str, List[Dict[str, Any]]]) -> None:
+    # A minimal workbook with a shared string table, the layout Excel itself writes
+    shared_strings: Dict[str, int] = {}
+
+    def cell(reference: str, value: Any) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, (int, float)):
+            return f'<c r="{reference}"><v>{value}</v></c>'
+        index = shared_strings.setdefault(str(value), len(shared_strings))
+        return f'<c r="{reference}" t="s"><v>{index}</v></c>'
+
+    worksheets = []
+    for rows in sheets.values():
+        columns = _columns(rows)
+        letters = [_column_letters(position) for position in range(len(columns))]
+        lines = []
+        for number, values in enumerate(
+            [columns] + [[row.get(column) for column in columns] for row in rows], 1
+        ):
+            cells = "".join(
+                cell(f"{letter}{number}", value) for letter, value in zip(letters, values)
+            )
+            lines.append(f'<row r="{number}">{cells}</row>')
+        worksheets.append(
+            f'<worksheet xmlns="{_SPREADSHEET_NAMESPACE}"><sheetData>'
+            + "".join(lines)
+            + "</sheetData></worksheet>"
+        )
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(
+            "[Content_Types].xml",
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" '
+            'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{number}.xml" ContentType='
+                '"application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for number in range(1, len(worksheets) + 1)
+            )
+            + '<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            "</Types>",
+        )
+        archive.writestr(
+            "_rels/.rels",
+            f'<Relationships xmlns="{_RELATIONSHIPS_NAMESPACE}">'
+            f'<Relationship Id="rId1" Type="{_RELATIONSHIP_TYPE}/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>',
+        )
+        archive.writestr(
+            "xl/workbook.xml",
+            f'<workbook xmlns="{_SPREADSHEET_NAMESPACE}" xmlns:r="{_RELATIONSHIP_TYPE}">'
+            "<sheets>"
+            + "".join(
+                f'<sheet name="{escape(name)}" sheetId="{number}" r:id="rId{number}"/>'
+                for number, name in enumerate(sheets, 1)
+            )
+            + "</sheets></workbook>",
+        )
+        archive.writestr(
+            "xl/_rels/workbook.xml.rels",
+            f'<Relationships xmlns="{_RELATIONSHIPS_NAMESPACE}">'
+            + "".join(
+                f'<Relationship Id="rId{number}" Type="{_RELATIONSHIP_TYPE}/worksheet" '
+                f'Target="worksheets/sheet{number}.xml"/>'
+                for number in range(1, len(worksheets) + 1)
+            )
+            + f'<Relationship Id="rId{len(worksheets) + 1}" '
+            f'Type="{_RELATIONSHIP_TYPE}/sharedStrings" Target="sharedStrings.xml"/>'
+            "</Relationships>",
+        )
+        for number, worksheet in enumerate(worksheets, 1):
+            archive.writestr(f"xl/worksheets/sheet{number}.xml", worksheet)
+        archive.writestr(
+            "xl/sharedStrings.xml",
+            f'<sst xmlns="{_SPREADSHEET_NAMESPACE}" uniqueCount="{len(shared_strings)}">'
+            + "".join(
+                f'<si><t xml:space="preserve">{escape(value)}</t></si>'
+                for value in shared_strings
+            )
+            + "</sst>",
+        )
+
+
+def _column_letters(position: int) -> str:
+    letters = ""
+    position += 1
+    while position:
+        position, remainder = divmod(position - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
@@ -1,12 +1,31 @@
+import argparse
+import contextlib
+import functools
+import io
+import json
 import os
 import sys
 import time
-from typing import Literal
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Sequence, Tuple
 
-import yaml
+from utils import metrics
+from utils.mib_cache import MemoryMIBCache, MIBCache
+from utils.config import ESTIMATE, MIB_LIBRARY, SCALAR_WALK, SERVICE
 from utils.mib_validator import MIBValidator
+from utils.normalization import format_cache_stats
+from utils.object_builder import BACKENDS, ObjectBuilder
+from utils.sources import SOURCES, open_source
+from utils.uuid_generator import set_deterministic
+from utils.yaml_writer import write_template_yaml
 from zabbix_objects.template import Template
 
+# MIB files, the library, polling estimates and manifests are only needed by the runs
+# asking for them, so they are imported where they are used
+if TYPE_CHECKING:
+    from utils.mib_files import MIBFileLoader
+    from utils.mib_library import MIBLibrary
+    from utils.polling_estimate import PollingEstimator
+
 
 def create_all_yaml(
     template: Template,
@@ -26,87 +45,864 @@ def create_all_yaml(
     Returns:
         str: A YAML string representation of the template and its components.
     """
-    template_yaml = template.generate_yaml_dict()
-
-    if include_items and template.snmp_items:
-        snmp_item_yaml = [
-            snmp_item.generate_yaml_dict() for snmp_item in template.snmp_items
-        ]
-        template_yaml["zabbix_export"]["templates"][0]["items"].extend(snmp_item_yaml)
-
-    if include_traps and template.snmp_traps:
-        snmp_trap_yaml = [
-            snmp_trap.generate_yaml_dict() for snmp_trap in template.snmp_traps
-        ]
-        template_yaml["zabbix_export"]["templates"][0]["items"].extend(snmp_trap_yaml)
-
-    if include_discovery_rules and template.discovery_rules:
-        discovery_rule_yaml = [
-            discovery_rule.generate_yaml_dict()
-            for discovery_rule in template.discovery_rules
-        ]
-        if discovery_rule_yaml:
-            template_yaml["zabbix_export"]["templates"][0][
-                "discovery_rules"
-            ] = discovery_rule_yaml
-
-    return yaml.dump(template_yaml, default_flow_style=False, sort_keys=False)
+    yaml_stream = io.StringIO()
+    write_template_yaml(
+        template,
+        yaml_stream,
+        include_items=include_items,
+        include_traps=include_traps,
+        include_discovery_rules=include_discovery_rules,
+    )
+    return yaml_stream.getvalue()
 
 
-def main() -> None:
+def generate_template(
+    excel_file: Optional[str],
+    mib_cache: Optional[MIBCache] = None,
+    output_dir: str = "./created_templates",
+    deterministic_uuids: bool = False,
+    incremental: bool = False,
+    builder_backend: str = "auto",
+    mib_files: Optional["MIBFileLoader"] = None,
+    template_info: Optional[Dict[str, Any]] = None,
+    mib_library: Optional["MIBLibrary"] = None,
+    library_modules: Sequence[str] = (),
+    low_memory: bool = False,
+    polling_estimator: Optional["PollingEstimator"] = None,
+    bulk_scalars: Optional[int] = None,
+) -> Dict[str, Any]:
     """
-    Main function to process an Excel file and generate a Zabbix template YAML.
+    Generate a Zabbix template YAML file from an Excel file, or from MIB files alone.
 
-    This function:
-    1. Validates the command-line arguments
-    2. Extracts data from the provided Excel file
-    3. Creates a Template object
-    4. Generates a YAML representation of the template
-    5. Writes the YAML to a file
-    """
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <excel_file_path>")
-        sys.exit(1)
+    Args:
+        excel_file (Optional[str]): Path to the Excel file. Without one, the template
+            holds every readable scalar and notification of mib_files.
+        mib_cache (Optional[MIBCache]): Cache for the parsed and indexed MIB sheet.
+        output_dir (str): Directory the YAML file is written to.
+        deterministic_uuids (bool): Derive UUIDs from the template contents instead of
+            generating random ones.
+        incremental (bool): Only rebuild the rows that changed since the workbook's
+            manifest in output_dir was written, and update the manifest.
+        builder_backend (str): Backend the Zabbix objects are built on, see ObjectBuilder.
+        mib_files (Optional[MIBFileLoader]): SMI MIB files, read in place of the Excel
+            file's MIB sheet.
+        template_info (Optional[Dict[str, Any]]): Template information used without an
+            Excel file.
+        mib_library (Optional[MIBLibrary]): Shared MIB library used in place of the Excel
+            file's MIB sheet.
+        library_modules (Sequence[str]): Library modules whose tables become discovery
+            rules, besides those of the template's items and traps.
+        low_memory (bool): Stream the MIB rows into a compact columnar index instead of
+            holding one dictionary per row.
+        polling_estimator (Optional[PollingEstimator]): Estimates the polling load and
+            storage of the template, and holds it to a budget.
+        bulk_scalars (Optional[int]): Poll the SNMP items under a MIB parent holding at
+            least this many with one walk of the parent, as dependent items of it. Not
+            used with incremental.
 
-    excel_file = sys.argv[1]
+    Returns:
+        Dict[str, Any]: Summary of the generated template and its object counts.
 
-    if not os.path.exists(excel_file):
-        print(f"Error: File '{excel_file}' not found.")
-        sys.exit(1)
+    Raises:
+        BudgetExceededError: If the template exceeds the budget of polling_estimator,
+            in which case no YAML file is written.
+    """
+    # Set here rather than once in main() so batch worker processes pick it up too
+    set_deterministic(deterministic_uuids)
 
-    print("Extracting data from Excel...")
+    if excel_file is not None:
+        print("Extracting data from Excel...")
+        extracted = MIBValidator.extract_from_excel(
+            excel_file, mib_cache, mib_files, mib_library, library_modules, low_memory
+        )
+    else:
+        print("Extracting data from MIB files...")
+        extracted = MIBValidator.extract_from_mib_files(
+            mib_files, template_info or {}, low_memory
+        )
     (
         snmp_items_json_list,
         snmp_traps_json_list,
         template_info_json,
-        discovery_rule_tables,
-    ) = MIBValidator.extract_from_excel(excel_file)
+        mib_index,
+    ) = extracted
+
+    # Without a workbook, the manifest is named after the first MIB file
+    source_file = excel_file if excel_file is not None else mib_files.paths[0]
+    manifest = None
+    if incremental:
+        from utils.manifest import TemplateManifest
+
+        manifest = TemplateManifest.for_workbook(source_file, output_dir)
 
     print("Creating Template...")
-    template = Template(
-        template_info_json,
-        snmp_items_json_list,
-        snmp_traps_json_list,
-        discovery_rule_tables,
-    )
+    with metrics.stage("template"), ObjectBuilder(builder_backend) as object_builder:
+        template = Template(
+            template_info_json,
+            snmp_items_json_list,
+            snmp_traps_json_list,
+            mib_index,
+            manifest,
+            object_builder,
+            bulk_scalars,
+        )
+    print(format_cache_stats())
+    if manifest is not None:
+        print(manifest.summary())
+
+    estimate = None
+    if polling_estimator is not None:
+        from utils.polling_estimate import format_estimate
 
-    print("Creating YAML...")
-    yaml_template = create_all_yaml(template)
+        with metrics.stage("estimate"):
+            estimate = polling_estimator.estimate(template)
+        print(format_estimate(estimate))
 
     print("Writing YAML to file...")
     timestamp = time.strftime("%Y%m%d_%H%M%S")
-    output_dir = "./created_templates"
-    output_file = f"{output_dir}/{timestamp} {template.name} Template.yaml"
 
     # Check if the directory exists, if not, create it
     if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+        os.makedirs(output_dir, exist_ok=True)
         print(f"Created directory: {output_dir}")
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(yaml_template)
+    # Batch workers can finish workbooks for the same template within the same second,
+    # so the file is created exclusively and numbered if the name is already taken
+    copy_number = 1
+    while True:
+        suffix = f" ({copy_number})" if copy_number > 1 else ""
+        output_file = f"{output_dir}/{timestamp} {template.name} Template{suffix}.yaml"
+        try:
+            with metrics.stage("write"), open(output_file, "x", encoding="utf-8") as f:
+                write_template_yaml(template, f, manifest=manifest)
+            break
+        except FileExistsError:
+            copy_number += 1
 
     print(f"YAML template saved as '{output_file}'")
+
+    if manifest is not None:
+        manifest.save()
+
+    return {
+        "template": template.name,
+        "output_file": output_file,
+        # The library holds far more entries than the template uses, so they are not counted
+        "mib_entries": None if mib_library is not None else mib_index.entry_count,
+        "items": len(snmp_items_json_list),
+        "traps": len(template.snmp_traps),
+        "discovery_rules": len(template.discovery_rules),
+        "item_prototypes": sum(
+            discovery_rule.item_prototype_count
+            for discovery_rule in template.discovery_rules
+        ),
+        "yaml_bytes": os.path.getsize(output_file),
+        "estimate": estimate,
+    }
+
+
+def report_metrics(
+    summary: Dict[str, Any],
+    print_metrics: bool,
+    metrics_json: Optional[str],
+    cprofile_file: Optional[str],
+) -> None:
+    """
+    Report the metrics recorded while generating a template.
+
+    Args:
+        summary (Dict[str, Any]): Summary returned by generate_template.
+        print_metrics (bool): Print the stage times, memory and counts.
+        metrics_json (Optional[str]): JSON file the metrics are written to.
+        cprofile_file (Optional[str]): File the profile of the slowest stage is saved as.
+    """
+    counts = {
+        key: value
+        for key, value in summary.items()
+        if key not in ("template", "output_file", "estimate") and value is not None
+    }
+    run_metrics = metrics.snapshot(counts)
+    if print_metrics:
+        print(metrics.format_metrics(run_metrics))
+    if metrics_json is not None:
+        with open(metrics_json, "w", encoding="utf-8") as f:
+            json.dump({"template": summary["template"], **run_metrics}, f, indent=2)
+        print(f"Metrics saved as '{metrics_json}'")
+    if cprofile_file is not None:
+        print(metrics.hottest_profile(cprofile_file) or "No stage was profiled.")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate a Zabbix SNMP template from an Excel file."
+    )
+    parser.add_argument(
+        "excel_file",
+        nargs="?",
+        help="Path to the Excel file containing the MIB information, or to the MIB Data "
+        "file of a CSV, JSON Lines or Parquet source.",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="DIR_OR_GLOB",
+        help="Generate a template for every workbook or single-table source in a "
+        "directory or matching a glob.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of workbooks processed in parallel in batch mode (default: CPU count).",
+    )
+    parser.add_argument(
+        "--combine",
+        action="store_true",
+        help="In batch mode, also combine the templates into zabbix_export files that "
+        "are imported in one go.",
+    )
+    parser.add_argument(
+        "--max-export-mb",
+        type=float,
+        help="Split combined exports so each holds at most this many MiB of templates.",
+    )
+    parser.add_argument(
+        "--max-export-templates",
+        type=int,
+        help="Split combined exports so each holds at most this many templates.",
+    )
+    parser.add_argument(
+        "--deterministic-uuids",
+        action="store_true",
+        help="Derive UUIDs from the template name and item keys, so unchanged input "
+        "gives identical output.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only rebuild the rows that changed since the last incremental run of the "
+        "same workbook.",
+    )
+    parser.add_argument(
+        "--builder",
+        choices=BACKENDS,
+        help="How Items, Traps and Discovery Rules are built: serially, on a thread pool "
+        "or on a process pool (default: auto, or serial in batch mode where workbooks "
+        "already run in parallel).",
+    )
+    parser.add_argument(
+        "--mib",
+        action="append",
+        metavar="PATH",
+        help="SMIv1/SMIv2 MIB file, or directory of MIB files, read in place of the "
+        "workbook's MIB sheet. Without an Excel file, every readable scalar and "
+        "notification of these MIBs goes into the template. Can be repeated.",
+    )
+    parser.add_argument(
+        "--mib-dir",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="Directory searched for the modules the MIB files import. Can be repeated.",
+    )
+    parser.add_argument(
+        "--template-info",
+        nargs="+",
+        metavar="COLUMN=VALUE",
+        help="Template Information used with --mib and no Excel file, e.g. "
+        "Manufacturer=Cisco Device=Catalyst Model=9300 Group=Templates/Networking",
+    )
+    parser.add_argument(
+        "--library",
+        nargs="?",
+        const=MIB_LIBRARY.PATH,
+        metavar="PATH",
+        help="Validate the SNMP Items and SNMP Traps against the shared MIB library "
+        f"instead of the workbook's MIB sheet (default path: {MIB_LIBRARY.PATH}). "
+        "Fill it with: python main.py library import <files>",
+    )
+    parser.add_argument(
+        "--library-module",
+        action="append",
+        default=[],
+        metavar="MODULE",
+        help="Library module whose tables become discovery rules even if no SNMP item "
+        "or trap comes from it. Can be repeated.",
+    )
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="Stream the MIB sheet into a compact columnar index, for MIB sheets too "
+        "large to hold in memory as one row object each. Slightly slower.",
+    )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Only validate the SNMP Items and SNMP Traps against the MIB data, "
+        "reporting every missing and duplicated entry with the closest MIB entries, "
+        "without generating a template.",
+    )
+    parser.add_argument(
+        "--bulk-scalars",
+        nargs="?",
+        type=int,
+        const=SCALAR_WALK.MIN_ITEMS,
+        metavar="MIN_ITEMS",
+        help="Poll the SNMP items sharing a MIB parent with one walk of the parent, as "
+        "dependent items of it, when the parent holds at least MIN_ITEMS of them "
+        f"(default: {SCALAR_WALK.MIN_ITEMS}) and the walk takes fewer requests.",
+    )
+    parser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="Print the new values per second, SNMP requests per host per minute and "
+        "history and trends rows per day the template is expected to cost.",
+    )
+    parser.add_argument(
+        "--estimate-json",
+        metavar="PATH",
+        help="Write the estimate printed by --estimate to a JSON file.",
+    )
+    parser.add_argument(
+        "--hosts",
+        type=int,
+        default=ESTIMATE.HOSTS,
+        help="Number of hosts the template is linked to in the estimate "
+        f"(default: {ESTIMATE.HOSTS}).",
+    )
+    parser.add_argument(
+        "--discovery-rows",
+        type=int,
+        default=ESTIMATE.DISCOVERY_ROWS,
+        help="Number of rows discovered in every table in the estimate "
+        f"(default: {ESTIMATE.DISCOVERY_ROWS}).",
+    )
+    parser.add_argument(
+        "--max-nvps",
+        type=float,
+        help="Budget of new values per second across all the hosts. A template over "
+        "budget fails unless --relax-delays is given.",
+    )
+    parser.add_argument(
+        "--max-requests-per-minute",
+        type=float,
+        help="Budget of SNMP requests per host per minute.",
+    )
+    parser.add_argument(
+        "--relax-delays",
+        action="store_true",
+        help="Lengthen the delays of SNMP items and walk items until the template fits "
+        "its budget, instead of failing.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the wall and CPU time of each stage, the peak memory and the row, "
+        "object and warning counts of the run.",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        help="Write the metrics printed by --profile to a JSON file.",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="Run every stage under cProfile and save the profile of the slowest one, "
+        "readable with pstats or snakeviz.",
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=metrics.LOG_LEVELS,
+        default="INFO",
+        help="Lowest level of the warnings printed while building objects, e.g. "
+        "truncated keys. DEBUG also lists the tables split across several walk items, "
+        "and ERROR silences the warnings (default: INFO).",
+    )
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse the MIB sheet without reading or writing the MIB cache.",
+    )
+    cache_group.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Re-parse the MIB sheet and overwrite its MIB cache entry.",
+    )
+
+    args = parser.parse_args(argv)
+    if args.excel_file is not None and args.batch is not None:
+        parser.error("provide either an Excel file or --batch, but not both")
+    if args.excel_file is None and args.batch is None and not args.mib:
+        parser.error("provide an Excel file, --batch or --mib")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    from_mibs_only = args.excel_file is None and args.batch is None
+    if args.template_info is not None and not from_mibs_only:
+        parser.error("--template-info is only used with --mib and no Excel file")
+    if from_mibs_only and args.template_info is None:
+        parser.error("--mib without an Excel file needs --template-info")
+    if args.library is not None and args.mib:
+        parser.error("provide either --library or --mib, but not both")
+    if args.library_module and args.library is None:
+        parser.error("--library-module is only used with --library")
+    if args.batch is not None and (args.profile or args.metrics_json or args.cprofile):
+        parser.error("--profile, --metrics-json and --cprofile are not used with --batch")
+    if args.validate_only and args.excel_file is None:
+        parser.error("--validate-only needs an Excel file")
+    if args.validate_only and (args.profile or args.metrics_json or args.cprofile):
+        parser.error("--profile, --metrics-json and --cprofile are not used with --validate-only")
+    if args.combine and args.batch is None:
+        parser.error("--combine is only used with --batch")
+    if (
+        args.max_export_mb is not None or args.max_export_templates is not None
+    ) and not args.combine:
+        parser.error("--max-export-mb and --max-export-templates are only used with --combine")
+    if args.max_export_mb is not None and args.max_export_mb <= 0:
+        parser.error("--max-export-mb must be positive")
+    if args.max_export_templates is not None and args.max_export_templates < 1:
+        parser.error("--max-export-templates must be at least 1")
+
+    has_budget = args.max_nvps is not None or args.max_requests_per_minute is not None
+    args.estimating = args.estimate or args.estimate_json is not None or has_budget
+    if args.batch is not None and (args.estimate or args.estimate_json):
+        parser.error("--estimate and --estimate-json are not used with --batch")
+    if args.validate_only and args.estimating:
+        parser.error("--estimate, --estimate-json and budgets are not used with --validate-only")
+    if (
+        args.hosts != ESTIMATE.HOSTS or args.discovery_rows != ESTIMATE.DISCOVERY_ROWS
+    ) and not args.estimating:
+        parser.error(
+            "--hosts and --discovery-rows are only used with --estimate, --estimate-json "
+            "or a budget"
+        )
+    if args.hosts < 1:
+        parser.error("--hosts must be at least 1")
+    if args.discovery_rows < 0:
+        parser.error("--discovery-rows must not be negative")
+    for option, limit in (
+        ("--max-nvps", args.max_nvps),
+        ("--max-requests-per-minute", args.max_requests_per_minute),
+    ):
+        if limit is not None and limit <= 0:
+            parser.error(f"{option} must be positive")
+    if args.relax_delays and not has_budget:
+        parser.error("--relax-delays needs --max-nvps or --max-requests-per-minute")
+    # Reused rows keep the delays they were rendered with
+    if args.relax_delays and args.incremental:
+        parser.error("--relax-delays is not used with --incremental")
+    if args.bulk_scalars is not None and args.bulk_scalars < 2:
+        parser.error("--bulk-scalars must be at least 2")
+    # Reused rows cannot be turned into dependent items
+    if args.bulk_scalars is not None and args.incremental:
+        parser.error("--bulk-scalars is not used with --incremental")
+    if args.bulk_scalars is not None and args.validate_only:
+        parser.error("--bulk-scalars is not used with --validate-only")
+
+    template_info = {}
+    for column_value in args.template_info or []:
+        column, separator, value = column_value.partition("=")
+        if not separator or column not in MIBValidator.TEMPLATE_COLUMNS:
+            parser.error(
+                f"--template-info expects COLUMN=VALUE with a column among "
+                f"{', '.join(MIBValidator.TEMPLATE_COLUMNS)}, got '{column_value}'"
+            )
+        template_info[column] = value
+    args.template_info = template_info
+    return args
+
+
+def parse_library_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py library",
+        description="Manage the shared MIB library used with --library.",
+    )
+    parser.add_argument(
+        "--path",
+        default=MIB_LIBRARY.PATH,
+        help=f"Path of the MIB library (default: {MIB_LIBRARY.PATH}).",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser(
+        "import",
+        help="Import MIB modules, replacing the ones already in the library.",
+    )
+    import_parser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="PATH",
+        help="Workbook or single-table source whose MIB sheet is imported, or SMIv1/SMIv2 "
+        "MIB file or directory of MIB files.",
+    )
+    import_parser.add_argument(
+        "--mib-dir",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="Directory searched for the modules the MIB files import. Can be repeated.",
+    )
+    commands.add_parser("list", help="List the modules in the library.")
+    return parser.parse_args(argv)
+
+
+def import_into_library(
+    mib_library: "MIBLibrary",
+    paths: Sequence[str],
+    mib_dirs: Sequence[str] = (),
+    mib_cache: Optional[MIBCache] = None,
+) -> None:
+    """
+    Bulk import the MIB sheets of workbooks, or SMI MIB files, into the MIB library.
+
+    Args:
+        mib_library (MIBLibrary): The library to import into.
+        paths (Sequence[str]): Workbooks, single-table sources, MIB files or directories
+            of MIB files.
+        mib_dirs (Sequence[str]): Directories searched for the modules MIB files import.
+        mib_cache (Optional[MIBCache]): Cache for the compiled MIB files.
+    """
+    for path in paths:
+        start_time = time.perf_counter()
+        if os.path.splitext(path)[1].lower() in SOURCES:
+            with open_source(path) as reader:
+                mib_sheet_name = next(
+                    (sheet for sheet in reader.sheet_names if "MIB" in sheet), None
+                )
+                if mib_sheet_name is None:
+                    print(f"Skipped '{path}': no MIB sheet.")
+                    continue
+                entries = reader.read_records(mib_sheet_name, MIBValidator.MIB_COLUMNS)
+        else:
+            from utils.mib_files import MIBFileLoader
+
+            entries = MIBFileLoader([path], mib_dirs, mib_cache).rows()
+
+        imported = mib_library.import_entries(entries, path)
+        print(
+            f"[{sum(imported.values())}] MIB entries of [{len(imported)}] modules "
+            f"imported from '{path}' in {time.perf_counter() - start_time:.2f}s."
+        )
+
+
+def library_main(argv: List[str]) -> None:
+    from utils.mib_library import MIBLibrary, MIBLibraryError
+
+    args = parse_library_args(argv)
+    mib_library = MIBLibrary(args.path)
+    try:
+        if args.command == "import":
+            for path in args.paths:
+                if not os.path.exists(path):
+                    print(f"Error: File '{path}' not found.")
+                    sys.exit(1)
+            import_into_library(mib_library, args.paths, args.mib_dir, MIBCache())
+            print(f"Library '{args.path}' holds [{mib_library.entry_count()}] MIB entries.")
+        else:
+            modules = mib_library.modules()
+            for name, source, entry_count in modules:
+                print(f"{name or '(no module)':<40}{entry_count:>8}  {source}")
+            print(f"[{len(modules)}] modules in library '{args.path}'.")
+    except MIBLibraryError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        mib_library.close()
+
+
+def parse_serve_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        description="Serve template generation over HTTP, keeping MIB indexes and caches "
+        "warm between requests.",
+    )
+    parser.add_argument(
+        "--host",
+        default=SERVICE.HOST,
+        help=f"Address to listen on (default: {SERVICE.HOST}).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=SERVICE.PORT,
+        help=f"Port to listen on, or 0 for any free port (default: {SERVICE.PORT}).",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="Listen on a Unix socket at this path instead of a TCP port.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=SERVICE.JOBS,
+        help=f"Number of templates generated at once (default: {SERVICE.JOBS}).",
+    )
+    parser.add_argument(
+        "--queue-timeout",
+        type=float,
+        default=SERVICE.QUEUE_TIMEOUT,
+        help="Seconds a request waits for a generation slot before failing with 503 "
+        f"(default: {SERVICE.QUEUE_TIMEOUT}).",
+    )
+    parser.add_argument(
+        "--max-upload-mb",
+        type=float,
+        default=SERVICE.MAX_UPLOAD_BYTES / (1024 * 1024),
+        help="Largest workbook accepted in a request body, in MiB "
+        f"(default: {SERVICE.MAX_UPLOAD_BYTES // (1024 * 1024)}).",
+    )
+    parser.add_argument(
+        "--deterministic-uuids",
+        action="store_true",
+        help="Derive UUIDs from the template name and item keys.",
+    )
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="Index MIB sheets column by column, see main.py --help.",
+    )
+    parser.add_argument(
+        "--builder",
+        choices=BACKENDS,
+        default="serial",
+        help="How the objects of each template are built (default: serial, as requests "
+        "already run in parallel).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Keep MIB indexes in memory only, without reading or writing the MIB cache.",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return args
+
+
+def serve_main(argv: List[str]) -> None:
+    import signal
+
+    from utils.service import TemplateService, create_server
+
+    args = parse_serve_args(argv)
+    mib_cache = MemoryMIBCache(None if args.no_cache else MIBCache())
+    service = TemplateService(
+        functools.partial(
+            generate_template,
+            mib_cache=mib_cache,
+            deterministic_uuids=args.deterministic_uuids,
+            builder_backend=args.builder,
+            low_memory=args.low_memory,
+        ),
+        jobs=args.jobs,
+        queue_timeout=args.queue_timeout,
+        max_upload_bytes=int(args.max_upload_mb * 1024 * 1024),
+        mib_cache=mib_cache,
+    )
+    server = create_server(service, args.host, args.port, args.socket)
+    if args.socket is not None:
+        print(f"Serving templates on Unix socket '{args.socket}'")
+    else:
+        host, port = server.server_address[:2]
+        print(f"Serving templates on http://{host}:{port}")
+    print("POST /templates with a workbook, or ?path=, returns its YAML. GET /health.")
+    sys.stdout.flush()
+
+    # Stopping the service with SIGTERM cleans up like Ctrl+C does
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # The progress output of concurrent requests would interleave, so it is dropped.
+    # Requests are logged to stderr
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket is not None and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+def main() -> None:
+    """
+    Main function to process an Excel file and generate a Zabbix template YAML.
+
+    This function:
+    1. Validates the command-line arguments
+    2. Extracts data from the provided Excel file, or from the --mib files
+    3. Creates a Template object
+    4. Streams the YAML representation of the template to a file
+
+    With --validate-only, the Excel data is only validated, see
+    MIBValidator.validate_excel. With --estimate or a budget, the polling load of the
+    template is estimated before it is written, see PollingEstimator. With
+    --bulk-scalars, SNMP items sharing a MIB parent are polled with one walk of it, see
+    Template._collapse_scalar_gets.
+
+    With --batch, every matching workbook goes through the same steps on a process
+    pool and a summary table is written next to the templates. --combine also merges
+    the templates into zabbix_export files.
+
+    "main.py library ..." manages the shared MIB library instead, see library_main, and
+    "main.py serve ..." serves template generation over HTTP, see serve_main.
+    """
+    if sys.argv[1:2] == ["library"]:
+        library_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["serve"]:
+        serve_main(sys.argv[2:])
+        return
+
+    args = parse_args()
+    metrics.set_log_level(args.log_level)
+    mib_cache = None if args.no_cache else MIBCache(rebuild=args.rebuild_cache)
+    mib_files = None
+    if args.mib:
+        from utils.mib_files import MIBFileLoader
+
+        mib_files = MIBFileLoader(args.mib, args.mib_dir, mib_cache)
+    mib_library = None
+    if args.library is not None:
+        from utils.mib_library import MIBLibrary
+
+        mib_library = MIBLibrary(args.library)
+        if not os.path.exists(mib_library.path):
+            print(
+                f"Error: MIB library '{mib_library.path}' not found. Import MIBs into "
+                "it with: python main.py library import <files>"
+            )
+            sys.exit(1)
+
+    polling_estimator = None
+    # Only a budget raises these, and only estimating runs have one
+    budget_errors: Tuple[type, ...] = ()
+    if args.estimating:
+        from utils.polling_estimate import BudgetExceededError, PollingEstimator
+
+        polling_estimator = PollingEstimator(
+            args.hosts,
+            args.discovery_rows,
+            args.max_nvps,
+            args.max_requests_per_minute,
+            args.relax_delays,
+        )
+        budget_errors = (BudgetExceededError,)
+
+    if args.batch is not None:
+        from utils.batch import (
+            collect_workbooks,
+            format_summary,
+            run_batch,
+            write_combined_exports,
+            write_summary,
+        )
+
+        workbooks = collect_workbooks(args.batch)
+        if not workbooks:
+            print(f"Error: No workbooks found for '{args.batch}'.")
+            sys.exit(1)
+
+        print(f"Generating [{len(workbooks)}] templates with {args.jobs} job(s)...")
+        results = run_batch(
+            workbooks,
+            functools.partial(
+                generate_template,
+                mib_cache=mib_cache,
+                deterministic_uuids=args.deterministic_uuids,
+                incremental=args.incremental,
+                builder_backend=args.builder or "serial",
+                mib_files=mib_files,
+                mib_library=mib_library,
+                library_modules=args.library_module,
+                low_memory=args.low_memory,
+                polling_estimator=polling_estimator,
+                bulk_scalars=args.bulk_scalars,
+            ),
+            args.jobs,
+        )
+        summary_file = write_summary(results, "./created_templates")
+
+        print(format_summary(results))
+        print(f"Batch summary saved as '{summary_file}'")
+        if args.combine and not all(result["error"] for result in results):
+            export_files = write_combined_exports(
+                results,
+                "./created_templates",
+                max_bytes=(
+                    int(args.max_export_mb * 1024 * 1024)
+                    if args.max_export_mb is not None
+                    else None
+                ),
+                max_templates=args.max_export_templates,
+            )
+            for export_file in export_files:
+                print(f"Combined export saved as '{export_file}'")
+        if any(result["error"] for result in results):
+            sys.exit(1)
+        print("Process completed successfully!")
+        return
+
+    excel_file = args.excel_file
+
+    for path in ([excel_file] if excel_file is not None else []) + (args.mib or []):
+        if not os.path.exists(path):
+            print(f"Error: File '{path}' not found.")
+            sys.exit(1)
+
+    if excel_file is not None and os.path.splitext(excel_file)[1].lower() not in SOURCES:
+        print(
+            f"Error: Unsupported file type for '{excel_file}', expected one of "
+            f"{', '.join(SOURCES)}."
+        )
+        sys.exit(1)
+
+    if args.validate_only:
+        print("Validating Excel data...")
+        report = MIBValidator.validate_excel(
+            excel_file,
+            mib_cache,
+            mib_files,
+            mib_library,
+            args.library_module,
+            args.low_memory,
+        )
+        print(MIBValidator.format_validation_report(report))
+        if any(
+            sheet_report["unmatched"] or sheet_report["ambiguous"]
+            for sheet_report in report.values()
+        ):
+            sys.exit(1)
+        print("Validation completed successfully!")
+        return
+
+    metrics.reset(profile=args.cprofile is not None)
+    try:
+        summary = generate_template(
+            excel_file,
+            mib_cache,
+            deterministic_uuids=args.deterministic_uuids,
+            incremental=args.incremental,
+            builder_backend=args.builder or "auto",
+            mib_files=mib_files,
+            template_info=args.template_info,
+            mib_library=mib_library,
+            library_modules=args.library_module,
+            low_memory=args.low_memory,
+            polling_estimator=polling_estimator,
+            bulk_scalars=args.bulk_scalars,
+        )
+    except budget_errors as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if args.estimate_json is not None:
+        with open(args.estimate_json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"template": summary["template"], **summary["estimate"]}, f, indent=2
+            )
+        print(f"Estimate saved as '{args.estimate_json}'")
+    if args.profile or args.metrics_json or args.cprofile:
+        report_metrics(summary, args.profile, args.metrics_json, args.cprofile)
     print("Process completed successfully!")
 
 
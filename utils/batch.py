@@ -0,0 +1,219 @@
+import concurrent.futures
+import contextlib
+import csv
+import glob
+import io
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.sources import SOURCES, is_companion_file
+from utils.yaml_writer import read_template_entries, write_export_files
+
+SUMMARY_COLUMNS = (
+    "workbook",
+    "status",
+    "seconds",
+    "template",
+    "items",
+    "traps",
+    "discovery_rules",
+    "item_prototypes",
+    "output_file",
+    "error",
+)
+
+
+def collect_workbooks(directory_or_glob: str) -> List[str]:
+    """
+    Collect the workbooks to process in batch mode.
+
+    Args:
+        directory_or_glob (str): A directory, whose workbooks and single-table sources are
+            all used, or a glob pattern.
+
+    Returns:
+        List[str]: Sorted workbook paths, excluding Excel lock files and the companion
+            sheet files of single-table sources.
+    """
+    if os.path.isdir(directory_or_glob):
+        directory = glob.escape(directory_or_glob)
+        paths = [
+            path
+            for extension in SOURCES
+            for path in glob.glob(os.path.join(directory, f"*{extension}"))
+        ]
+    else:
+        paths = glob.glob(directory_or_glob, recursive=True)
+
+    return sorted(
+        path
+        for path in paths
+        if os.path.isfile(path)
+        and not os.path.basename(path).startswith("~$")
+        and not is_companion_file(path)
+    )
+
+
+def run_batch(
+    workbooks: List[str],
+    generate: Callable[[str], Dict[str, Any]],
+    jobs: int,
+) -> List[Dict[str, Any]]:
+    """
+    Generate templates for many workbooks on a process pool.
+
+    Each workbook is processed in isolation: an exception raised for one workbook is
+    recorded in its result and does not stop the others.
+
+    Args:
+        workbooks (List[str]): Paths of the workbooks to process.
+        generate (Callable[[str], Dict[str, Any]]): Picklable function generating the
+            template for one workbook and returning its summary.
+        jobs (int): Number of worker processes.
+
+    Returns:
+        List[Dict[str, Any]]: One result per workbook, in input order.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(_generate_isolated, generate, workbook): workbook
+            for workbook in workbooks
+        }
+        for future in concurrent.futures.as_completed(futures):
+            workbook = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker process itself died, e.g. from running out of memory
+                result = {"workbook": workbook, "error": f"{type(e).__name__}: {e}"}
+
+            result.setdefault("seconds", None)
+            result["status"] = "FAILED" if result.get("error") else "OK"
+            results[workbook] = result
+            print(
+                f"[{len(results)}/{len(workbooks)}] {result['status']} {workbook}"
+            )
+
+    return [results[workbook] for workbook in workbooks]
+
+
+def _generate_isolated(
+    generate: Callable[[str], Dict[str, Any]], workbook: str
+) -> Dict[str, Any]:
+    start_time = time.perf_counter()
+    result: Dict[str, Any] = {"workbook": workbook, "error": None}
+
+    # Per-workbook progress output would interleave across workers, so it is dropped
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            result.update(generate(workbook))
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+
+    result["seconds"] = round(time.perf_counter() - start_time, 3)
+    return result
+
+
+def format_summary(results: List[Dict[str, Any]]) -> str:
+    """
+    Format batch results as a plain-text table.
+
+    Args:
+        results (List[Dict[str, Any]]): Results returned by run_batch.
+
+    Returns:
+        str: The summary table, followed by a totals line.
+    """
+    columns = SUMMARY_COLUMNS[:-2]
+    rows = [columns] + [
+        tuple("" if result.get(column) is None else str(result[column]) for column in columns)
+        for result in results
+    ]
+    widths = [max(len(row[index]) for row in rows) for index in range(len(columns))]
+
+    lines = [
+        "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+        for row in rows
+    ]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+
+    failures = [result for result in results if result.get("error")]
+    for result in failures:
+        lines.append(f"FAILED {result['workbook']}: {result['error']}")
+
+    total_seconds = sum(result["seconds"] or 0 for result in results)
+    lines.append(
+        f"[{len(results) - len(failures)}] succeeded, [{len(failures)}] failed, "
+        f"{total_seconds:.2f}s of total workbook time"
+    )
+    return "\n".join(lines)
+
+
+def write_summary(results: List[Dict[str, Any]], output_dir: str) -> str:
+    """
+    Write batch results as a CSV file.
+
+    Args:
+        results (List[Dict[str, Any]]): Results returned by run_batch.
+        output_dir (str): Directory the summary is written to.
+
+    Returns:
+        str: Path of the summary file.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    summary_file = f"{output_dir}/{timestamp} Batch Summary.csv"
+
+    with open(summary_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+    return summary_file
+
+
+def write_combined_exports(
+    results: List[Dict[str, Any]],
+    output_dir: str,
+    max_bytes: Optional[int] = None,
+    max_templates: Optional[int] = None,
+) -> List[str]:
+    """
+    Combine the templates of a batch into zabbix_export files, each imported in one go,
+    with the template groups they share exported once.
+
+    Args:
+        results (List[Dict[str, Any]]): Results returned by run_batch. The templates of
+            failed workbooks are left out, as are templates named like an earlier one.
+        output_dir (str): Directory the exports are written to.
+        max_bytes (Optional[int]): Size of the templates an export holds at most.
+        max_templates (Optional[int]): Number of templates an export holds at most.
+
+    Returns:
+        List[str]: Paths of the exports, in workbook order.
+    """
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+
+    def entries() -> Iterator[Tuple[List[Dict[str, Any]], str]]:
+        templates = set()
+        for result in results:
+            if result.get("error"):
+                continue
+            if result["template"] in templates:
+                print(
+                    f"Warning: Template '{result['template']}' of {result['workbook']} is "
+                    "already in the combined export, leaving it out."
+                )
+                continue
+            templates.add(result["template"])
+            yield read_template_entries(result["output_file"])
+
+    return write_export_files(
+        entries(),
+        lambda number: f"{output_dir}/{timestamp} Combined Export {number}.yaml",
+        max_bytes,
+        max_templates,
+    )
@@ -11,8 +11,25 @@ SNMP_TRAP = SimpleNamespace(
     VALUE_TYPE="LOG",
 )
 
+# MAX_OIDS_LENGTH bounds the OID list inside walk[...]. Tables whose columns exceed it
+# are polled by several walk items
 SNMP_WALK_ITEM = SimpleNamespace(
-    HISTORY="0d", TRENDS="0", DELAY="1m", TYPE="SNMP_AGENT", VALUE_TYPE="TEXT"
+    HISTORY="0d",
+    TRENDS="0",
+    DELAY="1m",
+    TYPE="SNMP_AGENT",
+    VALUE_TYPE="TEXT",
+    MAX_OIDS_LENGTH=250,
+)
+
+# With --bulk-scalars, MIN_ITEMS or more SNMP items under the same MIB parent are
+# polled by one walk of the parent, and become DEPENDENT items picking their value out
+# of it. VALUE_FORMAT 0 keeps the walked value unchanged
+SCALAR_WALK = SimpleNamespace(
+    MIN_ITEMS=3,
+    TYPE="DEPENDENT",
+    PREPROCESSING="SNMP_WALK_VALUE",
+    VALUE_FORMAT="0",
 )
 
 ITEM_PROTOTYPE = SimpleNamespace(
@@ -20,3 +37,55 @@ ITEM_PROTOTYPE = SimpleNamespace(
 )
 
 DISCOVERY_RULE = SimpleNamespace(TYPE="DEPENDENT")
+
+# Polling estimates assume HOSTS hosts and DISCOVERY_ROWS rows in every discovered
+# table, walked BULK_MAX_REPETITIONS rows per GetBulk request as Zabbix interfaces do by
+# default. Over budget, delays are relaxed to the next of DELAY_STEPS
+ESTIMATE = SimpleNamespace(
+    HOSTS=1,
+    DISCOVERY_ROWS=10,
+    BULK_MAX_REPETITIONS=10,
+    DELAY_STEPS=("1m", "2m", "5m", "10m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d"),
+)
+
+# MEMORY_ENTRIES is the number of MIB indexes the template service keeps in memory
+MIB_CACHE = SimpleNamespace(
+    DIRECTORY="./.mib_cache", MAX_BYTES=512 * 1024 * 1024, MEMORY_ENTRIES=8
+)
+
+MIB_LIBRARY = SimpleNamespace(PATH="./mib_library.sqlite3")
+
+# Generations run at once by "main.py serve", and how long a request waits for a slot
+SERVICE = SimpleNamespace(
+    HOST="127.0.0.1",
+    PORT=8080,
+    JOBS=2,
+    QUEUE_TIMEOUT=60,
+    MAX_UPLOAD_BYTES=100 * 1024 * 1024,
+)
+
+# Descriptions of a low-memory MIB index are compressed this many rows at a time
+MIB_INDEX = SimpleNamespace(DESCRIPTION_BLOCK_ROWS=64)
+
+# Closest MIB entries suggested for an unmatched SNMP item or trap. OIDs are suggested
+# from the same subtree at a depth of at least MIN_OID_PREFIX_ARCS, e.g. an enterprise,
+# and names within MAX_NAME_DISTANCE edits per character of the name
+SUGGESTIONS = SimpleNamespace(
+    LIMIT=3,
+    MIN_OID_PREFIX_ARCS=7,
+    NAME_CANDIDATES=50,
+    NAME_POSTINGS_BUDGET=20000,
+    MAX_NAME_DISTANCE=0.4,
+)
+
+# Number of distinct names, descriptions and key segments each normalization cache keeps
+NORMALIZATION = SimpleNamespace(CACHE_SIZE=16384)
+
+UUID = SimpleNamespace(NAMESPACE="744c6548-695b-4121-b737-ad654b829b03")
+
+# Building an object takes ~40us per row and sending it back from a worker process ~15us,
+# so the process backend only pays off with several workers and enough rows to cover
+# starting them. See benchmarks/object_builder_benchmark.py
+OBJECT_BUILDER = SimpleNamespace(
+    BACKEND="auto", CHUNK_SIZE=256, PROCESS_MIN_ROWS=5000, PROCESS_MIN_JOBS=4
+)
@@ -0,0 +1,150 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils import metrics
+from utils.normalization import normalize_descriptions, normalize_names, slugify_all
+
+_VALUE_TYPES = {
+    "DISPLAYSTRING": "CHAR",
+    "OCTET STRING": "CHAR",
+    "Integer32": None,
+    "Float": "FLOAT",
+}
+_DEFAULT_VALUE_TYPE = "TEXT"
+
+MAX_KEY_LENGTH = 255
+
+# (name, description, key, value_type, trends) of one item or item prototype
+DerivedFields = Tuple[str, str, str, Optional[str], str]
+
+
+def derive_names(raw_names: Sequence[str], remove: str = "") -> List[str]:
+    """
+    Turn a column of MIB object names into display names.
+
+    Args:
+        raw_names (Sequence[str]): Names of the MIB objects.
+        remove (str): Text removed from every display name, e.g. " Trap".
+
+    Returns:
+        List[str]: The display names, in input order.
+    """
+    names = normalize_names(raw_names)
+    return [name.replace(remove, "") for name in names] if remove else names
+
+
+def derive_descriptions(rows: Sequence[Dict[str, Any]]) -> List[str]:
+    """
+    Build the descriptions of items from their MIB objects.
+
+    Args:
+        rows (Sequence[Dict[str, Any]]): MIB entries of the items.
+
+    Returns:
+        List[str]: The descriptions, in input order.
+    """
+    raw_descriptions = [row.get("Description") for row in rows]
+    processed_descriptions = iter(
+        normalize_descriptions([d for d in raw_descriptions if d])
+    )
+
+    descriptions = []
+    for row, raw_description in zip(rows, raw_descriptions):
+        header = f"{row.get('MIB Module')}::{row.get('Name')}\nOID::{row.get('OID')}"
+        if raw_description:
+            descriptions.append(f"{header}\n{next(processed_descriptions)}")
+        else:
+            descriptions.append(f"{header}\nNo description available.")
+    return descriptions
+
+
+def derive_value_types(raw_types: Sequence[Optional[str]]) -> List[Optional[str]]:
+    return [_VALUE_TYPES.get(raw_type, _DEFAULT_VALUE_TYPE) for raw_type in raw_types]
+
+
+def derive_trends(value_types: Sequence[Optional[str]], default: str) -> List[str]:
+    # Only numeric values keep trends
+    return [
+        default if value_type == "FLOAT" or value_type is None else "0"
+        for value_type in value_types
+    ]
+
+
+def derive_item_keys(names: Sequence[str], template_name: str) -> List[str]:
+    prefix = f"{template_name.lower().replace(' ', '.')}."
+    return [_truncate_key(f"{prefix}{slug}.get") for slug in slugify_all(names)]
+
+
+def derive_item_prototype_keys(names: Sequence[str], master_item_key: str) -> List[str]:
+    key_without_walk = master_item_key.replace(".walk", "")
+    master_subkey = key_without_walk.split(".")[-1]
+    return [
+        _truncate_key(
+            f"{key_without_walk}.{slug.replace(master_subkey, '').replace('-', '')}"
+            "[{#SNMPINDEX}]"
+        )
+        for slug in slugify_all(names)
+    ]
+
+
+def derive_item_fields(
+    rows: Sequence[Dict[str, Any]], template_name: str, default_trends: str
+) -> List[DerivedFields]:
+    """
+    Derive the fields of the SNMP items of some rows, a column at a time.
+
+    Args:
+        rows (Sequence[Dict[str, Any]]): MIB entries of the items.
+        template_name (str): Name of the template the items belong to.
+        default_trends (str): Trends of items holding numeric values.
+
+    Returns:
+        List[DerivedFields]: The fields of each row, in input order.
+    """
+    names = derive_names([row.get("Name") for row in rows])
+    value_types = derive_value_types([row.get("Type") for row in rows])
+    return list(
+        zip(
+            names,
+            derive_descriptions(rows),
+            derive_item_keys(names, template_name),
+            value_types,
+            derive_trends(value_types, default_trends),
+        )
+    )
+
+
+def derive_item_prototype_fields(
+    rows: Sequence[Dict[str, Any]], master_item_key: str, default_trends: str
+) -> List[DerivedFields]:
+    """
+    Derive the fields of the item prototypes of some rows, a column at a time.
+
+    Args:
+        rows (Sequence[Dict[str, Any]]): MIB entries of the item prototypes.
+        master_item_key (str): Key of the walk item the prototypes depend on.
+        default_trends (str): Trends of item prototypes holding numeric values.
+
+    Returns:
+        List[DerivedFields]: The fields of each row, in input order.
+    """
+    names = derive_names([row.get("Name") for row in rows])
+    value_types = derive_value_types([row.get("Type") for row in rows])
+    return list(
+        zip(
+            names,
+            derive_descriptions(rows),
+            derive_item_prototype_keys(names, master_item_key),
+            value_types,
+            derive_trends(value_types, default_trends),
+        )
+    )
+
+
+def _truncate_key(key: str) -> str:
+    if len(key) > MAX_KEY_LENGTH:
+        metrics.count("truncated_keys")
+        metrics.LOGGER.warning(
+            "Warning: Key '%s' exceeds 255 characters and will be truncated.", key
+        )
+        return key[:MAX_KEY_LENGTH]
+    return key
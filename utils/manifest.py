@@ -0,0 +1,301 @@
+import hashlib
+import os
+import pickle
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.config import (
+    DISCOVERY_RULE,
+    ITEM_PROTOTYPE,
+    SNMP_ITEM,
+    SNMP_TRAP,
+    SNMP_WALK_ITEM,
+)
+from utils.uuid_generator import is_deterministic
+
+# Bump whenever the generated YAML changes for the same input rows
+MANIFEST_FORMAT_VERSION = 3
+
+# Fields of polled objects kept next to their YAML, so a reused object can be estimated
+# without parsing it, see PollingEstimator
+_POLLED_FIELDS = ("key", "delay", "history", "trends", "value_type", "snmp_oid")
+_ITEM_PROTOTYPE_FIELDS = ("master_item", "history", "trends", "value_type")
+
+
+class Fragment:
+    """
+    The YAML of one list entry, rendered on a previous run and reused unchanged, along
+    with the fields of the object the polling estimate reads.
+    """
+
+    __slots__ = ("text", "mib_module", "fields")
+
+    def __init__(
+        self,
+        text: str,
+        mib_module: Optional[str],
+        fields: Optional[Dict[str, Any]] = None,
+    ):
+        self.text = text
+        self.mib_module = mib_module
+        self.fields = fields
+
+
+class CachedDiscoveryRule(Fragment):
+    """
+    A reused discovery rule, along with the walk items its item prototypes depend on.
+    """
+
+    __slots__ = ("snmp_walk_items", "item_prototype_count")
+
+    def __init__(
+        self,
+        text: str,
+        snmp_walk_items: List[Fragment],
+        item_prototype_count: int,
+        fields: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(text, None, fields)
+        self.snmp_walk_items = snmp_walk_items
+        self.item_prototype_count = item_prototype_count
+
+
+class TemplateManifest:
+    """
+    Fingerprints of the input rows of a template and the YAML generated from each of them.
+
+    The manifest is stored next to the generated templates. On the next run, rows whose
+    fingerprint is unchanged are not rebuilt: their YAML is spliced in from the manifest.
+    """
+
+    def __init__(self, path: str, fragments: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            path (str): File the manifest is saved to.
+            fragments (Optional[Dict[str, Dict[str, Any]]]): Fragments of the previous run,
+                keyed by fingerprint.
+        """
+        self.path = path
+        self.reused = 0
+        self.rebuilt = 0
+        self._previous = fragments or {}
+        self._current: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[int, tuple] = {}
+
+    @classmethod
+    def for_workbook(cls, excel_file: str, output_dir: str) -> "TemplateManifest":
+        """
+        Load the manifest of a workbook, or start an empty one.
+
+        Manifests are named after the workbook and a hash of its absolute path, so
+        workbooks with the same name in different directories keep separate manifests. A
+        manifest written with different generation settings is discarded, since none of
+        its fragments would match what this run generates.
+
+        Args:
+            excel_file (str): Path to the Excel file.
+            output_dir (str): Directory the templates and manifests are written to.
+
+        Returns:
+            TemplateManifest: The workbook's manifest.
+        """
+        stem = os.path.splitext(os.path.basename(excel_file))[0]
+        path_hash = hashlib.sha256(os.path.abspath(excel_file).encode()).hexdigest()[:8]
+        path = os.path.join(output_dir, f"{stem} {path_hash} Manifest.pickle")
+
+        try:
+            with open(path, "rb") as f:
+                settings, fragments = pickle.load(f)
+        except FileNotFoundError:
+            return cls(path)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError):
+            print(f"Ignoring unreadable manifest '{path}'.")
+            return cls(path)
+
+        if settings != _settings():
+            return cls(path)
+        return cls(path, fragments)
+
+    def build_all(
+        self,
+        kind: str,
+        template_name: str,
+        rows: Iterable[Any],
+        build: Callable[[List[Any]], List[Any]],
+    ) -> List[Any]:
+        """
+        Build the objects of some input rows, reusing the fragments of unchanged rows.
+
+        Args:
+            kind (str): Kind of object built, one of "item", "trap" or "discovery_rule".
+            template_name (str): Name of the template the objects belong to.
+            rows (Iterable[Any]): Input rows, one per object.
+            build (Callable[[List[Any]], List[Any]]): Builds the objects of a list of rows,
+                in order.
+
+        Returns:
+            List[Any]: Built objects, with Fragments in place of the reused ones.
+        """
+        objects: List[Any] = []
+        changed_positions = []
+        changed_fingerprints = []
+        changed_rows = []
+        occurrences: Counter = Counter()
+
+        for row in rows:
+            # Identical rows get distinct fingerprints so they never share a fragment
+            row_repr = repr(row)
+            occurrences[row_repr] += 1
+            fingerprint = hashlib.blake2b(
+                repr((kind, template_name, occurrences[row_repr], row_repr)).encode(),
+                digest_size=16,
+            ).hexdigest()
+
+            zabbix_object = self._reuse(kind, fingerprint)
+            if zabbix_object is None:
+                changed_positions.append(len(objects))
+                changed_fingerprints.append(fingerprint)
+                changed_rows.append(row)
+            objects.append(zabbix_object)
+
+        built_objects = build(changed_rows) if changed_rows else []
+        for position, fingerprint, zabbix_object in zip(
+            changed_positions, changed_fingerprints, built_objects
+        ):
+            self._register(kind, fingerprint, zabbix_object)
+            objects[position] = zabbix_object
+
+        self.reused += len(objects) - len(changed_rows)
+        self.rebuilt += len(changed_rows)
+        return objects
+
+    def record(self, zabbix_object: Any, text: str) -> None:
+        """
+        Store the YAML rendered for a newly built object.
+
+        Args:
+            zabbix_object (Any): Object passed to build_all's build function, or its walk item.
+            text (str): YAML of the object's list entry.
+        """
+        pending = self._pending.pop(id(zabbix_object), None)
+        if pending is not None:
+            fingerprint, _, fragment = pending
+            fragment["text"] = text
+            self._current[fingerprint] = fragment
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        # Write to a temporary file first so an interrupted run never leaves a partial manifest
+        import tempfile
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(
+                    (_settings(), self._current), f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def summary(self) -> str:
+        return (
+            f"[{self.reused}] unchanged rows reused, "
+            f"[{self.rebuilt}] new or changed rows rebuilt"
+        )
+
+    def _reuse(self, kind: str, fingerprint: str) -> Optional[Fragment]:
+        fragment = self._previous.get(fingerprint)
+        if fragment is None:
+            return None
+
+        if kind != "discovery_rule":
+            self._current[fingerprint] = fragment
+            return Fragment(
+                fragment["text"], fragment["mib_module"], fragment.get("fields")
+            )
+
+        walk_fingerprints = [
+            f"{fingerprint}/walk/{part}"
+            for part in range(1, fragment["walk_item_count"] + 1)
+        ]
+        walk_fragments = [self._previous.get(walk) for walk in walk_fingerprints]
+        if None in walk_fragments:
+            return None
+
+        self._current[fingerprint] = fragment
+        self._current.update(zip(walk_fingerprints, walk_fragments))
+        return CachedDiscoveryRule(
+            fragment["text"],
+            [
+                Fragment(
+                    walk_fragment["text"],
+                    walk_fragment["mib_module"],
+                    walk_fragment["fields"],
+                )
+                for walk_fragment in walk_fragments
+            ],
+            fragment["item_prototype_count"],
+            fragment["fields"],
+        )
+
+    def _register(self, kind: str, fingerprint: str, zabbix_object: Any) -> None:
+        # Objects are matched to their fingerprint by identity once the writer renders them
+        if kind != "discovery_rule":
+            self._pending[id(zabbix_object)] = (
+                fingerprint,
+                zabbix_object,
+                {
+                    "mib_module": zabbix_object.mib_module,
+                    "fields": (
+                        _fields(zabbix_object, _POLLED_FIELDS) if kind == "item" else None
+                    ),
+                },
+            )
+            return
+
+        self._pending[id(zabbix_object)] = (
+            fingerprint,
+            zabbix_object,
+            {
+                "mib_module": None,
+                "item_prototype_count": len(zabbix_object.item_prototypes),
+                "walk_item_count": len(zabbix_object.snmp_walk_items),
+                "fields": {
+                    "item_prototypes": [
+                        _fields(item_prototype, _ITEM_PROTOTYPE_FIELDS)
+                        for item_prototype in zabbix_object.item_prototypes
+                    ]
+                },
+            },
+        )
+        for part, walk_item in enumerate(zabbix_object.snmp_walk_items, 1):
+            self._pending[id(walk_item)] = (
+                f"{fingerprint}/walk/{part}",
+                walk_item,
+                {
+                    "mib_module": walk_item.mib_module,
+                    "fields": _fields(walk_item, _POLLED_FIELDS),
+                },
+            )
+
+
+def _fields(zabbix_object: Any, names: Iterable[str]) -> Dict[str, Any]:
+    return {name: getattr(zabbix_object, name) for name in names}
+
+
+def _settings() -> str:
+    # Any change to the generation settings invalidates every stored fragment
+    return repr(
+        (
+            MANIFEST_FORMAT_VERSION,
+            SNMP_ITEM,
+            SNMP_TRAP,
+            SNMP_WALK_ITEM,
+            ITEM_PROTOTYPE,
+            DISCOVERY_RULE,
+            is_deterministic(),
+        )
+    )
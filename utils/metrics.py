@@ -0,0 +1,181 @@
+import contextlib
+import io
+import logging
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where peak RSS is not reported
+    resource = None
+
+
+class _StdoutHandler(logging.StreamHandler):
+    # Writes to whatever sys.stdout is at the time, so the progress output redirected
+    # by batch workers takes log records along with it
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+# Warnings raised while building objects go through this logger rather than print, so a
+# quiet run skips formatting them. Records at INFO and above are printed by default
+LOGGER = logging.getLogger("zabbix_snmp_template")
+LOGGER.setLevel(logging.INFO)
+LOGGER.propagate = False
+_handler = _StdoutHandler()
+_handler.setFormatter(logging.Formatter("%(message)s"))
+LOGGER.addHandler(_handler)
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+# Events counted while building objects, e.g. truncated keys. Each process has its own
+# counters, and the object builder adds those of its worker processes to the parent's
+COUNTERS: Counter = Counter()
+
+_stages: Dict[str, Dict[str, float]] = {}
+# cProfile and pstats are only imported when profiling, as they slow down every start
+_profiles: Dict[str, Any] = {}
+_profiling = False
+
+
+def set_log_level(level: str) -> None:
+    LOGGER.setLevel(level)
+
+
+def count(name: str, amount: int = 1) -> None:
+    COUNTERS[name] += amount
+
+
+def reset(profile: bool = False) -> None:
+    """
+    Clear the stages and counters recorded so far.
+
+    Args:
+        profile (bool): Run every stage under cProfile from now on, see hottest_profile.
+    """
+    global _profiling
+    COUNTERS.clear()
+    _stages.clear()
+    _profiles.clear()
+    _profiling = profile
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Record the wall and CPU time of a stage of the run. Entering the same stage again
+    adds to its times. Stages must not be nested, as only one cProfile can run at a time.
+
+    Args:
+        name (str): Name of the stage, e.g. "load".
+    """
+    profile = None
+    if _profiling:
+        import cProfile
+
+        profile = _profiles.setdefault(name, cProfile.Profile())
+        profile.enable()
+
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        yield
+    finally:
+        times = _stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0})
+        times["wall_seconds"] += time.perf_counter() - start_wall
+        times["cpu_seconds"] += time.process_time() - start_cpu
+        if profile is not None:
+            profile.disable()
+
+
+def peak_rss_bytes(children: bool = False) -> Optional[int]:
+    """
+    Get the peak resident set size of this process, or of its largest finished child.
+
+    Args:
+        children (bool): Report the child processes, e.g. object builder workers, instead.
+
+    Returns:
+        Optional[int]: Peak RSS in bytes, or None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(
+        resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    )
+    # Linux reports kilobytes, macOS bytes
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+def snapshot(counts: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Collect the metrics of the run.
+
+    Args:
+        counts (Optional[Dict[str, Any]]): Row and object counts per entity type.
+
+    Returns:
+        Dict[str, Any]: Stage times, peak RSS, counts and counters, ready for JSON.
+    """
+    return {
+        "stages": {
+            name: {key: round(value, 6) for key, value in times.items()}
+            for name, times in _stages.items()
+        },
+        "peak_rss_bytes": peak_rss_bytes(),
+        "children_peak_rss_bytes": peak_rss_bytes(children=True),
+        "counts": dict(counts or {}),
+        "counters": dict(COUNTERS),
+    }
+
+
+def format_metrics(metrics: Dict[str, Any]) -> str:
+    lines = [f"{'stage':<17}{'wall':>10}{'cpu':>10}"]
+    for name, times in metrics["stages"].items():
+        lines.append(
+            f"{name:<17}{times['wall_seconds']:>9.3f}s{times['cpu_seconds']:>9.3f}s"
+        )
+
+    for label, key in (
+        ("Peak RSS", "peak_rss_bytes"),
+        ("Worker processes' peak RSS", "children_peak_rss_bytes"),
+    ):
+        if metrics[key]:
+            lines.append(f"{label}: {metrics[key] / (1024 * 1024):.1f} MiB")
+    for name, value in {**metrics["counts"], **metrics["counters"]}.items():
+        lines.append(f"[{value}] {name.replace('_', ' ')}")
+    return "\n".join(lines)
+
+
+def hottest_profile(path: str, top: int = 15) -> Optional[str]:
+    """
+    Dump the cProfile of the stage with the longest wall time.
+
+    Args:
+        path (str): File the profile is written to, readable with pstats or snakeviz.
+        top (int): Number of functions listed in the returned report.
+
+    Returns:
+        Optional[str]: The stage name and its functions with the highest cumulative
+            time, or None if no stage was profiled.
+    """
+    profiled: List[str] = [name for name in _profiles if name in _stages]
+    if not profiled:
+        return None
+
+    hottest = max(profiled, key=lambda name: _stages[name]["wall_seconds"])
+    _profiles[hottest].dump_stats(path)
+    import pstats
+
+    report = io.StringIO()
+    stats = pstats.Stats(_profiles[hottest], stream=report)
+    stats.sort_stats("cumulative").print_stats(top)
+    return f"Hottest stage: {hottest}, profile saved as '{path}'\n{report.getvalue()}"
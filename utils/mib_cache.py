@@ -0,0 +1,175 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from utils.config import MIB_CACHE
+
+# Bump whenever the layout of cached entries or the way they are derived changes
+CACHE_FORMAT_VERSION = 4
+
+
+class MIBCache:
+    """
+    A size-bounded, least-recently-used on-disk cache of parsed and indexed MIB data.
+
+    Entries are pickled into one file per key. A file's modification time records when
+    it was last used, and the least recently used files are evicted once the directory
+    grows past its size limit.
+    """
+
+    def __init__(
+        self,
+        directory: str = MIB_CACHE.DIRECTORY,
+        max_bytes: int = MIB_CACHE.MAX_BYTES,
+        rebuild: bool = False,
+    ):
+        """
+        Args:
+            directory (str): Directory holding the cache files.
+            max_bytes (int): Total size the cache directory is trimmed to after each write.
+            rebuild (bool): Ignore existing entries and overwrite them with fresh ones.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rebuild = rebuild
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return "-".join(str(part) for part in (CACHE_FORMAT_VERSION, *parts))
+
+    def load(self, key: str) -> Optional[Any]:
+        """
+        Load a cached entry and mark it as recently used.
+
+        Args:
+            key (str): Cache key of the entry.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss.
+        """
+        if self.rebuild:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # A truncated or outdated entry is treated as a miss and dropped
+            self._remove(path)
+            return None
+
+        os.utime(path)
+        return value
+
+    def store(self, key: str, value: Any) -> None:
+        """
+        Store an entry, then evict the least recently used entries over the size limit.
+
+        Args:
+            key (str): Cache key of the entry.
+            value (Any): Picklable value to store.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Write to a temporary file first so concurrent runs never read a partial entry.
+        # tempfile is imported here, as runs that hit the cache never need it
+        import tempfile
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            self._remove(temp_path)
+            raise
+
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".pickle"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            total_bytes -= size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class MemoryMIBCache:
+    """
+    A least-recently-used cache of MIB indexes held in memory, in front of an optional
+    on-disk MIBCache. A long-running process, e.g. the template service, then skips
+    unpickling as well as parsing for MIB sheets it has seen before.
+
+    Cached values are shared by every caller and must not be modified.
+    """
+
+    make_key = staticmethod(MIBCache.make_key)
+
+    def __init__(
+        self,
+        disk_cache: Optional[MIBCache] = None,
+        max_entries: int = MIB_CACHE.MEMORY_ENTRIES,
+    ):
+        """
+        Args:
+            disk_cache (Optional[MIBCache]): Cache read on a miss and written on a store.
+            max_entries (int): Number of entries kept in memory.
+        """
+        self.disk_cache = disk_cache
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        # Service requests are handled on several threads
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = self.disk_cache.load(key) if self.disk_cache is not None else None
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def store(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+        if self.disk_cache is not None:
+            self.disk_cache.store(key, value)
+
+    def _remember(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,274 @@
+import bisect
+import pickle
+import sys
+import time
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.config import MIB_INDEX
+from utils.mib_index import is_table_type
+from utils.oid_tree import OIDTree
+
+
+class CategoricalColumn:
+    """
+    A column holding few distinct values, e.g. "MIB Module" or "Type", stored as one
+    integer code per row and the list of its distinct values.
+    """
+
+    __slots__ = ("categories", "codes", "_codes_by_value")
+
+    def __init__(self):
+        self.categories: List[Any] = []
+        self.codes = array("I")
+        self._codes_by_value: Dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, row: int) -> Any:
+        return self.categories[self.codes[row]]
+
+    def __getstate__(self) -> Tuple[List[Any], array]:
+        # The lookup of codes by value is only needed while appending
+        return self.categories, self.codes
+
+    def __setstate__(self, state: Tuple[List[Any], array]) -> None:
+        self.categories, self.codes = state
+        self._codes_by_value = {}
+
+    def append(self, value: Any) -> None:
+        code = self._codes_by_value.get(value)
+        if code is None:
+            code = self._codes_by_value[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes.append(code)
+
+
+class CompressedTextColumn:
+    """
+    A column of long, mostly distinct texts, e.g. "Description", stored as zlib-compressed
+    blocks of consecutive rows. Reading a row decompresses its block, and the last block
+    read is kept, so reading rows in order decompresses each block once.
+    """
+
+    __slots__ = ("block_rows", "blocks", "_length", "_pending", "_cached")
+
+    def __init__(self, block_rows: int = MIB_INDEX.DESCRIPTION_BLOCK_ROWS):
+        self.block_rows = block_rows
+        self.blocks: List[bytes] = []
+        self._length = 0
+        self._pending: List[Any] = []
+        # Block number and values of the last block read, replaced as one tuple since
+        # the template service reads cached indexes from several threads
+        self._cached: Tuple[int, List[Any]] = (-1, [])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, row: int) -> Any:
+        block, offset = divmod(row, self.block_rows)
+        cached_block, values = self._cached
+        if block != cached_block:
+            if block == len(self.blocks):
+                # Rows appended since the last full block are not compressed yet
+                return self._pending[offset]
+            values = pickle.loads(zlib.decompress(self.blocks[block]))
+            self._cached = (block, values)
+        return values[offset]
+
+    def __getstate__(self) -> Tuple[int, List[bytes], int, List[Any]]:
+        return self.block_rows, self.blocks, self._length, self._pending
+
+    def __setstate__(self, state: Tuple[int, List[bytes], int, List[Any]]) -> None:
+        self.block_rows, self.blocks, self._length, self._pending = state
+        self._cached = (-1, [])
+
+    def append(self, value: Any) -> None:
+        self._pending.append(value)
+        self._length += 1
+        if len(self._pending) == self.block_rows:
+            # Level 1 compresses MIB descriptions about as well as the default, in a
+            # fraction of the time
+            self.blocks.append(zlib.compress(pickle.dumps(self._pending), 1))
+            self._pending = []
+
+    def memory_bytes(self) -> int:
+        return sum(sys.getsizeof(block) for block in self.blocks) + sum(
+            sys.getsizeof(value) for value in self._pending
+        )
+
+
+class ColumnarMIBIndex:
+    """
+    The MIBIndex interface over MIB rows stored column by column, for MIB sheets too
+    large to hold as one dictionary per row.
+
+    Rows are consumed one at a time, so they can be streamed from the source. OIDs and
+    names are kept as lists, the few distinct MIB modules and types as categorical codes
+    and the descriptions compressed. Only the rows that are looked up or belong to a
+    discovery rule table are turned back into dictionaries, once each.
+    """
+
+    def __init__(self, mib_data: Iterable[Dict[str, Any]]):
+        start_time = time.perf_counter()
+
+        self.oids: List[Any] = []
+        self.names: List[Any] = []
+        self.modules = CategoricalColumn()
+        self.types = CategoricalColumn()
+        self.descriptions = CompressedTextColumn()
+        self.by_oid: Dict[str, int] = {}
+        self.by_name: Dict[str, int] = {}
+
+        for position, entry in enumerate(mib_data):
+            oid, name = entry.get("OID"), entry.get("Name")
+            self.oids.append(oid)
+            self.names.append(name)
+            self.modules.append(entry.get("MIB Module"))
+            self.types.append(entry.get("Type"))
+            self.descriptions.append(entry.get("Description"))
+            if oid:
+                self.by_oid[oid] = position
+            if name:
+                self.by_name[name] = position
+
+        self.entry_count = len(self.oids)
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._keys: Optional[Tuple[List[bytes], List[int]]] = None
+        # Filled in by MIBValidator once the index is built
+        self.discovery_rule_tables: Dict[str, List[Dict[str, Any]]] = {}
+
+        self.build_seconds = time.perf_counter() - start_time
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The sorted keys are cheaper to rebuild on demand than to store
+        state = self.__dict__.copy()
+        state["_keys"] = None
+        return state
+
+    def get_by_oid(self, oid: str) -> Optional[Dict[str, Any]]:
+        position = self.by_oid.get(oid)
+        return self.row(position) if position is not None else None
+
+    def get_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        position = self.by_name.get(name)
+        return self.row(position) if position is not None else None
+
+    def row(self, position: int) -> Dict[str, Any]:
+        """
+        Get a row as the dictionary a MIB sheet reader returns. The same dictionary is
+        returned every time the row is requested.
+
+        Args:
+            position (int): Position of the row in the MIB sheet, ignoring empty rows.
+
+        Returns:
+            Dict[str, Any]: The row keyed by the MIB sheet columns.
+        """
+        entry = self._rows.get(position)
+        if entry is None:
+            # setdefault keeps the first dictionary if two threads build the same row
+            entry = self._rows.setdefault(
+                position,
+                {
+                    "MIB Module": self.modules[position],
+                    "OID": self.oids[position],
+                    "Name": self.names[position],
+                    "Description": self.descriptions[position],
+                    "Type": self.types[position],
+                },
+            )
+        return entry
+
+    def collect_tables(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Collect discovery rule tables the way MIBValidator does with an OIDTree, without
+        building one: each table holds the table entry followed by everything below it
+        in numeric OID order, and tables nested inside a table start their own rule.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Dictionary of discovery rule tables keyed by OID.
+        """
+        tables: Dict[str, List[Dict[str, Any]]] = {}
+        open_tables: List[Tuple[bytes, List[Dict[str, Any]]]] = []
+        for key, position in zip(*self._sorted_keys()):
+            while open_tables and not key.startswith(open_tables[-1][0]):
+                open_tables.pop()
+            if is_table_type(self.names[position], self.types[position]):
+                table = [self.row(position)]
+                tables[self.oids[position]] = table
+                open_tables.append((key, table))
+            elif open_tables:
+                open_tables[-1][1].append(self.row(position))
+        return tables
+
+    def subtree(self, oid: str) -> List[Dict[str, Any]]:
+        """
+        Get the rows at and below an OID in numeric OID order, with a binary search.
+
+        Args:
+            oid (str): OID to start from.
+
+        Returns:
+            List[Dict[str, Any]]: The rows, none if the OID is not in the index.
+        """
+        key = OIDTree.pack_oid(oid)
+        if key is None:
+            return []
+        keys, positions = self._sorted_keys()
+        rows = []
+        for index in range(bisect.bisect_left(keys, key), len(keys)):
+            if not keys[index].startswith(key):
+                break
+            rows.append(self.row(positions[index]))
+        return rows
+
+    def _sorted_keys(self) -> Tuple[List[bytes], List[int]]:
+        """
+        Key every OID by its arcs packed as 4-byte big-endian integers, sorted once on
+        first use. The keys sort in numeric OID order, and the rows below an OID are
+        those whose key starts with its key. As in the tree, a later row with the same
+        numeric OID replaces an earlier one.
+
+        Returns:
+            Tuple containing:
+            - The keys in numeric OID order
+            - The position of the row of each key
+        """
+        if self._keys is None:
+            keys: Dict[bytes, int] = {}
+            for oid, position in self.by_oid.items():
+                key = OIDTree.pack_oid(oid)
+                if key is not None:
+                    keys[key] = position
+            ordered = sorted(keys)
+            self._keys = (ordered, [keys[key] for key in ordered])
+        return self._keys
+
+    def memory_bytes(self) -> int:
+        """
+        Approximate the memory held by the columns and indexes.
+
+        Returns:
+            int: Approximate size in bytes, excluding the rows turned into dictionaries.
+        """
+        return (
+            sum(sys.getsizeof(value) for value in self.oids)
+            + sum(sys.getsizeof(value) for value in self.names)
+            + sys.getsizeof(self.oids)
+            + sys.getsizeof(self.names)
+            + sys.getsizeof(self.modules.codes)
+            + sys.getsizeof(self.types.codes)
+            + self.descriptions.memory_bytes()
+            + sys.getsizeof(self.by_oid)
+            + sys.getsizeof(self.by_name)
+        )
+
+    def summary(self) -> str:
+        return (
+            f"[{self.entry_count}] MIB entries indexed column by column in "
+            f"{self.build_seconds:.2f}s (~{self.memory_bytes() / (1024 * 1024):.1f} MiB "
+            f"of columns and indexes)"
+        )
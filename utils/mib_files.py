@@ -0,0 +1,289 @@
+import hashlib
+import os
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from utils.mib_cache import MIBCache
+from utils.smi_parser import (
+    COMPILED_FORMAT_VERSION,
+    CompiledModule,
+    MIBDefinition,
+    SMIError,
+    compile_mib_file,
+)
+
+# OIDs of the base SMI modules, which only hold macros and these assignments, so MIB
+# files can be loaded without copies of them
+_BUILTIN_OIDS = {
+    "ccitt": (0,),
+    "iso": (1,),
+    "joint-iso-ccitt": (2,),
+    "zeroDotZero": (0, 0),
+    "org": (1, 3),
+    "dod": (1, 3, 6),
+    "internet": (1, 3, 6, 1),
+    "directory": (1, 3, 6, 1, 1),
+    "mgmt": (1, 3, 6, 1, 2),
+    "mib-2": (1, 3, 6, 1, 2, 1),
+    "transmission": (1, 3, 6, 1, 2, 1, 10),
+    "experimental": (1, 3, 6, 1, 3),
+    "private": (1, 3, 6, 1, 4),
+    "enterprises": (1, 3, 6, 1, 4, 1),
+    "security": (1, 3, 6, 1, 5),
+    "snmpV2": (1, 3, 6, 1, 6),
+    "snmpDomains": (1, 3, 6, 1, 6, 1),
+    "snmpProxys": (1, 3, 6, 1, 6, 2),
+    "snmpModules": (1, 3, 6, 1, 6, 3),
+}
+_BASE_MODULES = frozenset({"SNMPv2-SMI", "RFC1155-SMI", "RFC1065-SMI"})
+
+# Accesses of the objects an SNMP GET can read
+_READABLE_ACCESSES = frozenset({"read-only", "read-write", "read-create"})
+
+# The workbook exports spell DisplayString this way, which gives string items a CHAR value type
+_SHEET_TYPES = {"DisplayString": "DISPLAYSTRING"}
+
+
+class MIBFileLoader:
+    """
+    Loads MIB modules from SMIv1/SMIv2 text files into the rows a MIB sheet holds.
+
+    Each file is compiled once into its CompiledModules, which are kept in the MIB cache
+    keyed by the file's path, size and modification time, so repeat runs skip parsing.
+    Imported modules are looked up by file name in the search directories and only
+    compiled when one of their OIDs is needed.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        search_dirs: Sequence[str] = (),
+        mib_cache: Optional[MIBCache] = None,
+    ):
+        """
+        Args:
+            paths (Sequence[str]): MIB files, or directories of MIB files, whose modules
+                are loaded.
+            search_dirs (Sequence[str]): Directories searched for imported modules, after
+                the directories of the loaded files.
+            mib_cache (Optional[MIBCache]): Cache for the compiled modules.
+        """
+        self.paths: List[str] = []
+        explicit_paths = set()
+        for path in paths:
+            if os.path.isdir(path):
+                self.paths.extend(_list_files(path))
+            else:
+                self.paths.append(path)
+                explicit_paths.add(path)
+        self._explicit_paths: FrozenSet[str] = frozenset(explicit_paths)
+
+        directories = [os.path.dirname(path) or "." for path in self.paths]
+        self.search_dirs = list(dict.fromkeys(directories + list(search_dirs)))
+        self.mib_cache = mib_cache
+
+        self._modules: Dict[str, CompiledModule] = {}
+        self._compiled_paths: Dict[str, List[CompiledModule]] = {}
+        self._files_by_stem: Optional[Dict[str, List[str]]] = None
+        self._oids: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Batch workers compile or load the modules they need themselves
+        state = self.__dict__.copy()
+        state.update(_modules={}, _compiled_paths={}, _files_by_stem=None, _oids={})
+        return state
+
+    def fingerprint(self) -> str:
+        """
+        Fingerprint the loaded files and every file imports could be read from.
+
+        Returns:
+            str: Hex digest of the paths, sizes and modification times of the files.
+        """
+        paths = set(self.paths)
+        for directory in self.search_dirs:
+            if os.path.isdir(directory):
+                paths.update(_list_files(directory))
+        return hashlib.sha256(
+            repr(
+                (COMPILED_FORMAT_VERSION, self.paths, [_stat_key(path) for path in sorted(paths)])
+            ).encode()
+        ).hexdigest()
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        Build the MIB rows of the loaded modules, as read from a MIB sheet.
+
+        Returns:
+            List[Dict[str, Any]]: One row per OID definition, in file order.
+
+        Raises:
+            SMIError: If a file cannot be parsed or an OID cannot be resolved.
+        """
+        return [
+            {
+                "MIB Module": module.name,
+                "OID": self._oid_string(module.name, definition.name),
+                "Name": definition.name,
+                "Description": definition.description,
+                "Type": _SHEET_TYPES.get(definition.syntax, definition.syntax),
+            }
+            for module in self.loaded_modules()
+            for definition in module.definitions.values()
+        ]
+
+    def scalar_rows(self) -> List[Dict[str, Any]]:
+        """
+        Select the readable scalar objects of the loaded modules, as an SNMP Items sheet would.
+
+        Returns:
+            List[Dict[str, Any]]: MIB Module, Name and OID of each scalar object.
+        """
+        return [
+            self._selection_row(module, definition)
+            for module in self.loaded_modules()
+            for definition in module.definitions.values()
+            if definition.macro == "OBJECT-TYPE"
+            and definition.access in _READABLE_ACCESSES
+            and not self._is_column(module, definition)
+        ]
+
+    def notification_rows(self) -> List[Dict[str, Any]]:
+        """
+        Select the notifications of the loaded modules, as an SNMP Traps sheet would.
+
+        Returns:
+            List[Dict[str, Any]]: MIB Module, Name and OID of each notification.
+        """
+        return [
+            self._selection_row(module, definition)
+            for module in self.loaded_modules()
+            for definition in module.definitions.values()
+            if definition.macro in ("NOTIFICATION-TYPE", "TRAP-TYPE")
+        ]
+
+    def loaded_modules(self) -> List[CompiledModule]:
+        modules = []
+        for path in self.paths:
+            compiled = self._compile(path)
+            if not compiled and path in self._explicit_paths:
+                raise SMIError(f"{path}: no MIB module found")
+            modules.extend(compiled)
+        return modules
+
+    def _selection_row(self, module: CompiledModule, definition: MIBDefinition) -> Dict[str, Any]:
+        return {
+            "MIB Module": module.name,
+            "Name": definition.name,
+            "OID": self._oid_string(module.name, definition.name),
+        }
+
+    @staticmethod
+    def _is_column(module: CompiledModule, definition: MIBDefinition) -> bool:
+        parent = module.definitions.get(definition.oid[0])
+        return parent is not None and parent.is_row
+
+    def _oid_string(self, module_name: str, symbol: str) -> str:
+        return "." + ".".join(map(str, self._resolve(module_name, symbol)))
+
+    def _resolve(
+        self, module_name: str, symbol: str, resolving: FrozenSet[Tuple[str, str]] = frozenset()
+    ) -> Tuple[int, ...]:
+        key = (module_name, symbol)
+        arcs = self._oids.get(key)
+        if arcs is not None:
+            return arcs
+
+        module = None if module_name in _BASE_MODULES else self._find_module(module_name)
+        definition = module.definitions.get(symbol) if module is not None else None
+
+        if definition is not None:
+            if key in resolving:
+                raise SMIError(f"OID of '{symbol}' in {module_name} refers to itself")
+            parent, *arcs_below = definition.oid
+            parent_arcs = (
+                (parent,)
+                if isinstance(parent, int)
+                else self._resolve(module_name, parent, resolving | {key})
+            )
+            arcs = parent_arcs + tuple(arcs_below)
+        elif module is not None and symbol in module.imports:
+            arcs = self._resolve(module.imports[symbol], symbol, resolving)
+        elif symbol in _BUILTIN_OIDS:
+            arcs = _BUILTIN_OIDS[symbol]
+        elif module is None and module_name not in _BASE_MODULES:
+            raise SMIError(
+                f"MIB module {module_name} was not found in {', '.join(self.search_dirs)}"
+            )
+        else:
+            raise SMIError(f"Cannot resolve '{symbol}' in MIB module {module_name}")
+
+        self._oids[key] = arcs
+        return arcs
+
+    def _find_module(self, module_name: str) -> Optional[CompiledModule]:
+        if module_name in self._modules:
+            return self._modules[module_name]
+
+        # MIB files are conventionally named after their module, e.g. IF-MIB.my
+        for path in self._search_files().get(module_name.upper(), []):
+            self._compile(path)
+            if module_name in self._modules:
+                return self._modules[module_name]
+
+        # Otherwise every file of the search directories is compiled to find it
+        for paths in self._search_files().values():
+            for path in paths:
+                self._compile(path)
+        return self._modules.get(module_name)
+
+    def _search_files(self) -> Dict[str, List[str]]:
+        if self._files_by_stem is None:
+            self._files_by_stem = {}
+            for directory in self.search_dirs:
+                if not os.path.isdir(directory):
+                    continue
+                for path in _list_files(directory):
+                    stem = os.path.basename(path).split(".")[0].upper()
+                    self._files_by_stem.setdefault(stem, []).append(path)
+        return self._files_by_stem
+
+    def _compile(self, path: str) -> List[CompiledModule]:
+        compiled = self._compiled_paths.get(path)
+        if compiled is not None:
+            return compiled
+
+        cache_key = None
+        if self.mib_cache is not None:
+            fingerprint = hashlib.sha256(repr(_stat_key(path)).encode()).hexdigest()
+            cache_key = self.mib_cache.make_key("smi", COMPILED_FORMAT_VERSION, fingerprint)
+            compiled = self.mib_cache.load(cache_key)
+
+        if compiled is None:
+            try:
+                compiled = compile_mib_file(path)
+            except SMIError:
+                if path in self.paths:
+                    raise
+                # A broken file in a search directory only matters if it is imported
+                compiled = []
+            if cache_key is not None:
+                self.mib_cache.store(cache_key, compiled)
+
+        self._compiled_paths[path] = compiled
+        for module in compiled:
+            # The first file defining a module wins, and loaded files are compiled first
+            self._modules.setdefault(module.name, module)
+        return compiled
+
+
+def _stat_key(path: str) -> Tuple[str, int, int]:
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def _list_files(directory: str) -> List[str]:
+    return sorted(
+        entry.path
+        for entry in os.scandir(directory)
+        if entry.is_file() and not entry.name.startswith(".")
+    )
@@ -0,0 +1,119 @@
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from utils.oid_tree import OIDTree
+
+
+def is_table_type(name: Any, entry_type: Any) -> bool:
+    """
+    Tell whether a MIB entry is a table, e.g. ifTable of type "SEQUENCE OF IfEntry".
+
+    Args:
+        name (Any): Name of the entry.
+        entry_type (Any): Type of the entry.
+
+    Returns:
+        bool: True if the entry is a table.
+    """
+    return "Table" in (name or "") and "SEQUENCE OF" in (entry_type or "")
+
+
+class MIBIndex:
+    """
+    OID, Name and MIB Module indexes over the rows of a MIB sheet.
+
+    The index is built once per run and shared by the validator, the discovery rule
+    collector and the Template, instead of each of them walking the MIB rows again.
+    """
+
+    def __init__(self, mib_data: List[Dict[str, Any]]):
+        start_time = time.perf_counter()
+
+        self.by_oid: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.by_module: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.entry_count = 0
+
+        for entry in mib_data:
+            self.entry_count += 1
+            if oid := entry.get("OID"):
+                self.by_oid[oid] = entry
+            if name := entry.get("Name"):
+                self.by_name[name] = entry
+            if mib_module := entry.get("MIB Module"):
+                self.by_module[mib_module].append(entry)
+
+        self._tree: Optional[OIDTree] = None
+        # Filled in by MIBValidator once the index is built
+        self.discovery_rule_tables: Dict[str, List[Dict[str, Any]]] = {}
+
+        self.build_seconds = time.perf_counter() - start_time
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The OID tree is cheaper to rebuild on demand than to pickle node by node
+        state = self.__dict__.copy()
+        state["_tree"] = None
+        return state
+
+    @property
+    def tree(self) -> OIDTree:
+        if self._tree is None:
+            start_time = time.perf_counter()
+            self._tree = OIDTree(self.by_oid.values())
+            self.build_seconds += time.perf_counter() - start_time
+        return self._tree
+
+    def get_by_oid(self, oid: str) -> Optional[Dict[str, Any]]:
+        return self.by_oid.get(oid)
+
+    def get_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.by_name.get(name)
+
+    def get_by_module(self, mib_module: str) -> List[Dict[str, Any]]:
+        return self.by_module.get(mib_module, [])
+
+    def subtree(self, oid: str) -> List[Dict[str, Any]]:
+        """
+        Get the entries at and below an OID in numeric OID order.
+
+        Args:
+            oid (str): OID to start from.
+
+        Returns:
+            List[Dict[str, Any]]: The entries, none if the OID is not in the index.
+        """
+        return list(self.tree.subtree(oid))
+
+    def memory_bytes(self) -> int:
+        """
+        Approximate the memory held by the index structures.
+
+        The MIB entries themselves are not counted, only the dictionaries, lists and
+        tree nodes that point to them.
+
+        Returns:
+            int: Approximate size in bytes.
+        """
+        size = (
+            sys.getsizeof(self.by_oid)
+            + sys.getsizeof(self.by_name)
+            + sys.getsizeof(self.by_module)
+            + sum(sys.getsizeof(entries) for entries in self.by_module.values())
+        )
+
+        if self._tree is not None:
+            stack = [self._tree.root]
+            while stack:
+                node = stack.pop()
+                size += sys.getsizeof(node) + sys.getsizeof(node.children)
+                stack.extend(node.children.values())
+
+        return size
+
+    def summary(self) -> str:
+        return (
+            f"[{self.entry_count}] MIB entries indexed in {self.build_seconds:.2f}s "
+            f"(~{self.memory_bytes() / (1024 * 1024):.1f} MiB of indexes)"
+        )
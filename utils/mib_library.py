@@ -0,0 +1,351 @@
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.config import MIB_LIBRARY
+from utils.oid_tree import OIDTree
+
+# Bump whenever the schema changes. Libraries of another version have to be re-imported
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    name TEXT PRIMARY KEY,
+    source TEXT,
+    imported_at REAL,
+    entry_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS entries (
+    module TEXT NOT NULL,
+    oid TEXT,
+    oid_key TEXT,
+    name TEXT,
+    description TEXT,
+    type TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_by_oid ON entries (oid);
+CREATE INDEX IF NOT EXISTS entries_by_oid_key ON entries (oid_key);
+CREATE INDEX IF NOT EXISTS entries_by_name ON entries (name);
+CREATE INDEX IF NOT EXISTS entries_by_module ON entries (module, oid_key);
+"""
+
+# Columns of the entries table, in the order of the MIB sheet columns they hold
+_ENTRY_COLUMNS = "module, oid, name, description, type"
+
+# Sorts after every character of an OID key, so [key, key + _KEY_END) spans its subtree
+_KEY_END = "~"
+
+
+class MIBLibraryError(Exception):
+    """Raised when the MIB library is missing or was written by another version."""
+
+    pass
+
+
+def oid_key(oid: Any) -> Optional[str]:
+    """
+    Encode an OID so that string order is numeric OID order and a subtree is a prefix range.
+
+    The key is OIDTree.pack_oid in hex, with every arc written as 8 hex digits followed by
+    a dot, e.g. ".1.3.10" becomes "00000001.00000003.0000000a.", so ".1.3.10" sorts after
+    ".1.3.9", and the entries below an OID are the keys starting with its key.
+
+    Args:
+        oid (Any): OID such as ".1.3.6.1.2.1".
+
+    Returns:
+        Optional[str]: The key, or None if the OID is missing or not numeric.
+    """
+    key = OIDTree.pack_oid(oid)
+    if key is None:
+        return None
+    return f"{key.hex('.', 4)}."
+
+
+class MIBLibrary:
+    """
+    A shared SQLite library of MIB entries, imported once and used by every workbook.
+
+    Entries are indexed by OID, Name and MIB Module, and by an order-preserving OID key
+    so a subtree is a single index range scan. Importing a module replaces every entry
+    of that module already in the library.
+    """
+
+    def __init__(self, path: str = MIB_LIBRARY.PATH):
+        """
+        Args:
+            path (str): Path of the SQLite database file.
+        """
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Batch workers open their own connection
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        return state
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def import_entries(self, entries: Iterable[Dict[str, Any]], source: str) -> Dict[str, int]:
+        """
+        Import MIB entries, replacing the modules they belong to.
+
+        Args:
+            entries (Iterable[Dict[str, Any]]): MIB rows keyed by the MIB sheet columns.
+            source (str): File the entries were read from, recorded for each module.
+
+        Returns:
+            Dict[str, int]: Number of entries imported for each module.
+        """
+        rows_by_module: Dict[str, List[Tuple[Any, ...]]] = {}
+        for entry in entries:
+            module = entry.get("MIB Module") or ""
+            rows_by_module.setdefault(module, []).append(
+                (
+                    module,
+                    entry.get("OID"),
+                    oid_key(entry.get("OID")),
+                    entry.get("Name"),
+                    entry.get("Description"),
+                    entry.get("Type"),
+                )
+            )
+
+        connection = self._connect(create=True)
+        imported_at = time.time()
+        # One transaction for the whole import, so readers never see a partial module
+        with connection:
+            for module, rows in rows_by_module.items():
+                connection.execute("DELETE FROM entries WHERE module = ?", (module,))
+                connection.executemany(
+                    "INSERT INTO entries (module, oid, oid_key, name, description, type) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO modules VALUES (?, ?, ?, ?)",
+                    (module, source, imported_at, len(rows)),
+                )
+        return {module: len(rows) for module, rows in rows_by_module.items()}
+
+    def modules(self) -> List[Tuple[str, str, int]]:
+        """
+        List the modules of the library.
+
+        Returns:
+            List[Tuple[str, str, int]]: Name, source file and entry count of each module.
+        """
+        return self._connect().execute(
+            "SELECT name, source, entry_count FROM modules ORDER BY name"
+        ).fetchall()
+
+    def get_by_oid(self, oid: str) -> Optional[Dict[str, Any]]:
+        # As with a MIB sheet, the last entry imported for an OID or name wins
+        return self._fetch_one("oid = ?", oid)
+
+    def get_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._fetch_one("name = ?", name)
+
+    def subtree(
+        self, oid: str, modules: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the entries at and below an OID in numeric OID order, with one range scan.
+
+        Args:
+            oid (str): OID to start from.
+            modules (Optional[Sequence[str]]): Modules to keep entries from. Entries of
+                every module are kept if omitted.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per OID, the last imported one.
+        """
+        key = oid_key(oid)
+        if key is None:
+            return []
+        return self._fetch_ordered(
+            "oid_key >= ? AND oid_key < ?", (key, key + _KEY_END), modules
+        )
+
+    def discovery_rule_tables(
+        self, modules: Sequence[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Collect the discovery rule tables of some modules, as MIBValidator does for a
+        MIB sheet: each table holds the table entry followed by everything below it in
+        numeric OID order, and tables nested inside a table start their own rule.
+
+        Args:
+            modules (Sequence[str]): Modules the tables and their columns come from.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Dictionary of discovery rule tables keyed by OID.
+        """
+        tables = self._fetch_ordered(
+            "instr(name, 'Table') > 0 AND instr(type, 'SEQUENCE OF') > 0", (), modules
+        )
+        table_keys = [oid_key(table["OID"]) for table in tables]
+
+        discovery_rule_tables = {}
+        for table, table_key in zip(tables, table_keys):
+            nested_keys = tuple(
+                key for key in table_keys if key != table_key and key.startswith(table_key)
+            )
+            discovery_rule_tables[table["OID"]] = [
+                entry
+                for entry in self.subtree(table["OID"], modules)
+                if not (nested_keys and oid_key(entry["OID"]).startswith(nested_keys))
+            ]
+        return discovery_rule_tables
+
+    def oids(self) -> List[str]:
+        return [
+            row[0]
+            for row in self._connect().execute(
+                "SELECT DISTINCT oid FROM entries WHERE oid IS NOT NULL"
+            )
+        ]
+
+    def names(self) -> List[str]:
+        return [
+            row[0]
+            for row in self._connect().execute(
+                "SELECT DISTINCT name FROM entries WHERE name IS NOT NULL"
+            )
+        ]
+
+    def entry_count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _fetch_one(self, condition: str, value: Any) -> Optional[Dict[str, Any]]:
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE {condition} "
+                "ORDER BY rowid DESC LIMIT 1",
+                (value,),
+            )
+            .fetchone()
+        )
+        return _entry(row) if row is not None else None
+
+    def _fetch_ordered(
+        self,
+        condition: str,
+        parameters: Tuple[Any, ...],
+        modules: Optional[Sequence[str]],
+    ) -> List[Dict[str, Any]]:
+        if modules is not None:
+            condition += f" AND module IN ({', '.join('?' * len(modules))})"
+            parameters += tuple(modules)
+
+        # Rows come in import order, so a later entry for the same OID replaces an earlier one
+        entries: Dict[str, Dict[str, Any]] = {}
+        for row in self._connect().execute(
+            f"SELECT oid_key, {_ENTRY_COLUMNS} FROM entries "
+            f"WHERE oid_key IS NOT NULL AND {condition} ORDER BY rowid",
+            parameters,
+        ):
+            entries[row[0]] = _entry(row[1:])
+        return [entries[key] for key in sorted(entries)]
+
+    def _connect(self, create: bool = False) -> sqlite3.Connection:
+        if self._connection is not None:
+            return self._connection
+
+        if not create and not os.path.exists(self.path):
+            raise MIBLibraryError(
+                f"MIB library '{self.path}' not found. Import MIBs into it with: "
+                f"python main.py library import <files>"
+            )
+
+        directory = os.path.dirname(self.path)
+        if create and directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = sqlite3.connect(self.path)
+        # WAL lets batch workers read while an import is running
+        connection.execute("PRAGMA journal_mode = WAL")
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0 and create:
+            connection.executescript(_SCHEMA)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        elif version != SCHEMA_VERSION:
+            connection.close()
+            raise MIBLibraryError(
+                f"MIB library '{self.path}' has schema version {version}, expected "
+                f"{SCHEMA_VERSION}. Delete it and import the MIBs again."
+            )
+
+        self._connection = connection
+        return connection
+
+
+class MIBLibraryIndex:
+    """
+    The MIBIndex interface of the validator, answered by indexed queries on a MIBLibrary.
+
+    A library holds every MIB imported into it, so discovery rules are only collected
+    from the modules a template uses, see collect_discovery_rule_tables.
+    """
+
+    def __init__(self, library: MIBLibrary, modules: Sequence[str] = ()):
+        """
+        Args:
+            library (MIBLibrary): The library to query.
+            modules (Sequence[str]): Modules whose tables always become discovery rules,
+                whether or not any SNMP item or trap comes from them.
+        """
+        self.library = library
+        self.modules = list(modules)
+        self.discovery_rule_tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.build_seconds = 0.0
+
+    def get_by_oid(self, oid: str) -> Optional[Dict[str, Any]]:
+        return self.library.get_by_oid(oid)
+
+    def get_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.library.get_by_name(name)
+
+    def subtree(self, oid: str) -> List[Dict[str, Any]]:
+        # A walk returns the objects of every module below the OID
+        return self.library.subtree(oid)
+
+    def collect_discovery_rule_tables(self, matched_entries: Iterable[Dict[str, Any]]) -> None:
+        """
+        Collect the discovery rule tables of the modules of the matched items and traps,
+        along with those of the modules given to the index.
+
+        Args:
+            matched_entries (Iterable[Dict[str, Any]]): Validated SNMP items and traps.
+        """
+        start_time = time.perf_counter()
+        modules = dict.fromkeys(self.modules)
+        modules.update(
+            dict.fromkeys(entry["MIB Module"] or "" for entry in matched_entries)
+        )
+        self.modules = list(modules)
+        self.discovery_rule_tables = self.library.discovery_rule_tables(self.modules)
+        self.build_seconds += time.perf_counter() - start_time
+
+    def summary(self) -> str:
+        return (
+            f"[{len(self.modules)}] MIB modules used from library '{self.library.path}', "
+            f"queried in {self.build_seconds:.2f}s"
+        )
+
+
+def _entry(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    module, oid, name, description, entry_type = row
+    return {
+        "MIB Module": module or None,
+        "OID": oid,
+        "Name": name,
+        "Description": description,
+        "Type": entry_type,
+    }
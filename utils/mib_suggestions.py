@@ -0,0 +1,217 @@
+import bisect
+import time
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from utils.config import SUGGESTIONS
+from utils.oid_tree import OIDTree
+
+
+class OIDPrefixIndex:
+    """
+    MIB OIDs sorted in numeric order, so the OIDs sharing the longest prefix with any
+    OID are found with a few binary searches.
+
+    Each OID is keyed by its arcs packed as 4-byte big-endian integers, so byte order is
+    numeric OID order and the OIDs below a prefix are one contiguous range of keys.
+    """
+
+    def __init__(self, oids: Iterable[str]):
+        keyed: Dict[bytes, str] = {}
+        for oid in oids:
+            key = OIDTree.pack_oid(oid)
+            if key is not None:
+                keyed[key] = oid
+        self.keys = sorted(keyed)
+        self.oids = [keyed[key] for key in self.keys]
+
+    def nearest(
+        self,
+        oid: str,
+        limit: int = SUGGESTIONS.LIMIT,
+        min_prefix_arcs: int = SUGGESTIONS.MIN_OID_PREFIX_ARCS,
+    ) -> List[str]:
+        """
+        Find the OIDs sharing the longest prefix with an OID, closest in OID order first.
+
+        Args:
+            oid (str): The OID to find neighbours of, which need not be in the index.
+            limit (int): Number of OIDs returned at most.
+            min_prefix_arcs (int): Number of leading arcs an OID has to share at least.
+
+        Returns:
+            List[str]: The nearest OIDs, or an empty list if none shares enough arcs.
+        """
+        key = OIDTree.pack_oid(oid)
+        if key is None:
+            return []
+        position = bisect.bisect_left(self.keys, key)
+
+        for arcs in range(len(key) // 4, min_prefix_arcs - 1, -1):
+            prefix = key[: arcs * 4]
+            start = bisect.bisect_left(self.keys, prefix)
+            if start == len(self.keys) or not self.keys[start].startswith(prefix):
+                continue
+
+            # Keys below the prefix end before the next prefix of the same length
+            prefix_value = int.from_bytes(prefix, "big") + 1
+            end = (
+                bisect.bisect_left(self.keys, prefix_value.to_bytes(len(prefix), "big"))
+                if prefix_value < 1 << (len(prefix) * 8)
+                else len(self.keys)
+            )
+            window = range(max(start, position - limit), min(end, position + limit))
+            nearest = sorted(window, key=lambda index: abs(index - position))
+            return [self.oids[index] for index in nearest[:limit]]
+        return []
+
+
+class NameNGramIndex:
+    """
+    MIB names indexed by their character trigrams, so names close to a misspelled one
+    are found without comparing it with every name.
+
+    Candidates are the names sharing the most trigrams with the query. Only those are
+    ranked by their edit distance to it, ignoring case.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names: List[str] = []
+        self._lowered: List[str] = []
+        self._postings: Dict[str, array] = {}
+
+        for name in names:
+            if not isinstance(name, str):
+                continue
+            lowered = name.lower()
+            position = len(self.names)
+            self.names.append(name)
+            self._lowered.append(lowered)
+            for gram in self._ngrams(lowered):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array("I")
+                postings.append(position)
+
+    @staticmethod
+    def _ngrams(lowered: str) -> set:
+        padded = f"^{lowered}$"
+        return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+    def nearest(
+        self,
+        name: str,
+        limit: int = SUGGESTIONS.LIMIT,
+        candidates: int = SUGGESTIONS.NAME_CANDIDATES,
+        max_distance: float = SUGGESTIONS.MAX_NAME_DISTANCE,
+        postings_budget: int = SUGGESTIONS.NAME_POSTINGS_BUDGET,
+    ) -> List[str]:
+        """
+        Find the names closest to a name.
+
+        Args:
+            name (str): The name to find neighbours of, which need not be in the index.
+            limit (int): Number of names returned at most.
+            candidates (int): Number of names sharing the most trigrams that are ranked.
+            max_distance (float): Edits per character of the name a suggestion may be
+                away from it.
+            postings_budget (int): Number of name occurrences of its trigrams counted
+                at most, rarest trigrams first.
+
+        Returns:
+            List[str]: The nearest names, fewest edits first.
+        """
+        if not isinstance(name, str) or not name:
+            return []
+        lowered = name.lower()
+
+        # Trigrams common to most names, e.g. a module prefix, cost the most to count and
+        # tell names apart the least, so the rarest are counted first, within a budget
+        postings_lists = sorted(
+            (
+                postings
+                for postings in map(self._postings.get, self._ngrams(lowered))
+                if postings is not None
+            ),
+            key=len,
+        )
+        shared: Counter = Counter()
+        counted = 0
+        for postings in postings_lists:
+            if counted and counted + len(postings) > postings_budget:
+                break
+            shared.update(postings)
+            counted += len(postings)
+
+        bound = max(1, int(len(lowered) * max_distance))
+        ranked = []
+        for position, shared_count in shared.most_common(candidates):
+            distance = _edit_distance(lowered, self._lowered[position], bound)
+            if distance <= bound:
+                ranked.append((distance, -shared_count, self.names[position]))
+        return [name for _, _, name in sorted(ranked)[:limit]]
+
+
+class MIBSuggester:
+    """
+    Suggests the MIB entries an unmatched SNMP item or trap most likely meant: the
+    entries next to its OID and those whose names are closest to its name.
+    """
+
+    def __init__(self, oids: Iterable[str], names: Iterable[str]):
+        start_time = time.perf_counter()
+        self.oids = OIDPrefixIndex(oids)
+        self.names = NameNGramIndex(names)
+        self.build_seconds = time.perf_counter() - start_time
+
+    def suggest(
+        self, oid: Optional[str], name: Optional[str], limit: int = SUGGESTIONS.LIMIT
+    ) -> Dict[str, List[str]]:
+        """
+        Suggest MIB entries for an unmatched row.
+
+        Args:
+            oid (Optional[str]): OID of the row.
+            name (Optional[str]): Name of the row.
+            limit (int): Number of OIDs and of names suggested at most.
+
+        Returns:
+            Dict[str, List[str]]: The OIDs suggested under "OID" and the names under "Name".
+        """
+        return {
+            "OID": self.oids.nearest(oid, limit) if oid else [],
+            "Name": self.names.nearest(name, limit) if name else [],
+        }
+
+
+def _edit_distance(first: str, second: str, bound: int) -> int:
+    """
+    Levenshtein distance between two strings, giving up once it exceeds a bound.
+
+    Args:
+        first (str): The first string.
+        second (str): The second string.
+        bound (int): Distance above which the exact value is not needed.
+
+    Returns:
+        int: The distance, or bound + 1 if it is larger than bound.
+    """
+    if abs(len(first) - len(second)) > bound:
+        return bound + 1
+
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, 1):
+        current = [row]
+        for column, second_char in enumerate(second, 1):
+            current.append(
+                min(
+                    previous[column] + 1,
+                    current[column - 1] + 1,
+                    previous[column - 1] + (first_char != second_char),
+                )
+            )
+        if min(current) > bound:
+            return bound + 1
+        previous = current
+    return previous[-1]
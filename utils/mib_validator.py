@@ -1,7 +1,30 @@
-from collections import defaultdict
-from typing import Any, Dict, List, Optional, Tuple
-
-import pandas as pd
+import itertools
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from utils import metrics
+from utils.mib_cache import MIBCache
+from utils.mib_index import MIBIndex, is_table_type
+from utils.sources import Source, open_source
+
+# Columnar indexes, MIB files, the library and suggestions are only needed by the runs
+# using them, so they are imported where they are used
+if TYPE_CHECKING:
+    from utils.mib_columns import ColumnarMIBIndex
+    from utils.mib_files import MIBFileLoader
+    from utils.mib_library import MIBLibrary, MIBLibraryIndex
+    from utils.mib_suggestions import MIBSuggester
 
 
 class UnmatchedDataError(Exception):
@@ -15,69 +38,488 @@ class MIBValidator:
     A class for validating and extracting data from Excel files containing MIB information.
     """
 
+    # Only the columns consumed by the validator and the zabbix_objects classes are read
+    ITEM_COLUMNS = ("OID", "Name")
+    MIB_COLUMNS = ("MIB Module", "OID", "Name", "Description", "Type")
+    TEMPLATE_COLUMNS = ("Group", "Macros", "Manufacturer", "Model", "Tags", "Device")
+
     @classmethod
-    def extract_from_excel(cls, excel_file: str) -> Tuple[
+    def extract_from_excel(
+        cls,
+        excel_file: str,
+        mib_cache: Optional[MIBCache] = None,
+        mib_files: Optional["MIBFileLoader"] = None,
+        mib_library: Optional["MIBLibrary"] = None,
+        library_modules: Sequence[str] = (),
+        low_memory: bool = False,
+    ) -> Tuple[
         List[Dict[str, Any]],
         List[Dict[str, Any]],
         Dict[str, Any],
-        Dict[str, List[Dict[str, Any]]],
+        Union[MIBIndex, "ColumnarMIBIndex", "MIBLibraryIndex"],
     ]:
         """
         Extract and validate data from an Excel file.
         This is a factory method that separates the creation of the Template object from its source.
-        Here we parse the necessary data from Excel. Later, we could do so from a json object, a database, etc.
+        The file is read by the source its extension selects, see utils.sources: an Excel
+        workbook, or the MIB Data file of a CSV, JSON Lines or Parquet source along with
+        its companion sheet files. Every source gives the same output for the same data.
 
         Args:
-            excel_file (str): Path to the Excel file.
+            excel_file (str): Path to the Excel file, or to a single-table source.
+            mib_cache (Optional[MIBCache]): Cache for the parsed and indexed MIB sheet.
+                The MIB sheet is parsed and indexed from scratch if omitted.
+            mib_files (Optional[MIBFileLoader]): MIB files read in place of the
+                workbook's MIB sheet.
+            mib_library (Optional[MIBLibrary]): Shared MIB library the SNMP Items and SNMP
+                Traps are validated against, in place of the workbook's MIB sheet.
+            library_modules (Sequence[str]): Library modules whose tables become
+                discovery rules, besides those of the validated items and traps.
+            low_memory (bool): Stream the MIB rows into a ColumnarMIBIndex instead of
+                holding one dictionary per row.
 
         Returns:
             Tuple containing:
             - List of preprocessed SNMP items
             - List of preprocessed SNMP traps
             - Template information dictionary
-            - Dictionary of discovery rule tables
+            - Index of the MIB data, including its discovery rule tables
         """
-        excel_data = pd.ExcelFile(excel_file)
-        all_sheets_data = {}
+        return cls._validate(
+            *cls._read_source(
+                excel_file, mib_cache, mib_files, mib_library, library_modules, low_memory
+            )
+        )
 
-        na_values = ["nan", "NaN", "N/A", ""]
+    @classmethod
+    def validate_excel(
+        cls,
+        excel_file: str,
+        mib_cache: Optional[MIBCache] = None,
+        mib_files: Optional["MIBFileLoader"] = None,
+        mib_library: Optional["MIBLibrary"] = None,
+        library_modules: Sequence[str] = (),
+        low_memory: bool = False,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Validate the SNMP Items and SNMP Traps of an Excel file, reporting every problem
+        of both sheets at once instead of stopping at the first sheet that has any.
 
-        for sheet_name in excel_data.sheet_names:
-            df = pd.read_excel(excel_file, sheet_name=sheet_name, na_values=na_values)
-            df = df.where(pd.notnull(df), None)
-            sheet_data = df.to_dict("records")
-            all_sheets_data[sheet_name] = sheet_data
+        Takes the same arguments as extract_from_excel.
 
-        snmp_items_json_list = all_sheets_data.get("SNMP Items", [])
-        snmp_traps_json_list = all_sheets_data.get("SNMP Traps", [])
-        template_info = all_sheets_data.get("Template Information", [])
-        template_info_json = template_info[0] if template_info else {}
+        Returns:
+            Dict[str, Dict[str, Any]]: Report of each sheet, keyed by sheet name, holding
+                the number of "validated", "null" and "ambiguous" entries, the latter
+                being duplicates that cannot be matched, the "unmatched" entries with
+                the closest MIB entries as their "Suggestions", and the "duplicates",
+                entries whose OID or Name is given by another entry, with the columns
+                duplicated under "Duplicated".
+        """
+        snmp_items_json_list, snmp_traps_json_list, _, mib_index = cls._read_source(
+            excel_file, mib_cache, mib_files, mib_library, library_modules, low_memory
+        )
+
+        report = {}
+        suggester = None
+        with metrics.stage("validate"):
+            for entity_type, input_data in (
+                ("SNMP Items", snmp_items_json_list),
+                ("SNMP Traps", snmp_traps_json_list),
+            ):
+                duplicate_oids, duplicate_names, null_entries = (
+                    cls._preprocess_input_data(input_data)
+                )
+                matched_data, unmatched_data = cls._match_entries(
+                    input_data, mib_index, duplicate_oids, duplicate_names
+                )
+                # Entries left with nothing to match by once their duplicated OID and
+                # Name are set aside are only reported as duplicates
+                ambiguous_data = [
+                    entry
+                    for entry in unmatched_data
+                    if cls._is_ambiguous(entry, duplicate_oids, duplicate_names)
+                ]
+                unmatched_data = [
+                    entry
+                    for entry in unmatched_data
+                    if not cls._is_ambiguous(entry, duplicate_oids, duplicate_names)
+                ]
+                if unmatched_data and suggester is None:
+                    suggester = cls._build_suggester(mib_index)
+
+                report[entity_type] = {
+                    "validated": len(matched_data),
+                    "null": len(null_entries),
+                    # Duplicates that could not be matched, which fail a generation too
+                    "ambiguous": len(ambiguous_data),
+                    "unmatched": [
+                        {
+                            **entry,
+                            "Suggestions": cls._suggest(entry, mib_index, suggester),
+                        }
+                        for entry in unmatched_data
+                    ],
+                    "duplicates": [
+                        {
+                            **entry,
+                            "Duplicated": [
+                                column
+                                for column, duplicates in (
+                                    ("OID", duplicate_oids),
+                                    ("Name", duplicate_names),
+                                )
+                                if entry.get(column) in duplicates
+                            ],
+                        }
+                        for entry in input_data
+                        if entry.get("OID") in duplicate_oids
+                        or entry.get("Name") in duplicate_names
+                    ],
+                }
+        return report
+
+    @staticmethod
+    def format_validation_report(report: Dict[str, Dict[str, Any]]) -> str:
+        """
+        Format a report returned by validate_excel as plain text.
+
+        Args:
+            report (Dict[str, Dict[str, Any]]): The report.
+
+        Returns:
+            str: One section per sheet, followed by a totals line.
+        """
+        lines = []
+        for entity_type, sheet_report in report.items():
+            lines.append(
+                f"{entity_type}: [{sheet_report['validated']}] validated, "
+                f"[{len(sheet_report['unmatched'])}] missing from the MIB data, "
+                f"[{len(sheet_report['duplicates'])}] duplicated, "
+                f"[{sheet_report['null']}] null"
+            )
+            for entry in sheet_report["unmatched"]:
+                lines.append(
+                    f"  MISSING    {entry.get('Name') or 'N/A'} (OID: {entry.get('OID') or 'N/A'})"
+                )
+                if entry["Suggestions"]:
+                    lines.append(
+                        "             did you mean: "
+                        + ", ".join(
+                            f"{suggestion['Name']} ({suggestion['OID']})"
+                            for suggestion in entry["Suggestions"]
+                        )
+                    )
+            for entry in sheet_report["duplicates"]:
+                lines.append(
+                    f"  DUPLICATE  {entry.get('Name') or 'N/A'} (OID: {entry.get('OID') or 'N/A'}), "
+                    f"same {' and '.join(entry['Duplicated'])} as another entry"
+                )
 
-        mib_sheet_name = next(
-            (sheet for sheet in all_sheets_data.keys() if "MIB" in sheet), None
+        unmatched = sum(len(sheet_report["unmatched"]) for sheet_report in report.values())
+        duplicates = sum(
+            len(sheet_report["duplicates"]) for sheet_report in report.values()
+        )
+        lines.append(
+            f"[{unmatched}] missing and [{duplicates}] duplicated entries found."
         )
-        mib_data_json_list = all_sheets_data.get(mib_sheet_name, [])
+        return "\n".join(lines)
 
-        preprocessed_snmp_items = cls._preprocess_and_validate(
-            snmp_items_json_list, mib_data_json_list, "SNMP Items"
+    @classmethod
+    def _read_source(
+        cls,
+        excel_file: str,
+        mib_cache: Optional[MIBCache],
+        mib_files: Optional["MIBFileLoader"],
+        mib_library: Optional["MIBLibrary"],
+        library_modules: Sequence[str],
+        low_memory: bool,
+    ) -> Tuple[
+        List[Dict[str, Any]],
+        List[Dict[str, Any]],
+        Dict[str, Any],
+        Union[MIBIndex, "ColumnarMIBIndex", "MIBLibraryIndex"],
+    ]:
+        """
+        Read the sheets of an Excel file and index its MIB data, without validating.
+
+        Returns:
+            The same tuple as extract_from_excel, with the SNMP items and traps as read.
+        """
+        with open_source(excel_file) as reader:
+            with metrics.stage("load"):
+                snmp_items_json_list = cls._read_sheet(
+                    reader, "SNMP Items", cls.ITEM_COLUMNS
+                )
+                snmp_traps_json_list = cls._read_sheet(
+                    reader, "SNMP Traps", cls.ITEM_COLUMNS
+                )
+                template_info = cls._read_sheet(
+                    reader, "Template Information", cls.TEMPLATE_COLUMNS
+                )
+            template_info_json = template_info[0] if template_info else {}
+
+            if mib_library is not None:
+                from utils.mib_library import MIBLibraryIndex
+
+                mib_index = MIBLibraryIndex(mib_library, library_modules)
+            elif mib_files is not None:
+                mib_index = cls._load_mib_files(mib_files, low_memory)[0]
+            else:
+                mib_sheet_name = next(
+                    (sheet for sheet in reader.sheet_names if "MIB" in sheet), None
+                )
+                mib_index = cls._load_mib_index(
+                    reader, mib_sheet_name, mib_cache, low_memory
+                )
+
+        return snmp_items_json_list, snmp_traps_json_list, template_info_json, mib_index
+
+    @classmethod
+    def extract_from_mib_files(
+        cls,
+        mib_files: "MIBFileLoader",
+        template_info_json: Dict[str, Any],
+        low_memory: bool = False,
+    ) -> Tuple[
+        List[Dict[str, Any]],
+        List[Dict[str, Any]],
+        Dict[str, Any],
+        Union[MIBIndex, "ColumnarMIBIndex"],
+    ]:
+        """
+        Extract data from SMI MIB files alone, without an Excel file.
+
+        Every readable scalar object of the MIB files becomes an SNMP item, and every
+        notification an SNMP trap.
+
+        Args:
+            mib_files (MIBFileLoader): The MIB files.
+            template_info_json (Dict[str, Any]): Template information, with the columns of
+                the Template Information sheet.
+            low_memory (bool): Index the MIB rows in a ColumnarMIBIndex.
+
+        Returns:
+            The same tuple as extract_from_excel.
+        """
+        mib_index, scalar_rows, notification_rows = cls._load_mib_files(
+            mib_files, low_memory
         )
-        preprocessed_snmp_traps = cls._preprocess_and_validate(
-            snmp_traps_json_list, mib_data_json_list, "SNMP Traps"
+        return cls._validate(
+            scalar_rows, notification_rows, template_info_json, mib_index
         )
-        discovery_rule_tables = cls._collect_discovery_rule_tables(mib_data_json_list)
+
+    @classmethod
+    def _validate(
+        cls,
+        snmp_items_json_list: List[Dict[str, Any]],
+        snmp_traps_json_list: List[Dict[str, Any]],
+        template_info_json: Dict[str, Any],
+        mib_index: Union[MIBIndex, "ColumnarMIBIndex", "MIBLibraryIndex"],
+    ) -> Tuple[
+        List[Dict[str, Any]],
+        List[Dict[str, Any]],
+        Dict[str, Any],
+        Union[MIBIndex, "ColumnarMIBIndex", "MIBLibraryIndex"],
+    ]:
+        with metrics.stage("validate"):
+            preprocessed_snmp_items = cls._preprocess_and_validate(
+                snmp_items_json_list, mib_index, "SNMP Items"
+            )
+            preprocessed_snmp_traps = cls._preprocess_and_validate(
+                snmp_traps_json_list, mib_index, "SNMP Traps"
+            )
+        # The library holds every imported MIB, so only the tables of the modules the
+        # template uses become discovery rules. Other indexes collected theirs when built
+        if hasattr(mib_index, "collect_discovery_rule_tables"):
+            with metrics.stage("discovery_rules"):
+                mib_index.collect_discovery_rule_tables(
+                    preprocessed_snmp_items + preprocessed_snmp_traps
+                )
+            print(mib_index.summary())
+        print(f"[{len(mib_index.discovery_rule_tables)}] Discovery Rules found.")
 
         return (
             preprocessed_snmp_items,
             preprocessed_snmp_traps,
             template_info_json,
-            discovery_rule_tables,
+            mib_index,
         )
 
+    @staticmethod
+    def _read_sheet(
+        reader: Source,
+        sheet_name: Optional[str],
+        columns: Tuple[str, ...],
+    ) -> List[Dict[str, Any]]:
+        """
+        Read a sheet's records, limited to the given columns.
+
+        Args:
+            reader (Source): Reader over the open workbook.
+            sheet_name (Optional[str]): Name of the sheet to read.
+            columns (Tuple[str, ...]): Columns to keep.
+
+        Returns:
+            List[Dict[str, Any]]: The sheet's records, or an empty list if the sheet is missing.
+        """
+        if sheet_name not in reader.sheet_names:
+            return []
+        return reader.read_records(sheet_name, columns)
+
+    @classmethod
+    def _load_mib_index(
+        cls,
+        reader: Source,
+        mib_sheet_name: Optional[str],
+        mib_cache: Optional[MIBCache],
+        low_memory: bool = False,
+    ) -> Union[MIBIndex, "ColumnarMIBIndex"]:
+        """
+        Parse and index the MIB sheet, or load the index from the cache.
+
+        Cache entries are keyed by a hash of the MIB sheet contents, so edits to the other
+        sheets of the workbook do not invalidate them.
+
+        Args:
+            reader (Source): Reader over the open workbook.
+            mib_sheet_name (Optional[str]): Name of the MIB sheet.
+            mib_cache (Optional[MIBCache]): Cache to load from and store into.
+            low_memory (bool): Stream the MIB sheet into a ColumnarMIBIndex.
+
+        Returns:
+            Union[MIBIndex, ColumnarMIBIndex]: Index of the MIB data, including its
+                discovery rule tables.
+        """
+        cache_key = None
+        if mib_cache is not None and mib_sheet_name in reader.sheet_names:
+            start_time = time.perf_counter()
+            with metrics.stage("mib_cache"):
+                # The two kinds of index are cached apart
+                cache_key = mib_cache.make_key(
+                    reader.sheet_digest(mib_sheet_name), *cls._index_kind(low_memory)
+                )
+                mib_index = mib_cache.load(cache_key)
+            if mib_index is not None:
+                print(
+                    f"Loaded MIB index for '{mib_sheet_name}' from cache in "
+                    f"{time.perf_counter() - start_time:.2f}s."
+                )
+                return mib_index
+
+        if low_memory:
+            from utils.mib_columns import ColumnarMIBIndex
+
+            # The rows are read while they are indexed, so both happen in the same stage
+            with metrics.stage("load"):
+                mib_index = ColumnarMIBIndex(
+                    reader.iter_records(mib_sheet_name, cls.MIB_COLUMNS)
+                    if mib_sheet_name in reader.sheet_names
+                    else ()
+                )
+            cls._collect_index_tables(mib_index)
+        else:
+            with metrics.stage("load"):
+                mib_data = cls._read_sheet(reader, mib_sheet_name, cls.MIB_COLUMNS)
+            mib_index = cls._index_mib_rows(mib_data)
+
+        if cache_key is not None:
+            with metrics.stage("mib_cache"):
+                mib_cache.store(cache_key, mib_index)
+
+        return mib_index
+
+    @classmethod
+    def _load_mib_files(
+        cls, mib_files: "MIBFileLoader", low_memory: bool = False
+    ) -> Tuple[
+        Union[MIBIndex, "ColumnarMIBIndex"], List[Dict[str, Any]], List[Dict[str, Any]]
+    ]:
+        """
+        Parse, resolve and index MIB files, or load the result from the cache.
+
+        Cache entries are keyed by the sizes and modification times of the MIB files and
+        of the files in their search directories, so checking them only takes a stat call
+        per file.
+
+        Args:
+            mib_files (MIBFileLoader): The MIB files, along with the cache to use.
+            low_memory (bool): Index the MIB rows in a ColumnarMIBIndex.
+
+        Returns:
+            Tuple containing:
+            - Index of the MIB data, including its discovery rule tables
+            - Readable scalar objects of the MIB files, as SNMP Items rows
+            - Notifications of the MIB files, as SNMP Traps rows
+        """
+        mib_cache = mib_files.mib_cache
+        cache_key = None
+        if mib_cache is not None:
+            start_time = time.perf_counter()
+            with metrics.stage("mib_cache"):
+                cache_key = mib_cache.make_key(
+                    "smi-index", mib_files.fingerprint(), *cls._index_kind(low_memory)
+                )
+                loaded = mib_cache.load(cache_key)
+            if loaded is not None:
+                print(
+                    f"Loaded MIB index for [{len(mib_files.paths)}] MIB files from cache "
+                    f"in {time.perf_counter() - start_time:.2f}s."
+                )
+                return loaded
+
+        with metrics.stage("load"):
+            mib_data = mib_files.rows()
+            scalar_rows = mib_files.scalar_rows()
+            notification_rows = mib_files.notification_rows()
+        loaded = (
+            cls._index_mib_rows(mib_data, low_memory),
+            scalar_rows,
+            notification_rows,
+        )
+
+        if cache_key is not None:
+            with metrics.stage("mib_cache"):
+                mib_cache.store(cache_key, loaded)
+
+        return loaded
+
+    @classmethod
+    def _index_mib_rows(
+        cls, mib_data: Iterable[Dict[str, Any]], low_memory: bool = False
+    ) -> Union[MIBIndex, "ColumnarMIBIndex"]:
+        with metrics.stage("index"):
+            if low_memory:
+                from utils.mib_columns import ColumnarMIBIndex
+
+                mib_index = ColumnarMIBIndex(mib_data)
+            else:
+                mib_index = MIBIndex(mib_data)
+        cls._collect_index_tables(mib_index)
+        return mib_index
+
+    @staticmethod
+    def _index_kind(low_memory: bool) -> Tuple[str, ...]:
+        # Keys of MIBIndex entries are left as they were before columnar indexes existed
+        return ("columnar",) if low_memory else ()
+
+    @classmethod
+    def _collect_index_tables(
+        cls, mib_index: Union[MIBIndex, "ColumnarMIBIndex"]
+    ) -> None:
+        with metrics.stage("discovery_rules"):
+            if isinstance(mib_index, MIBIndex):
+                mib_index.discovery_rule_tables = cls._collect_discovery_rule_tables(
+                    mib_index
+                )
+            else:
+                mib_index.discovery_rule_tables = mib_index.collect_tables()
+        print(mib_index.summary())
+
     @classmethod
     def _preprocess_and_validate(
         cls,
         input_data: List[Dict[str, Any]],
-        mib_data: List[Dict[str, Any]],
+        mib_index: Union[MIBIndex, "ColumnarMIBIndex", "MIBLibraryIndex"],
         entity_type: str,
     ) -> List[Dict[str, Any]]:
         """
@@ -85,7 +527,8 @@ class MIBValidator:
 
         Args:
             input_data (List[Dict[str, Any]]): List of input data dictionaries.
-            mib_data (List[Dict[str, Any]]): List of MIB data dictionaries.
+            mib_index (Union[MIBIndex, ColumnarMIBIndex, MIBLibraryIndex]): Index of the
+                MIB data.
             entity_type (str): Type of entity being validated (e.g., "SNMP Items", "SNMP Traps").
 
         Returns:
@@ -94,13 +537,22 @@ class MIBValidator:
         Raises:
             UnmatchedDataError: If there are unmatched entries after validation.
         """
-        oid_dict, name_dict, null_entries = cls._preprocess_input_data(input_data)
-        mib_oid_dict, mib_name_dict = cls._create_mib_dictionaries(mib_data)
+        duplicate_oids, duplicate_names, null_entries = cls._preprocess_input_data(
+            input_data
+        )
         matched_data, unmatched_data = cls._match_entries(
-            input_data, mib_oid_dict, mib_name_dict
+            input_data, mib_index, duplicate_oids, duplicate_names
         )
 
-        cls._print_results(matched_data, unmatched_data, null_entries, entity_type)
+        suggestions = []
+        if unmatched_data:
+            suggester = cls._build_suggester(mib_index)
+            suggestions = [
+                cls._suggest(entry, mib_index, suggester) for entry in unmatched_data
+            ]
+        cls._print_results(
+            matched_data, unmatched_data, null_entries, entity_type, suggestions
+        )
 
         if unmatched_data:
             raise UnmatchedDataError(
@@ -110,92 +562,64 @@ class MIBValidator:
         return matched_data
 
     @staticmethod
-    def _preprocess_input_data(input_data):
+    def _preprocess_input_data(
+        input_data: List[Dict[str, Any]],
+    ) -> Tuple[Set[Any], Set[Any], List[Dict[str, Any]]]:
         """
-        Preprocess input data to handle duplicates and null entries.
+        Find the duplicates and null entries of the input data, without copying or
+        changing the entries.
 
         Args:
             input_data (List[Dict[str, Any]]): List of input data dictionaries.
 
         Returns:
             Tuple containing:
-            - Dictionary of entries keyed by OID
-            - Dictionary of entries keyed by Name
+            - Set of OIDs given by more than one entry
+            - Set of Names given by more than one entry
             - List of null entries
         """
-        oid_count = defaultdict(list)
-        name_count = defaultdict(list)
-        oid_dict = {}
-        name_dict = {}
+        seen_oids = set()
+        seen_names = set()
+        duplicate_oids = set()
+        duplicate_names = set()
         null_entries = []
 
-        # First pass: count occurrences and store indices
-        for index, entry in enumerate(input_data):
-            oid, name = entry.get("OID"), entry.get("Name")
-            if oid:
-                oid_count[oid].append(index)
-            if name:
-                name_count[name].append(index)
-
-        # Second pass: categorize entries and handle duplicates
-        for index, entry in enumerate(input_data):
+        for entry in input_data:
             oid, name = entry.get("OID"), entry.get("Name")
-
             if not oid and not name:
                 null_entries.append(entry)
                 continue
 
-            entry_copy = entry.copy()
-
-            if oid and len(oid_count[oid]) > 1:
-                for dup_index in oid_count[oid]:
-                    input_data[dup_index]["OID"] = None
-                entry_copy["OID"] = None
-
-            if name and len(name_count[name]) > 1:
-                for dup_index in name_count[name]:
-                    input_data[dup_index]["Name"] = None
-                entry_copy["Name"] = None
-
-            if entry_copy["OID"]:
-                oid_dict[oid] = entry_copy
-            if entry_copy["Name"]:
-                name_dict[name] = entry_copy
-
-        return oid_dict, name_dict, null_entries
-
-    @staticmethod
-    def _create_mib_dictionaries(
-        mib_data: List[Dict[str, Any]]
-    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
-        """
-        Create dictionaries of MIB data keyed by OID and Name.
-
-        Args:
-            mib_data (List[Dict[str, Any]]): List of MIB data dictionaries.
+            if oid:
+                if oid in seen_oids:
+                    duplicate_oids.add(oid)
+                seen_oids.add(oid)
+            if name:
+                if name in seen_names:
+                    duplicate_names.add(name)
+                seen_names.add(name)
 
-        Returns:
-            Tuple containing:
-            - Dictionary of MIB entries keyed by OID
-            - Dictionary of MIB entries keyed by Name
-        """
-        mib_oid_dict = {entry["OID"]: entry for entry in mib_data if "OID" in entry}
-        mib_name_dict = {entry["Name"]: entry for entry in mib_data if "Name" in entry}
-        return mib_oid_dict, mib_name_dict
+        return duplicate_oids, duplicate_names, null_entries
 
     @staticmethod
     def _match_entries(
         input_data: List[Dict[str, Any]],
-        mib_oid_dict: Dict[str, Dict[str, Any]],
-        mib_name_dict: Dict[str, Dict[str, Any]],
+        mib_index: Union[MIBIndex, "ColumnarMIBIndex", "MIBLibraryIndex"],
+        duplicate_oids: Set[Any] = frozenset(),
+        duplicate_names: Set[Any] = frozenset(),
     ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         Match input entries against MIB data.
 
+        Duplicated OIDs and Names are ambiguous, so an entry is matched by its Name if
+        its OID is duplicated, and is unmatched if both are.
+
         Args:
             input_data (List[Dict[str, Any]]): List of input data dictionaries.
-            mib_oid_dict (Dict[str, Dict[str, Any]]): Dictionary of MIB entries keyed by OID.
-            mib_name_dict (Dict[str, Dict[str, Any]]): Dictionary of MIB entries keyed by Name.
+            mib_index (Union[MIBIndex, ColumnarMIBIndex, MIBLibraryIndex]): Index of the
+                MIB data.
+            duplicate_oids (Set[Any]): OIDs given by more than one entry.
+            duplicate_names (Set[Any]): Names given by more than one entry.
 
         Returns:
             Tuple containing:
@@ -207,65 +631,113 @@ class MIBValidator:
 
         for entry in input_data:
             oid, name = entry.get("OID"), entry.get("Name")
+            if oid in duplicate_oids:
+                oid = None
+            if name in duplicate_names:
+                name = None
 
             if not oid and not name:
                 unmatched_data.append(entry)
                 continue
 
-            matched = False
-
-            if oid and oid in mib_oid_dict:
-                matched_data.append(mib_oid_dict[oid])
-                matched = True
-            elif name and name in mib_name_dict:
-                matched_data.append(mib_name_dict[name])
-                matched = True
+            mib_entry = (oid and mib_index.get_by_oid(oid)) or (
+                name and mib_index.get_by_name(name)
+            )
 
-            if not matched:
+            if mib_entry:
+                matched_data.append(mib_entry)
+            else:
                 unmatched_data.append(entry)
 
         return matched_data, unmatched_data
 
     @staticmethod
+    def _is_ambiguous(
+        entry: Dict[str, Any], duplicate_oids: Set[Any], duplicate_names: Set[Any]
+    ) -> bool:
+        # Whether an entry gives an OID or Name, but each one it gives is duplicated
+        oid, name = entry.get("OID"), entry.get("Name")
+        return bool(oid or name) and (not oid or oid in duplicate_oids) and (
+            not name or name in duplicate_names
+        )
+
+    @staticmethod
+    def _build_suggester(
+        mib_index: Union[MIBIndex, "ColumnarMIBIndex", "MIBLibraryIndex"],
+    ) -> "MIBSuggester":
+        # Suggestions are only built once an entry is missing
+        from utils.mib_library import MIBLibraryIndex
+        from utils.mib_suggestions import MIBSuggester
+
+        if isinstance(mib_index, MIBLibraryIndex):
+            suggester = MIBSuggester(mib_index.library.oids(), mib_index.library.names())
+        else:
+            suggester = MIBSuggester(mib_index.by_oid.keys(), mib_index.by_name.keys())
+        metrics.LOGGER.debug(
+            "Suggestion indexes built in %.2fs", suggester.build_seconds
+        )
+        return suggester
+
+    @staticmethod
+    def _suggest(
+        entry: Dict[str, Any],
+        mib_index: Union[MIBIndex, "ColumnarMIBIndex", "MIBLibraryIndex"],
+        suggester: "MIBSuggester",
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the MIB entries an unmatched entry most likely meant. MIB entries with the
+        entry's own OID or Name are left out, as they cannot be what it meant.
+
+        Args:
+            entry (Dict[str, Any]): The unmatched entry.
+            mib_index (Union[MIBIndex, ColumnarMIBIndex, MIBLibraryIndex]): Index of the
+                MIB data.
+            suggester (MIBSuggester): Suggestion indexes over the MIB data.
+
+        Returns:
+            List[Dict[str, Any]]: The MIB entries with the closest names, then those
+                next to the entry's OID.
+        """
+        oid, name = entry.get("OID"), entry.get("Name")
+        suggested = suggester.suggest(oid, name)
+        mib_entries = {}
+        for mib_entry in [
+            *map(mib_index.get_by_name, suggested["Name"]),
+            *map(mib_index.get_by_oid, suggested["OID"]),
+        ]:
+            if (
+                mib_entry is not None
+                and mib_entry["OID"] != oid
+                and mib_entry["Name"] != name
+            ):
+                mib_entries.setdefault((mib_entry["OID"], mib_entry["Name"]), mib_entry)
+        return list(mib_entries.values())
+
+    @classmethod
     def _collect_discovery_rule_tables(
-        mib_data_json_list: List[Dict[str, Any]]
+        cls, mib_index: MIBIndex
     ) -> Dict[str, List[Dict[str, Any]]]:
         """
         Collect discovery rule tables from MIB data.
+        Each table holds the table entry followed by everything below it in numeric OID
+        order. Tables nested inside a table start their own discovery rule.
         Args:
-            mib_data_json_list (List[Dict[str, Any]]): List of MIB data dictionaries.
+            mib_index (MIBIndex): Index of the MIB data.
         Returns:
             Dict[str, List[Dict[str, Any]]]: Dictionary of discovery rule tables keyed by OID.
         """
-        # Sort the list of dictionaries by OID
-        mib_sorted_by_oid = sorted(mib_data_json_list, key=lambda x: x["OID"])
-        discovery_rule_tables: Dict[str, List[Dict[str, Any]]] = {}
-        current_rule: Optional[Dict[str, Any]] = None
-
-        for entry in mib_sorted_by_oid:
-            if "Table" in entry["Name"] and "SEQUENCE OF" in entry["Type"]:
-                # We've found the beginning entry to create a Discovery Rule
-                if current_rule is not None:
-                    # Save the previous rule if it exists
-                    discovery_rule_tables[current_rule["OID"]] = current_rule["entries"]
-                # Start a new rule
-                current_rule = {"OID": entry["OID"], "entries": [entry]}
-            elif current_rule is not None:
-                # Check if the entry's OID starts with the current rule's OID
-                if entry["OID"].startswith(current_rule["OID"]):
-                    current_rule["entries"].append(entry)
-                else:
-                    # If not, we've moved past the current rule
-                    # Save the previous rule if it exists
-                    discovery_rule_tables[current_rule["OID"]] = current_rule["entries"]
-                    current_rule = None
-
-        # Make sure we add the last rule if it exists
-        if current_rule is not None:
-            discovery_rule_tables[current_rule["OID"]] = current_rule["entries"]
-
-        print(f"[{len(discovery_rule_tables)}] Discovery Rules found.")
-        return discovery_rule_tables
+        mib_tree = mib_index.tree
+        return {
+            entry["OID"]: list(
+                mib_tree.subtree(entry["OID"], prune=cls._is_discovery_rule_table)
+            )
+            for entry in mib_tree.subtree()
+            if cls._is_discovery_rule_table(entry)
+        }
+
+    @staticmethod
+    def _is_discovery_rule_table(entry: Dict[str, Any]) -> bool:
+        return is_table_type(entry["Name"], entry["Type"])
 
     @staticmethod
     def _print_results(
@@ -273,6 +745,7 @@ class MIBValidator:
         unmatched_data: List[Dict[str, Any]],
         null_entries: List[Dict[str, Any]],
         entity_type: str,
+        suggestions: Sequence[List[Dict[str, Any]]] = (),
     ) -> None:
         """
         Print validation results.
@@ -282,6 +755,8 @@ class MIBValidator:
             unmatched_data (List[Dict[str, Any]]): List of unmatched entries.
             null_entries (List[Dict[str, Any]]): List of null entries.
             entity_type (str): Type of entity being validated (e.g., "SNMP Items", "SNMP Traps").
+            suggestions (Sequence[List[Dict[str, Any]]]): Closest MIB entries of each
+                unmatched entry.
         """
         print(f"[{len(matched_data)}] Validated {entity_type} entries")
         print(f"[{len(unmatched_data)}] Missing {entity_type} entries")
@@ -291,7 +766,17 @@ class MIBValidator:
             print(
                 f"The following {entity_type} entries were missing from the MIB file:"
             )
-            for entry in unmatched_data:
+            for entry, entry_suggestions in itertools.zip_longest(
+                unmatched_data, suggestions
+            ):
                 print(
                     f"  - {entry.get('Name', 'N/A')} (OID: {entry.get('OID', 'N/A')})"
                 )
+                if entry_suggestions:
+                    print(
+                        "      did you mean: "
+                        + ", ".join(
+                            f"{suggestion['Name']} ({suggestion['OID']})"
+                            for suggestion in entry_suggestions
+                        )
+                    )
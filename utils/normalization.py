@@ -0,0 +1,217 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Sequence
+
+from utils.config import NORMALIZATION
+
+_LEADING_NON_UPPERCASE = re.compile(r"^[^A-Z]*")
+_LEADING_NON_UPPERCASE_PER_LINE = re.compile(r"^[^A-Z\n]*", re.MULTILINE)
+_CAMEL_CASE_BOUNDARY = re.compile(r"(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+_MISSING = object()
+
+
+class NormalizationCache:
+    """
+    A bounded, least-recently-used memo of a text normalization, keyed on the raw string.
+
+    MIBs repeat the same descriptions and names many times over, e.g. RFC boilerplate and
+    the text of shared TEXTUAL-CONVENTIONs, so each distinct string is normalized once.
+    Strings missing from the cache are normalized together in a single call.
+    """
+
+    def __init__(
+        self,
+        normalize_all: Callable[[List[str]], List[str]],
+        maxsize: int = NORMALIZATION.CACHE_SIZE,
+    ):
+        """
+        Args:
+            normalize_all (Callable[[List[str]], List[str]]): Normalizes a list of distinct
+                raw strings, in order.
+            maxsize (int): Number of normalized strings kept.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._normalize_all = normalize_all
+        self._cache: OrderedDict = OrderedDict()
+        # The thread object builder normalizes from several threads at once
+        self._lock = threading.Lock()
+
+    def normalize(self, raw_value: str) -> str:
+        return self.normalize_all([raw_value])[0]
+
+    def normalize_all(self, raw_values: Sequence[str]) -> List[str]:
+        """
+        Normalize raw strings, reusing the results of the ones seen before.
+
+        Args:
+            raw_values (Sequence[str]): Raw strings.
+
+        Returns:
+            List[str]: Normalized strings, in input order.
+        """
+        with self._lock:
+            cache = self._cache
+            values = []
+            missing: Dict[str, str] = {}
+            for raw_value in raw_values:
+                value = cache.get(raw_value, _MISSING)
+                if value is _MISSING:
+                    missing[raw_value] = raw_value
+                else:
+                    cache.move_to_end(raw_value)
+                values.append(value)
+
+            # Repeats of a missing string within the same call count as hits
+            self.misses += len(missing)
+            self.hits += len(values) - len(missing)
+            if not missing:
+                return values
+
+            for raw_value, value in zip(missing, self._normalize_all(list(missing))):
+                missing[raw_value] = value
+                cache[raw_value] = value
+            while len(cache) > self.maxsize:
+                cache.popitem(last=False)
+
+            return [
+                missing[raw_value] if value is _MISSING else value
+                for raw_value, value in zip(raw_values, values)
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def add_counts(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+        }
+
+
+def _split_names(raw_names: List[str]) -> List[str]:
+    # The names are joined with line breaks so each pattern runs once over all of them
+    joined = "\n".join(raw_names)
+    if joined.count("\n") != len(raw_names) - 1:
+        # A name holding a line break would shift the names apart
+        return [
+            _CAMEL_CASE_BOUNDARY.sub(" ", _LEADING_NON_UPPERCASE.sub("", raw_name))
+            for raw_name in raw_names
+        ]
+
+    joined = _CAMEL_CASE_BOUNDARY.sub(" ", _LEADING_NON_UPPERCASE_PER_LINE.sub("", joined))
+    return joined.split("\n")
+
+
+def _collapse_descriptions(raw_descriptions: List[str]) -> List[str]:
+    # Every paragraph goes onto one line. str.split() with no separator splits on exactly
+    # the characters the \s+ regex matches, and is several times faster than re.sub
+    return [
+        "\n".join(
+            " ".join(paragraph.split())
+            for paragraph in raw_description.replace("'", '"').split("\n\n")
+        )
+        for raw_description in raw_descriptions
+    ]
+
+
+def _slugify_all(names: List[str]) -> List[str]:
+    return [name.replace(" ", "-").lower() for name in names]
+
+
+NAMES = NormalizationCache(_split_names)
+DESCRIPTIONS = NormalizationCache(_collapse_descriptions)
+KEY_SLUGS = NormalizationCache(_slugify_all)
+
+CACHES = {"names": NAMES, "descriptions": DESCRIPTIONS, "key_slugs": KEY_SLUGS}
+
+
+def normalize_name(raw_name: str) -> str:
+    """
+    Turn a MIB object name into a display name, e.g. "ifInOctets" into "In Octets".
+
+    Args:
+        raw_name (str): Name of the MIB object.
+
+    Returns:
+        str: The display name.
+    """
+    return NAMES.normalize(raw_name)
+
+
+def normalize_names(raw_names: Sequence[str]) -> List[str]:
+    return NAMES.normalize_all(raw_names)
+
+
+def normalize_descriptions(raw_descriptions: Sequence[str]) -> List[str]:
+    """
+    Collapse every paragraph of MIB descriptions onto one line and replace single quotes
+    with double quotes.
+
+    Args:
+        raw_descriptions (Sequence[str]): MIB descriptions.
+
+    Returns:
+        List[str]: The normalized descriptions, in input order.
+    """
+    return DESCRIPTIONS.normalize_all(raw_descriptions)
+
+
+def slugify(name: str) -> str:
+    # Key segment of a display name, e.g. "In Octets" becomes "in-octets"
+    return KEY_SLUGS.normalize(name)
+
+
+def slugify_all(names: Sequence[str]) -> List[str]:
+    return KEY_SLUGS.normalize_all(names)
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+def cache_counts() -> Counter:
+    """
+    Count the hits and misses of every cache, e.g. {"names_hits": 3, "names_misses": 1}.
+
+    Each process has its own caches, so the object builder sends back what its worker
+    processes counted, see add_cache_counts.
+
+    Returns:
+        Counter: Hits and misses keyed by cache.
+    """
+    counts: Counter = Counter()
+    for name, cache in CACHES.items():
+        counts[f"{name}_hits"] = cache.hits
+        counts[f"{name}_misses"] = cache.misses
+    return counts
+
+
+def add_cache_counts(counts: Counter) -> None:
+    # Adds the hits and misses counted by another process, see cache_counts
+    for name, cache in CACHES.items():
+        cache.add_counts(counts[f"{name}_hits"], counts[f"{name}_misses"])
+
+
+def format_cache_stats() -> str:
+    hits = sum(cache.hits for cache in CACHES.values())
+    misses = sum(cache.misses for cache in CACHES.values())
+    return f"Text normalization: [{hits}] cache hits, [{misses}] misses"
+
+
+def clear_caches() -> None:
+    for cache in CACHES.values():
+        cache.clear()
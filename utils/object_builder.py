@@ -0,0 +1,157 @@
+import os
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Sequence, Tuple
+
+from utils import metrics, normalization
+from utils.config import OBJECT_BUILDER
+from utils.uuid_generator import is_deterministic, set_deterministic
+
+if TYPE_CHECKING:
+    import concurrent.futures
+
+BACKENDS = ("auto", "serial", "thread", "process")
+
+
+class ObjectBuilder:
+    """
+    Builds Zabbix objects from input rows on a pluggable backend.
+
+    - serial: builds every row in the calling thread.
+    - thread: builds chunks of rows on a thread pool. Object construction is pure-Python
+      string work, so the GIL serializes it; this mainly exists for comparison.
+    - process: builds chunks of rows on a process pool, which pays off once there are
+      enough rows to cover starting the workers and sending the objects back.
+    - auto: process when at least OBJECT_BUILDER.PROCESS_MIN_JOBS workers are available
+      and a call has at least OBJECT_BUILDER.PROCESS_MIN_ROWS rows, serial otherwise.
+
+    Results are always returned in input order, whatever order the chunks finish in.
+    """
+
+    def __init__(
+        self,
+        backend: str = OBJECT_BUILDER.BACKEND,
+        jobs: Optional[int] = None,
+        chunk_size: int = OBJECT_BUILDER.CHUNK_SIZE,
+    ):
+        """
+        Args:
+            backend (str): One of BACKENDS.
+            jobs (Optional[int]): Number of workers. Defaults to the CPU count.
+            chunk_size (int): Number of rows sent to a worker at once.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown object builder backend '{backend}', expected one of {BACKENDS}"
+            )
+
+        self.backend = backend
+        self.jobs = jobs or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executors: dict = {}
+
+    def __enter__(self) -> "ObjectBuilder":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown()
+        self._executors.clear()
+
+    def choose_backend(self, row_count: int) -> str:
+        if self.backend != "auto":
+            return self.backend
+        if (
+            self.jobs >= OBJECT_BUILDER.PROCESS_MIN_JOBS
+            and row_count >= OBJECT_BUILDER.PROCESS_MIN_ROWS
+        ):
+            return "process"
+        return "serial"
+
+    def build(
+        self,
+        build_all: Callable[[List[Any]], List[Any]],
+        rows: Sequence[Any],
+        row_count: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Build one object per row.
+
+        Args:
+            build_all (Callable[[List[Any]], List[Any]]): Builds the objects of a list of
+                rows, in order, e.g. SNMPItem.generate_snmp_items. The serial backend
+                passes it every row at once, the pools a chunk at a time. Must be
+                picklable, e.g. a functools.partial of a classmethod, for the process
+                backend.
+            rows (Sequence[Any]): Input rows.
+            row_count (Optional[int]): Amount of work the rows stand for, used by the auto
+                backend. Defaults to the number of rows.
+
+        Returns:
+            List[Any]: Built objects, in input order.
+        """
+        rows = list(rows)
+        backend = self.choose_backend(len(rows) if row_count is None else row_count)
+        if backend == "serial" or len(rows) <= 1:
+            return build_all(rows)
+
+        chunks = [
+            rows[start : start + self.chunk_size]
+            for start in range(0, len(rows), self.chunk_size)
+        ]
+        # Executor.map yields results in submission order, which keeps the output stable
+        results = self._executor(backend).map(
+            _build_chunk,
+            [build_all] * len(chunks),
+            chunks,
+            [is_deterministic()] * len(chunks),
+            # Threads count into the parent's counters directly
+            [backend == "process"] * len(chunks),
+        )
+        objects = []
+        for chunk, counters, cache_counts in results:
+            objects.extend(chunk)
+            if counters:
+                metrics.COUNTERS.update(counters)
+            if cache_counts:
+                normalization.add_cache_counts(cache_counts)
+        return objects
+
+    def _executor(self, backend: str) -> "concurrent.futures.Executor":
+        # Pools are started on first use and shared by every build call until close().
+        # concurrent.futures is imported here, since the serial backend never needs it
+        if backend not in self._executors:
+            import concurrent.futures
+
+            executor_class = (
+                concurrent.futures.ProcessPoolExecutor
+                if backend == "process"
+                else concurrent.futures.ThreadPoolExecutor
+            )
+            self._executors[backend] = executor_class(max_workers=self.jobs)
+        return self._executors[backend]
+
+
+def _build_chunk(
+    build_all: Callable[[List[Any]], List[Any]],
+    rows: List[Any],
+    deterministic_uuids: bool,
+    return_counters: bool,
+) -> Tuple[List[Any], Optional[Counter], Optional[Counter]]:
+    # Worker processes do not necessarily inherit the parent's UUID mode
+    set_deterministic(deterministic_uuids)
+    if not return_counters:
+        return build_all(rows), None, None
+
+    # A worker builds many chunks, so only what this chunk counted is sent back, along
+    # with the hits and misses of its normalization caches
+    counters_before = metrics.COUNTERS.copy()
+    cache_counts_before = normalization.cache_counts()
+    objects = build_all(rows)
+    return (
+        objects,
+        metrics.COUNTERS - counters_before,
+        normalization.cache_counts() - cache_counts_before,
+    )
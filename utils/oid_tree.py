@@ -0,0 +1,197 @@
+import struct
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class OIDNode:
+    """
+    A node of an OIDTree. Holds the MIB entry registered at its OID, if any.
+    """
+
+    __slots__ = ("arc", "parent", "children", "entry")
+
+    def __init__(self, arc: Optional[int], parent: Optional["OIDNode"]):
+        self.arc = arc
+        self.parent = parent
+        self.children: Dict[int, "OIDNode"] = {}
+        self.entry: Optional[Dict[str, Any]] = None
+
+    def sorted_children(self) -> List["OIDNode"]:
+        return [self.children[arc] for arc in sorted(self.children)]
+
+
+class OIDTree:
+    """
+    A trie of MIB entries keyed on the integer arcs of their OIDs.
+
+    Lookups, parent and child queries run in O(depth) and subtree traversals yield
+    entries in numeric OID order, so ".1.3.6.1.2" sorts before ".1.3.6.1.10" and
+    ".1.2" is never mistaken for a prefix of ".1.20".
+    """
+
+    def __init__(self, entries: Iterable[Dict[str, Any]] = ()):
+        self.root = OIDNode(None, None)
+        for entry in entries:
+            self.insert(entry)
+
+    @staticmethod
+    def parse_oid(oid: Any) -> Optional[Tuple[int, ...]]:
+        """
+        Split a dotted OID string into its integer arcs.
+
+        Args:
+            oid (Any): OID such as ".1.3.6.1.2.1".
+
+        Returns:
+            Optional[Tuple[int, ...]]: The OID's arcs, or None if it is not a numeric OID.
+        """
+        if not isinstance(oid, str):
+            return None
+        arcs = oid.strip().lstrip(".").split(".")
+        if not all(arc.isdigit() for arc in arcs):
+            return None
+        return tuple(int(arc) for arc in arcs)
+
+    @classmethod
+    def pack_oid(cls, oid: Any) -> Optional[bytes]:
+        """
+        Pack the arcs of an OID as 4-byte big-endian integers, so byte order is numeric
+        OID order and the OIDs below an OID are the keys starting with its key.
+
+        Args:
+            oid (Any): OID such as ".1.3.6.1.2.1".
+
+        Returns:
+            Optional[bytes]: The packed arcs, or None if the OID is not numeric or has an
+                arc beyond the 32 bits SNMP allows.
+        """
+        arcs = cls.parse_oid(oid)
+        if arcs is None or any(arc > 0xFFFFFFFF for arc in arcs):
+            return None
+        return struct.pack(f">{len(arcs)}I", *arcs)
+
+    def insert(self, entry: Dict[str, Any]) -> bool:
+        """
+        Register a MIB entry at its OID. A later entry with the same OID replaces an earlier one.
+
+        Args:
+            entry (Dict[str, Any]): MIB entry with an "OID" key.
+
+        Returns:
+            bool: False if the entry's OID is missing or not numeric.
+        """
+        arcs = self.parse_oid(entry.get("OID"))
+        if arcs is None:
+            return False
+
+        node = self.root
+        for arc in arcs:
+            child = node.children.get(arc)
+            if child is None:
+                child = node.children[arc] = OIDNode(arc, node)
+            node = child
+        node.entry = entry
+        return True
+
+    def find(self, oid: str) -> Optional[OIDNode]:
+        arcs = self.parse_oid(oid)
+        if arcs is None:
+            return None
+
+        node = self.root
+        for arc in arcs:
+            node = node.children.get(arc)
+            if node is None:
+                return None
+        return node
+
+    def get(self, oid: str) -> Optional[Dict[str, Any]]:
+        node = self.find(oid)
+        return node.entry if node is not None else None
+
+    def parent(self, oid: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the closest ancestor of an OID that has a MIB entry.
+
+        Args:
+            oid (str): OID to look up.
+
+        Returns:
+            Optional[Dict[str, Any]]: The ancestor's MIB entry, or None if there is none.
+        """
+        node = self.find(oid)
+        if node is None:
+            return None
+
+        node = node.parent
+        while node is not None and node.entry is None:
+            node = node.parent
+        return node.entry if node is not None else None
+
+    def children(self, oid: str) -> List[Dict[str, Any]]:
+        """
+        Get the closest descendants of an OID that have MIB entries, in numeric order.
+
+        Args:
+            oid (str): OID to look up.
+
+        Returns:
+            List[Dict[str, Any]]: MIB entries directly below the OID.
+        """
+        node = self.find(oid)
+        if node is None:
+            return []
+
+        children = []
+        stack = list(reversed(node.sorted_children()))
+        while stack:
+            child = stack.pop()
+            if child.entry is not None:
+                children.append(child.entry)
+            else:
+                stack.extend(reversed(child.sorted_children()))
+        return children
+
+    def table_columns(self, table_oid: str) -> List[Dict[str, Any]]:
+        """
+        Get the columns of a table, i.e. the entries below its conceptual row entry.
+
+        Args:
+            table_oid (str): OID of the table.
+
+        Returns:
+            List[Dict[str, Any]]: MIB entries of the table's columns, in numeric order.
+        """
+        rows = self.children(table_oid)
+        return self.children(rows[0]["OID"]) if rows else []
+
+    def subtree(
+        self,
+        oid: Optional[str] = None,
+        prune: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Walk the MIB entries at and below an OID in numeric order.
+
+        Args:
+            oid (Optional[str]): OID to start from. The whole tree is walked if omitted.
+            prune (Optional[Callable[[Dict[str, Any]], bool]]): Predicate on descendant
+                entries. Matching entries are skipped along with everything below them.
+
+        Yields:
+            Dict[str, Any]: MIB entries in numeric OID order.
+        """
+        start = self.root if oid is None else self.find(oid)
+        if start is None:
+            return
+
+        if start.entry is not None:
+            yield start.entry
+
+        stack = list(reversed(start.sorted_children()))
+        while stack:
+            node = stack.pop()
+            if node.entry is not None:
+                if prune is not None and prune(node.entry):
+                    continue
+                yield node.entry
+            stack.extend(reversed(node.sorted_children()))
@@ -0,0 +1,451 @@
+import math
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from utils.config import ESTIMATE
+from utils.manifest import Fragment
+
+_SECONDS_PER_UNIT = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_SECONDS_PER_DAY = 86400
+# Trends keep one row per hour an item received values in
+_TREND_ROWS_PER_DAY = 24
+# Items without a value_type are imported as numeric unsigned, and only numeric value
+# types keep trends
+_DEFAULT_VALUE_TYPE = "UNSIGNED"
+_NUMERIC_VALUE_TYPES = ("FLOAT", "UNSIGNED")
+
+# Polled objects are grouped by the delay they share: SNMP items and walk items. Item
+# prototypes receive a value per discovered row each time their walk item is polled
+_KINDS = {"item": "SNMP items", "walk": "walk items"}
+# Intervals of these fields may be macros, e.g. {$SNMP.DELAY}, only resolved by Zabbix
+_INTERVAL_FIELDS = ("delay", "history", "trends")
+
+
+class BudgetExceededError(Exception):
+    """Raised when a template's polling load exceeds its budget."""
+
+    pass
+
+
+class _PollingLoad:
+    """
+    What one poll of every object of a kind costs, for one host.
+    """
+
+    __slots__ = (
+        "delay",
+        "objects",
+        "values",
+        "requests",
+        "history_values",
+        "trend_series",
+        "relaxable",
+    )
+
+    def __init__(self, delay: str):
+        self.delay = delay
+        self.objects = 0
+        self.values = 0
+        self.requests = 0
+        self.history_values: Counter = Counter()
+        self.trend_series: Counter = Counter()
+        # Objects reused from a manifest keep the delay they were rendered with
+        self.relaxable = True
+
+    def add(self, entry: Any, values: int = 1) -> None:
+        value_type = _field(entry, "value_type") or _DEFAULT_VALUE_TYPE
+        self.values += values
+        if parse_interval(_field(entry, "history")):
+            self.history_values[value_type] += values
+        if (
+            parse_interval(_field(entry, "trends"))
+            and value_type in _NUMERIC_VALUE_TYPES
+        ):
+            self.trend_series[value_type] += values
+
+    def per_day(self, delay: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Scale the cost of one poll to a day of polling at a delay.
+
+        Args:
+            delay (Optional[str]): The delay, the kind's own if omitted.
+
+        Returns:
+            Dict[str, Any]: Values per second, requests per minute, and history and
+                trends rows per day by value type.
+        """
+        seconds = parse_interval(delay or self.delay)
+        if not seconds:
+            return {
+                "values_per_second": 0.0,
+                "requests_per_minute": 0.0,
+                "history_rows_per_day": {},
+                "trends_rows_per_day": {},
+            }
+        polls_per_day = _SECONDS_PER_DAY / seconds
+        trend_rows = min(_TREND_ROWS_PER_DAY, polls_per_day)
+        return {
+            "values_per_second": self.values / seconds,
+            "requests_per_minute": self.requests * 60 / seconds,
+            "history_rows_per_day": {
+                value_type: values * polls_per_day
+                for value_type, values in self.history_values.items()
+            },
+            "trends_rows_per_day": {
+                value_type: series * trend_rows
+                for value_type, series in self.trend_series.items()
+            },
+        }
+
+
+class PollingEstimator:
+    """
+    Estimates what a template costs the Zabbix server and the monitored devices once
+    linked to a number of hosts, and keeps it within an optional budget.
+
+    SNMP items cost one GET per poll. Walk items walk each of their OIDs with GetBulk
+    requests of bulk_max_repetitions rows, and every discovered row gives each item
+    prototype of the table a value per walk. Scalar walks cost the GetBulk requests
+    reading their subtree, and the dependent items they feed none. Traps are not
+    polled, so they are left out.
+    """
+
+    def __init__(
+        self,
+        hosts: int = ESTIMATE.HOSTS,
+        discovery_rows: int = ESTIMATE.DISCOVERY_ROWS,
+        max_values_per_second: Optional[float] = None,
+        max_requests_per_minute: Optional[float] = None,
+        relax: bool = False,
+        bulk_max_repetitions: int = ESTIMATE.BULK_MAX_REPETITIONS,
+    ):
+        """
+        Args:
+            hosts (int): Number of hosts the template is linked to.
+            discovery_rows (int): Number of rows discovered in every table.
+            max_values_per_second (Optional[float]): Budget of new values per second
+                across all the hosts.
+            max_requests_per_minute (Optional[float]): Budget of SNMP requests per host
+                per minute.
+            relax (bool): Lengthen delays along ESTIMATE.DELAY_STEPS until the template
+                fits the budget, instead of failing.
+            bulk_max_repetitions (int): Rows returned by each GetBulk request of a walk.
+        """
+        self.hosts = hosts
+        self.discovery_rows = discovery_rows
+        self.budget = {
+            "values_per_second": max_values_per_second,
+            "requests_per_minute": max_requests_per_minute,
+        }
+        self.relax = relax
+        self.bulk_max_repetitions = bulk_max_repetitions
+
+    def estimate(self, template: Any) -> Dict[str, Any]:
+        """
+        Estimate the polling load and storage of a template. Over budget, the delays of
+        the template's SNMP items and walk items are relaxed if allowed.
+
+        Args:
+            template (Any): The Template, whose objects may be Fragments reused by an
+                incremental run.
+
+        Objects whose delay, history or trends is a macro are left out of the estimate
+        and counted instead, since their intervals are only known to Zabbix.
+
+        Returns:
+            Dict[str, Any]: The estimate, ready for JSON.
+
+        Raises:
+            BudgetExceededError: If the template exceeds the budget, even with the
+                longest delays when relaxing them.
+        """
+        loads, macro_objects = self._measure(template)
+        delays = {kind: load.delay for kind, load in loads.items()}
+
+        while True:
+            totals, by_kind = self._combine(loads, delays)
+            exceeded = {
+                name: limit
+                for name, limit in self.budget.items()
+                if limit is not None and totals[name] > limit
+            }
+            if not exceeded:
+                break
+            kind = (
+                self._kind_to_relax(loads, delays, by_kind, exceeded)
+                if self.relax
+                else None
+            )
+            if not kind:
+                raise BudgetExceededError(
+                    f"Template '{template.name}' exceeds its polling budget: "
+                    + ", ".join(
+                        f"{totals[name]:.2f} {name.replace('_', ' ')} > {limit}"
+                        for name, limit in exceeded.items()
+                    )
+                    + (" even with the longest delays." if self.relax else ".")
+                )
+            delays[kind] = _next_delay(delays[kind])
+
+        relaxed = {
+            kind: delay for kind, delay in delays.items() if delay != loads[kind].delay
+        }
+        if relaxed:
+            self._apply(template, relaxed)
+
+        return {
+            "hosts": self.hosts,
+            "discovery_rows": self.discovery_rows,
+            "new_values_per_second": round(totals["values_per_second"], 3),
+            "snmp_requests_per_host_per_minute": round(
+                totals["requests_per_minute"], 3
+            ),
+            "history_rows_per_day": _rounded(totals["history_rows_per_day"]),
+            "trends_rows_per_day": _rounded(totals["trends_rows_per_day"]),
+            "kinds": {
+                _KINDS[kind]: {
+                    "delay": delays[kind],
+                    "objects": loads[kind].objects,
+                    "new_values_per_second": round(
+                        by_kind[kind]["values_per_second"], 3
+                    ),
+                    "snmp_requests_per_host_per_minute": round(
+                        by_kind[kind]["requests_per_minute"], 3
+                    ),
+                }
+                for kind in loads
+            },
+            "relaxed_delays": {
+                _KINDS[kind]: [loads[kind].delay, delay]
+                for kind, delay in relaxed.items()
+            },
+            "budget": {
+                "new_values_per_second": self.budget["values_per_second"],
+                "snmp_requests_per_host_per_minute": self.budget["requests_per_minute"],
+            },
+            "traps": len(template.snmp_traps),
+            "macro_interval_objects": macro_objects,
+        }
+
+    def _measure(self, template: Any) -> Tuple[Dict[str, _PollingLoad], int]:
+        loads: Dict[str, _PollingLoad] = {}
+        walk_kinds: Dict[str, _PollingLoad] = {}
+        macro_objects = 0
+        rows_per_walk = math.ceil((self.discovery_rows + 1) / self.bulk_max_repetitions)
+
+        for zabbix_object in template.snmp_items:
+            entry = _entry(zabbix_object)
+            if _has_macro_interval(entry):
+                macro_objects += 1
+                continue
+            snmp_oid = _field(entry, "snmp_oid") or ""
+            kind = _kind(entry)
+            # Every object of a kind shares the delay of its config section
+            load = loads.get(kind)
+            if load is None:
+                load = loads[kind] = _PollingLoad(_field(entry, "delay"))
+            load.relaxable &= not isinstance(zabbix_object, Fragment)
+            load.objects += 1
+            load.add(entry)
+            if kind == "walk":
+                # Each OID of the walk is walked until the first row past its table
+                load.requests += (snmp_oid.count(",") + 1) * rows_per_walk
+                walk_kinds[_field(entry, "key")] = load
+            elif _field(entry, "subtree_size") is not None:
+                # A scalar walk reads every object below its parent and one past it
+                load.requests += math.ceil(
+                    (_field(entry, "subtree_size") + 1) / self.bulk_max_repetitions
+                )
+            elif _field(entry, "master_item") is None:
+                # Dependent items take their value from a walk instead
+                load.requests += 1
+
+        for discovery_rule in template.discovery_rules:
+            entry = _entry(discovery_rule)
+            for item_prototype in _field(entry, "item_prototypes") or ():
+                master_item = _field(item_prototype, "master_item")
+                if isinstance(master_item, dict):
+                    master_item = master_item.get("key")
+                load = walk_kinds.get(master_item)
+                if load is None:
+                    continue
+                if _has_macro_interval(item_prototype):
+                    macro_objects += 1
+                else:
+                    load.add(item_prototype, self.discovery_rows)
+        return loads, macro_objects
+
+    def _combine(
+        self, loads: Dict[str, _PollingLoad], delays: Dict[str, str]
+    ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        by_kind = {kind: load.per_day(delays[kind]) for kind, load in loads.items()}
+        totals: Dict[str, Any] = {
+            "values_per_second": self.hosts
+            * sum(load["values_per_second"] for load in by_kind.values()),
+            "requests_per_minute": sum(
+                load["requests_per_minute"] for load in by_kind.values()
+            ),
+        }
+        for rows in ("history_rows_per_day", "trends_rows_per_day"):
+            per_type: Counter = Counter()
+            for load in by_kind.values():
+                per_type.update(load[rows])
+            totals[rows] = {
+                value_type: count * self.hosts for value_type, count in per_type.items()
+            }
+        return totals, by_kind
+
+    def _kind_to_relax(
+        self,
+        loads: Dict[str, _PollingLoad],
+        delays: Dict[str, str],
+        by_kind: Dict[str, Dict[str, Any]],
+        exceeded: Dict[str, float],
+    ) -> Optional[str]:
+        # The kind making up most of the excess is relaxed first
+        candidates = [
+            kind
+            for kind, load in loads.items()
+            if load.relaxable and _next_delay(delays[kind]) is not None
+        ]
+        return max(
+            candidates,
+            key=lambda kind: sum(
+                by_kind[kind][name] * (self.hosts if name == "values_per_second" else 1)
+                / limit
+                for name, limit in exceeded.items()
+            ),
+            default=None,
+        )
+
+    @staticmethod
+    def _apply(template: Any, delays: Dict[str, str]) -> None:
+        # Only the template's own objects are relaxed, see _PollingLoad.relaxable
+        for zabbix_object in template.snmp_items:
+            if isinstance(zabbix_object, Fragment):
+                continue
+            kind = _kind(zabbix_object)
+            if kind in delays and not _has_macro_interval(zabbix_object):
+                zabbix_object.delay = delays[kind]
+
+
+def parse_interval(interval: Optional[str]) -> int:
+    """
+    Parse a Zabbix time interval, e.g. "90d" or "30", into seconds. Of a delay with
+    flexible or scheduling intervals, e.g. "1m;50s/1-7,00:00-24:00", only the regular
+    interval before the first ";" is read.
+
+    Args:
+        interval (Optional[str]): The interval, with an optional s, m, h, d or w suffix.
+
+    Returns:
+        int: The interval in seconds, 0 for none.
+
+    Raises:
+        ValueError: If the interval is a macro or not a time interval.
+    """
+    if not interval:
+        return 0
+    interval = str(interval).split(";", 1)[0].strip()
+    if not interval:
+        return 0
+    if _is_macro(interval):
+        raise ValueError(
+            f"Interval '{interval}' is a macro, whose value is only known to Zabbix."
+        )
+    unit = _SECONDS_PER_UNIT.get(interval[-1:])
+    if unit is None:
+        return int(interval)
+    return int(interval[:-1]) * unit
+
+
+def format_estimate(estimate: Dict[str, Any]) -> str:
+    """
+    Format a polling estimate as plain text.
+
+    Args:
+        estimate (Dict[str, Any]): The estimate returned by PollingEstimator.estimate.
+
+    Returns:
+        str: The estimate, one line per figure.
+    """
+    lines = [
+        f"Polling estimate for [{estimate['hosts']}] host(s) and "
+        f"[{estimate['discovery_rows']}] rows per discovered table:",
+        f"{'kind':<17}{'delay':>7}{'objects':>9}{'values/s':>12}{'requests/min':>14}",
+    ]
+    for kind, load in estimate["kinds"].items():
+        lines.append(
+            f"{kind:<17}{load['delay']:>7}{load['objects']:>9}"
+            f"{load['new_values_per_second']:>12.3f}"
+            f"{load['snmp_requests_per_host_per_minute']:>14.1f}"
+        )
+    lines.append(f"[{estimate['new_values_per_second']}] new values per second")
+    lines.append(
+        f"[{estimate['snmp_requests_per_host_per_minute']}] SNMP requests per host "
+        "per minute"
+    )
+    for label, key in (
+        ("history", "history_rows_per_day"),
+        ("trends", "trends_rows_per_day"),
+    ):
+        rows = estimate[key]
+        by_type = ", ".join(
+            f"{value_type} {count}" for value_type, count in rows.items()
+        )
+        lines.append(
+            f"[{sum(rows.values())}] {label} rows per day"
+            + (f" ({by_type})" if by_type else "")
+        )
+    if estimate["traps"]:
+        lines.append(f"[{estimate['traps']}] SNMP traps, not polled")
+    if estimate["macro_interval_objects"]:
+        lines.append(
+            f"[{estimate['macro_interval_objects']}] objects with macro intervals, "
+            "not estimated"
+        )
+    for kind, (old_delay, new_delay) in estimate["relaxed_delays"].items():
+        lines.append(f"Relaxed the delay of {kind} from {old_delay} to {new_delay}.")
+    return "\n".join(lines)
+
+
+def _entry(zabbix_object: Any) -> Any:
+    # Reused objects only keep their YAML and the fields the estimate reads
+    if isinstance(zabbix_object, Fragment):
+        return zabbix_object.fields or {}
+    return zabbix_object
+
+
+def _kind(entry: Any) -> str:
+    # Scalar walks replace SNMP items, so they share the delay of SNMP items
+    snmp_oid = _field(entry, "snmp_oid") or ""
+    if snmp_oid.startswith("walk[") and _field(entry, "subtree_size") is None:
+        return "walk"
+    return "item"
+
+
+def _field(entry: Any, name: str) -> Any:
+    # Entries are Zabbix objects, or the fields of reused Fragments
+    if isinstance(entry, dict):
+        return entry.get(name)
+    return getattr(entry, name, None)
+
+
+def _is_macro(interval: Any) -> bool:
+    # User macros such as {$SNMP.DELAY} and low-level discovery macros such as {#DELAY}
+    return "{" in str(interval).split(";", 1)[0]
+
+
+def _has_macro_interval(entry: Any) -> bool:
+    return any(_is_macro(_field(entry, name) or "") for name in _INTERVAL_FIELDS)
+
+
+def _next_delay(delay: str) -> Optional[str]:
+    seconds = parse_interval(delay)
+    return next(
+        (step for step in ESTIMATE.DELAY_STEPS if parse_interval(step) > seconds), None
+    )
+
+
+def _rounded(rows: Dict[str, float]) -> Dict[str, int]:
+    return {value_type: round(count) for value_type, count in sorted(rows.items())}
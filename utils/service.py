@@ -0,0 +1,287 @@
+import http.server
+import json
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+import urllib.parse
+import zipfile
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.config import SERVICE
+from utils.mib_validator import UnmatchedDataError
+from utils.sources import SOURCES
+
+
+class ServiceError(Exception):
+    """Raised for a request the service cannot handle, along with its HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class TemplateService:
+    """
+    Generates templates for HTTP requests in one long-running process, so the imports,
+    the MIB indexes and the normalization caches stay warm from one request to the next.
+
+    Endpoints:
+        POST /templates: Generate a template and return its YAML. The body is an .xlsx
+            workbook, or empty with ?path= naming a workbook or single-table source on
+            the server. Timings are returned in the X-Queue-Seconds, X-Generation-Seconds
+            and Server-Timing headers, and the object counts in X-Template-Summary.
+        GET /health: Service status and counters, as JSON.
+
+    At most jobs templates are generated at once. Other requests wait for a slot, and
+    fail with 503 once they have waited queue_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[..., Dict[str, Any]],
+        jobs: int = SERVICE.JOBS,
+        queue_timeout: float = SERVICE.QUEUE_TIMEOUT,
+        max_upload_bytes: int = SERVICE.MAX_UPLOAD_BYTES,
+        mib_cache: Optional[Any] = None,
+    ):
+        """
+        Args:
+            generate (Callable[..., Dict[str, Any]]): Generates the template of a source
+                file into output_dir, given as a keyword, and returns its summary.
+            jobs (int): Number of templates generated at once.
+            queue_timeout (float): Seconds a request waits for a generation slot.
+            max_upload_bytes (int): Largest workbook accepted in a request body.
+            mib_cache (Optional[Any]): The MemoryMIBCache generate uses, reported by /health.
+        """
+        self.generate = generate
+        self.jobs = jobs
+        self.queue_timeout = queue_timeout
+        self.max_upload_bytes = max_upload_bytes
+        self.mib_cache = mib_cache
+        self.started_at = time.time()
+        self.responses: Counter = Counter()
+        self._slots = threading.BoundedSemaphore(jobs)
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def health(self) -> Dict[str, Any]:
+        status = {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "jobs": self.jobs,
+            "active": self._active,
+            "responses": {str(code): count for code, count in self.responses.items()},
+        }
+        if self.mib_cache is not None:
+            status["mib_cache"] = {
+                "entries": len(self.mib_cache),
+                "hits": self.mib_cache.hits,
+                "misses": self.mib_cache.misses,
+            }
+        return status
+
+    def generate_template(
+        self, query: Dict[str, str], read_body: Callable[[], bytes]
+    ) -> Tuple[bytes, Dict[str, str]]:
+        """
+        Generate the template a request asks for.
+
+        Args:
+            query (Dict[str, str]): Query parameters of the request.
+            read_body (Callable[[], bytes]): Reads the request body.
+
+        Returns:
+            Tuple containing:
+            - The template YAML
+            - Response headers holding the timings and the template summary
+
+        Raises:
+            ServiceError: If the request is invalid, the source cannot be read or
+                validated, or no generation slot frees up in time.
+        """
+        path = query.get("path")
+        body = read_body()
+        if path is None and not body:
+            raise ServiceError(400, "Send an .xlsx workbook as the body, or ?path=.")
+        if path is not None:
+            if not os.path.isfile(path):
+                raise ServiceError(404, f"File '{path}' not found.")
+            if os.path.splitext(path)[1].lower() not in SOURCES:
+                raise ServiceError(
+                    400,
+                    f"Unsupported file type for '{path}', expected one of "
+                    f"{', '.join(SOURCES)}.",
+                )
+
+        start_time = time.perf_counter()
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise ServiceError(
+                503, f"No generation slot freed up within {self.queue_timeout}s."
+            )
+        queue_seconds = time.perf_counter() - start_time
+
+        with self._lock:
+            self._active += 1
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                if path is None:
+                    # Single-table sources are several files, so only workbooks are uploaded
+                    path = os.path.join(directory, "upload.xlsx")
+                    with open(path, "wb") as f:
+                        f.write(body)
+
+                start_time = time.perf_counter()
+                try:
+                    summary = self.generate(
+                        path, output_dir=os.path.join(directory, "templates")
+                    )
+                except UnmatchedDataError as e:
+                    raise ServiceError(422, str(e)) from None
+                except (OSError, ValueError, zipfile.BadZipFile) as e:
+                    raise ServiceError(400, f"{type(e).__name__}: {e}") from None
+                generation_seconds = time.perf_counter() - start_time
+
+                with open(summary["output_file"], "rb") as f:
+                    yaml_bytes = f.read()
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._slots.release()
+
+        summary = {
+            key: value
+            for key, value in summary.items()
+            if key != "output_file" and value is not None
+        }
+        headers = {
+            "Content-Type": "application/yaml; charset=utf-8",
+            "X-Template-Name": urllib.parse.quote(summary["template"]),
+            "X-Template-Summary": json.dumps(summary),
+            "X-Queue-Seconds": f"{queue_seconds:.6f}",
+            "X-Generation-Seconds": f"{generation_seconds:.6f}",
+            "Server-Timing": (
+                f"queue;dur={queue_seconds * 1000:.1f}, "
+                f"generate;dur={generation_seconds * 1000:.1f}"
+            ),
+        }
+        return yaml_bytes, headers
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    server_version = "ZabbixSNMPTemplateService/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> TemplateService:
+        return self.server.service
+
+    def do_GET(self) -> None:
+        if urllib.parse.urlsplit(self.path).path == "/health":
+            self._send_json(200, self.service.health())
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint '{self.path}'."})
+
+    def do_POST(self) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != "/templates":
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            self._send_json(404, {"error": f"Unknown endpoint '{self.path}'."})
+            return
+
+        query = dict(urllib.parse.parse_qsl(url.query))
+        start_time = time.perf_counter()
+        try:
+            body, headers = self.service.generate_template(query, self._read_body)
+        except ServiceError as e:
+            self._send_json(
+                e.status,
+                {"error": str(e), "seconds": round(time.perf_counter() - start_time, 6)},
+            )
+        except Exception as e:
+            self._send_json(
+                500,
+                {
+                    "error": f"{type(e).__name__}: {e}",
+                    "seconds": round(time.perf_counter() - start_time, 6),
+                },
+            )
+        else:
+            self._send(200, body, headers)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > self.service.max_upload_bytes:
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            raise ServiceError(
+                413, f"Uploads are limited to {self.service.max_upload_bytes} bytes."
+            )
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, status: int, value: Dict[str, Any]) -> None:
+        self._send(
+            status,
+            json.dumps(value, indent=2).encode("utf-8"),
+            {"Content-Type": "application/json"},
+        )
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str]) -> None:
+        with self.service._lock:
+            self.service.responses[status] += 1
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix-socket"
+
+
+class _HTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self) -> Tuple[socket.socket, Any]:
+        request, _ = super().get_request()
+        return request, ()
+
+
+def create_server(
+    service: TemplateService,
+    host: str = SERVICE.HOST,
+    port: int = SERVICE.PORT,
+    socket_path: Optional[str] = None,
+) -> socketserver.BaseServer:
+    """
+    Create the HTTP server of the service, on a TCP port or on a Unix socket.
+
+    Args:
+        service (TemplateService): The service answering the requests.
+        host (str): Address the TCP server listens on.
+        port (int): Port the TCP server listens on, or 0 for any free port.
+        socket_path (Optional[str]): Path of a Unix socket to listen on instead. A stale
+            socket left at the path is replaced.
+
+    Returns:
+        socketserver.BaseServer: The server, to be run with serve_forever.
+    """
+    if socket_path is not None:
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, _RequestHandler)
+    else:
+        server = _HTTPServer((host, port), _RequestHandler)
+    server.service = service
+    return server
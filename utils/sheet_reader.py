@@ -0,0 +1,365 @@
+import hashlib
+import html
+import posixpath
+import re
+import zipfile
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from xml.etree.ElementTree import Element, fromstring, iterparse
+
+# Cell values treated as missing, matching the strings pandas used to map to NaN
+NA_VALUES = frozenset(
+    {
+        "",
+        "#N/A",
+        "#N/A N/A",
+        "#NA",
+        "-1.#IND",
+        "-1.#QNAN",
+        "-NaN",
+        "-nan",
+        "1.#IND",
+        "1.#QNAN",
+        "<NA>",
+        "N/A",
+        "NA",
+        "NULL",
+        "NaN",
+        "None",
+        "n/a",
+        "nan",
+        "null",
+    }
+)
+
+_SHARED_STRING_SPLIT = re.compile(rb"<(?:\w+:)?si(?:>|/>)")
+_SHARED_STRING_TEXT = re.compile(rb"<(?:\w+:)?t(?:\s[^>]*)?>(.*?)</(?:\w+:)?t>", re.S)
+_PHONETIC_RUN = re.compile(rb"<(?:\w+:)?rPh\b.*?</(?:\w+:)?rPh>", re.S)
+_SHARED_STRING_CELL = re.compile(
+    rb"""\st=["']s["'][^>]*>\s*<(?:\w+:)?v>(\d+)</(?:\w+:)?v>"""
+)
+_ESCAPED_CHARACTER = re.compile(r"_x([0-9A-Fa-f]{4})_")
+_ROW_NUMBER_DIGITS = "0123456789"
+# Decoded shared strings up to this many raw bytes are kept for reuse. Longer ones, e.g.
+# descriptions, are rarely repeated and would only hold the whole sheet in memory
+_SHARED_STRING_CACHE_MAX_BYTES = 128
+
+
+class SheetReader:
+    """
+    A read-only, streaming reader over the sheets of an Excel workbook.
+
+    The workbook archive is opened once and each sheet is parsed lazily, row by row,
+    only when it is requested. Rows are yielded as dictionaries keyed by the header row.
+    Shared strings are decoded on first use, so reading a small sheet does not pay for
+    the strings of a large one.
+    """
+
+    def __init__(self, excel_file: str):
+        self._archive = zipfile.ZipFile(excel_file)
+        self._sheet_paths, self._shared_strings_path = self._read_workbook_parts()
+        self._raw_shared_strings: Optional[_RawSharedStrings] = None
+        self._shared_strings: Dict[int, str] = {}
+
+    def __enter__(self) -> "SheetReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._archive.close()
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self._sheet_paths)
+
+    def iter_records(
+        self, sheet_name: str, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the rows of a sheet as dictionaries.
+
+        Args:
+            sheet_name (str): Name of the sheet to read.
+            columns (Optional[Sequence[str]]): Columns to keep. Requested columns that are
+                missing from the sheet are filled with None. All columns are kept if omitted.
+
+        Yields:
+            Dict[str, Any]: One dictionary per non-empty row.
+        """
+        rows = self._iter_rows(self._sheet_paths[sheet_name])
+        header_row = next(rows, None)
+        header = (
+            {
+                column: self._cell_value(cell, namespace)
+                for column, cell, namespace in header_row
+            }
+            if header_row is not None
+            else {}
+        )
+
+        wanted = {
+            column: name
+            for column, name in header.items()
+            if name is not None and (columns is None or name in columns)
+        }
+        present_columns = set(wanted.values())
+        missing_columns = [
+            name for name in columns or () if name not in present_columns
+        ]
+
+        for row in rows:
+            record = dict.fromkeys(wanted.values())
+            for column, cell, namespace in row:
+                if column in wanted:
+                    record[wanted[column]] = self._cell_value(cell, namespace)
+            # Only rows empty across the whole sheet are skipped, so a row holding
+            # nothing but columns that are not kept still reaches the null entry report
+            if all(value is None for value in record.values()) and all(
+                self._cell_value(cell, namespace) is None
+                for _, cell, namespace in row
+            ):
+                continue
+
+            for name in missing_columns:
+                record[name] = None
+            yield record
+
+    def read_records(
+        self, sheet_name: str, columns: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return list(self.iter_records(sheet_name, columns))
+
+    def sheet_digest(self, sheet_name: str) -> str:
+        """
+        Hash the contents of a sheet.
+
+        Shared string cells are hashed by the string they point to rather than by their
+        index, so the digest does not change when edits to other sheets reorder the
+        workbook's shared string table.
+
+        Args:
+            sheet_name (str): Name of the sheet to hash.
+
+        Returns:
+            str: Hex digest of the sheet contents.
+        """
+        parts = _SHARED_STRING_CELL.split(
+            self._archive.read(self._sheet_paths[sheet_name])
+        )
+        raw_shared_strings = self._load_raw_shared_strings()
+        parts[1::2] = map(raw_shared_strings.__getitem__, map(int, parts[1::2]))
+        return hashlib.sha256(b"\x00".join(parts)).hexdigest()
+
+    def _read_workbook_parts(self) -> tuple:
+        """
+        Locate the worksheet and shared string parts through the workbook relationships.
+
+        Returns:
+            Tuple containing:
+            - Dictionary of worksheet paths keyed by sheet name, in workbook order
+            - Path of the shared string table, or None if the workbook has none
+        """
+        workbook_path = "xl/workbook.xml"
+        for relationship in self._read_relationships("_rels/.rels", ""):
+            if relationship["Type"].endswith("/officeDocument"):
+                workbook_path = relationship["Target"]
+
+        workbook_dir = posixpath.dirname(workbook_path)
+        relationships_path = posixpath.join(
+            workbook_dir, "_rels", f"{posixpath.basename(workbook_path)}.rels"
+        )
+        targets = {}
+        shared_strings_path = None
+        for relationship in self._read_relationships(relationships_path, workbook_dir):
+            targets[relationship["Id"]] = relationship["Target"]
+            if relationship["Type"].endswith("/sharedStrings"):
+                shared_strings_path = relationship["Target"]
+
+        sheet_paths = {}
+        for element in fromstring(self._archive.read(workbook_path)).iter():
+            if _local_name(element.tag) == "sheet":
+                relationship_id = next(
+                    value for key, value in element.items() if _local_name(key) == "id"
+                )
+                sheet_paths[element.get("name")] = targets[relationship_id]
+
+        return sheet_paths, shared_strings_path
+
+    def _read_relationships(self, path: str, base_dir: str) -> List[Dict[str, str]]:
+        if path not in self._archive.namelist():
+            return []
+
+        relationships = []
+        for element in fromstring(self._archive.read(path)):
+            relationship = dict(element.items())
+            target = relationship.get("Target", "")
+            if target.startswith("/"):
+                target = target.lstrip("/")
+            else:
+                target = posixpath.normpath(posixpath.join(base_dir, target))
+            relationship["Target"] = target
+            relationship.setdefault("Type", "")
+            relationships.append(relationship)
+        return relationships
+
+    def _iter_rows(self, sheet_path: str) -> Iterator[List[tuple]]:
+        """
+        Parse a worksheet row by row.
+
+        A row's cell elements are only valid until the next row is requested.
+
+        Args:
+            sheet_path (str): Path of the worksheet inside the archive.
+
+        Yields:
+            List[tuple]: (column letter, cell element, namespace) for each cell of a row.
+        """
+        with self._archive.open(sheet_path) as source:
+            row_tag = None
+            namespace = ""
+            for _, element in iterparse(source):
+                if row_tag is None:
+                    # Every element of a worksheet shares the namespace of the first one parsed
+                    if "}" in element.tag:
+                        namespace = element.tag[: element.tag.index("}") + 1]
+                    row_tag = f"{namespace}row"
+                if element.tag != row_tag:
+                    continue
+
+                row = []
+                for position, cell in enumerate(element):
+                    reference = cell.get("r")
+                    column = (
+                        reference.rstrip(_ROW_NUMBER_DIGITS)
+                        if reference
+                        else _column_letters(position)
+                    )
+                    row.append((column, cell, namespace))
+
+                yield row
+                element.clear()
+
+    def _cell_value(self, cell: Element, namespace: str) -> Any:
+        cell_type = cell.get("t", "n")
+        if cell_type == "inlineStr":
+            inline_string = cell.find(f"{namespace}is")
+            value = (
+                self._inline_string_text(inline_string, namespace)
+                if inline_string is not None
+                else None
+            )
+        else:
+            value_element = cell.find(f"{namespace}v")
+            value = self._convert_value(
+                cell_type, value_element.text if value_element is not None else None
+            )
+        return _clean_value(value)
+
+    def _convert_value(self, cell_type: str, text: Optional[str]) -> Any:
+        if text is None:
+            return None
+        if cell_type == "s":
+            return self._shared_string(int(text))
+        if cell_type == "n":
+            if "." in text or "E" in text or "e" in text:
+                return float(text)
+            return int(text)
+        if cell_type == "b":
+            return text == "1"
+        return text
+
+    def _shared_string(self, index: int) -> str:
+        value = self._shared_strings.get(index)
+        if value is None:
+            raw_value = self._load_raw_shared_strings()[index]
+            if b"rPh" in raw_value:
+                raw_value = _PHONETIC_RUN.sub(b"", raw_value)
+            value = _decode_text(b"".join(_SHARED_STRING_TEXT.findall(raw_value)))
+            if len(raw_value) <= _SHARED_STRING_CACHE_MAX_BYTES:
+                self._shared_strings[index] = value
+        return value
+
+    def _load_raw_shared_strings(self) -> "_RawSharedStrings":
+        if self._raw_shared_strings is None:
+            data = (
+                self._archive.read(self._shared_strings_path)
+                if self._shared_strings_path is not None
+                else b""
+            )
+            self._raw_shared_strings = _RawSharedStrings(data)
+        return self._raw_shared_strings
+
+    @staticmethod
+    def _inline_string_text(inline_string: Element, namespace: str) -> str:
+        phonetic_tag = f"{namespace}rPh"
+        text_tag = f"{namespace}t"
+        texts = []
+        for child in inline_string:
+            if child.tag == text_tag:
+                texts.append(child.text or "")
+            elif child.tag != phonetic_tag:
+                texts.extend(run.text or "" for run in child.iter(text_tag))
+        return _unescape_characters("".join(texts))
+
+
+class _RawSharedStrings:
+    """
+    The raw XML of each entry of a shared string table, sliced from the table on demand
+    rather than split into one bytes object per string up front. Every entry ends where
+    the next one starts, and the last one where the table closes, so an entry holds the
+    same bytes wherever it is in the table.
+    """
+
+    __slots__ = ("data", "starts", "ends")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.starts = array("Q")
+        self.ends = array("Q")
+        for match in _SHARED_STRING_SPLIT.finditer(data):
+            if self.starts:
+                self.ends.append(match.start())
+            self.starts.append(match.end())
+        if self.starts:
+            self.ends.append(max(data.rfind(b"</"), self.starts[-1]))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.data[self.starts[index] : self.ends[index]]
+
+
+def _local_name(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _column_letters(position: int) -> str:
+    letters = ""
+    position += 1
+    while position:
+        position, remainder = divmod(position - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def _decode_text(raw_text: bytes) -> str:
+    text = raw_text.decode("utf-8")
+    if "&" in text:
+        text = html.unescape(text)
+    return _unescape_characters(text)
+
+
+def _unescape_characters(text: str) -> str:
+    # Excel escapes control characters as _xHHHH_
+    if "_x" in text:
+        text = _ESCAPED_CHARACTER.sub(lambda match: chr(int(match.group(1), 16)), text)
+    return text
+
+
+def _clean_value(value: Any) -> Any:
+    if isinstance(value, str) and value in NA_VALUES:
+        return None
+    return value
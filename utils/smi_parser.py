@@ -0,0 +1,357 @@
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+# Bump whenever the compiled form of a module changes, so cached modules are recompiled
+COMPILED_FORMAT_VERSION = 1
+
+# Macros whose invocations assign an OID to a name
+OID_MACROS = frozenset(
+    {
+        "MODULE-IDENTITY",
+        "OBJECT-IDENTITY",
+        "OBJECT-TYPE",
+        "NOTIFICATION-TYPE",
+        "TRAP-TYPE",
+        "OBJECT-GROUP",
+        "NOTIFICATION-GROUP",
+        "MODULE-COMPLIANCE",
+        "AGENT-CAPABILITIES",
+    }
+)
+
+# ASN.1 comments run from "--" to the next "--" or the end of the line. Comments are
+# matched before strings, and strings before everything else, so a "--" inside a
+# DESCRIPTION is not a comment and a quote inside a comment does not open a string
+_TOKEN = re.compile(
+    r"""
+    (?P<comment>--.*?(?:--|$))
+    | (?P<string>"[^"]*")
+    | (?P<assign>::=)
+    | (?P<range>\.\.)
+    | (?P<binary>'[^']*'[HhBb])
+    | (?P<word>[A-Za-z](?:-?[A-Za-z0-9_])*)
+    | (?P<number>-?[0-9]+)
+    | (?P<space>\s+)
+    | (?P<symbol>.)
+    """,
+    re.VERBOSE | re.MULTILINE,
+)
+_SKIPPED_TOKENS = frozenset({"comment", "space"})
+
+# First component of an OID value is a name or a number, the others are numbers
+OIDValue = Tuple[Union[str, int], ...]
+
+
+class SMIError(Exception):
+    """Raised when a MIB file cannot be parsed or its OIDs cannot be resolved."""
+
+    pass
+
+
+class MIBDefinition:
+    """
+    A name assigned an OID in a MIB module, with the clauses the MIB sheet carries.
+    """
+
+    __slots__ = ("name", "macro", "oid", "syntax", "access", "description", "is_row")
+
+    def __init__(
+        self,
+        name: str,
+        macro: str,
+        oid: OIDValue,
+        syntax: Optional[str] = None,
+        access: Optional[str] = None,
+        description: Optional[str] = None,
+        is_row: bool = False,
+    ):
+        """
+        Args:
+            name (str): Name of the definition.
+            macro (str): "OBJECT IDENTIFIER" or the macro it is defined with, e.g. "OBJECT-TYPE".
+            oid (OIDValue): Unresolved OID value, e.g. ("ifEntry", 1).
+            syntax (Optional[str]): SYNTAX of an OBJECT-TYPE, without its constraints.
+            access (Optional[str]): MAX-ACCESS, or ACCESS in SMIv1, of an OBJECT-TYPE.
+            description (Optional[str]): DESCRIPTION with the indentation of its lines removed.
+            is_row (bool): Whether the definition is a conceptual row, i.e. has an INDEX
+                or AUGMENTS clause.
+        """
+        self.name = name
+        self.macro = macro
+        self.oid = oid
+        self.syntax = syntax
+        self.access = access
+        self.description = description
+        self.is_row = is_row
+
+
+class CompiledModule:
+    """
+    The compiled form of a MIB module: its imports and OID definitions, with the OIDs
+    still relative to their parent names. Resolving them needs the imported modules.
+    """
+
+    __slots__ = ("name", "imports", "definitions")
+
+    def __init__(self, name: str):
+        self.name = name
+        # Imported symbol -> name of the module it is imported from
+        self.imports: Dict[str, str] = {}
+        self.definitions: Dict[str, MIBDefinition] = {}
+
+
+def compile_mib_file(path: str) -> List[CompiledModule]:
+    """
+    Compile the MIB modules of an SMIv1 or SMIv2 text file.
+
+    Args:
+        path (str): Path to the MIB file.
+
+    Returns:
+        List[CompiledModule]: The modules defined in the file, usually one.
+
+    Raises:
+        SMIError: If the file is not valid SMI.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        # Vendor MIBs are often Latin-1, which decodes any byte sequence
+        text = data.decode("latin-1")
+    return compile_mib_text(text, path)
+
+
+def compile_mib_text(text: str, source: str = "<string>") -> List[CompiledModule]:
+    return _Parser(text, source).parse_modules()
+
+
+class _Parser:
+    def __init__(self, text: str, source: str):
+        self.text = text
+        self.source = source
+        self.tokens = [
+            (match.group(), match.start())
+            for match in _TOKEN.finditer(text)
+            if match.lastgroup not in _SKIPPED_TOKENS
+        ]
+        self.position = 0
+
+    def peek(self, offset: int = 0) -> Optional[str]:
+        index = self.position + offset
+        return self.tokens[index][0] if index < len(self.tokens) else None
+
+    def next(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise self.error("unexpected end of file")
+        self.position += 1
+        return token
+
+    def expect(self, expected: str) -> None:
+        token = self.next()
+        if token != expected:
+            self.position -= 1
+            raise self.error(f"expected '{expected}', found '{token}'")
+
+    def error(self, message: str) -> SMIError:
+        offset = self.tokens[min(self.position, len(self.tokens) - 1)][1] if self.tokens else 0
+        line = self.text.count("\n", 0, offset) + 1
+        return SMIError(f"{self.source}:{line}: {message}")
+
+    def parse_modules(self) -> List[CompiledModule]:
+        modules = []
+        while self.peek() is not None:
+            if self.peek(1) == "DEFINITIONS":
+                modules.append(self.parse_module())
+            else:
+                # Anything outside a module, e.g. a vendor banner, is ignored
+                self.position += 1
+        return modules
+
+    def parse_module(self) -> CompiledModule:
+        module = CompiledModule(self.next())
+        # Skip DEFINITIONS and any tagging default, e.g. "IMPLICIT TAGS"
+        while self.next() != "::=":
+            pass
+        self.expect("BEGIN")
+
+        while True:
+            token = self.peek()
+            if token is None:
+                raise self.error(f"missing END of module {module.name}")
+
+            if token == "END":
+                self.position += 1
+                return module
+            if token == "IMPORTS":
+                self.parse_imports(module)
+            elif token == "EXPORTS":
+                self.skip_past(";")
+            elif self.peek(1) == "MACRO":
+                # Macro definitions, e.g. in SNMPv2-SMI, describe notation, not OIDs
+                self.skip_past("END")
+            elif self.peek(1) == "::=":
+                self.position += 2
+                self.parse_type_assignment()
+            elif self.peek(1) == "OBJECT" and self.peek(2) == "IDENTIFIER":
+                self.position += 3
+                self.expect("::=")
+                self.add(module, MIBDefinition(token, "OBJECT IDENTIFIER", self.parse_oid_value()))
+            elif self.peek(1) in OID_MACROS:
+                self.add(module, self.parse_macro())
+            elif token[0].islower():
+                # Any other value assignment, e.g. "maxValue INTEGER ::= 255"
+                self.skip_past("::=")
+                self.skip_value()
+            else:
+                raise self.error(f"unexpected '{token}'")
+
+    @staticmethod
+    def add(module: CompiledModule, definition: MIBDefinition) -> None:
+        module.definitions[definition.name] = definition
+
+    def parse_imports(self, module: CompiledModule) -> None:
+        self.position += 1
+        symbols = []
+        while True:
+            token = self.next()
+            if token == ";":
+                break
+            if token == "FROM":
+                imported_from = self.next()
+                for symbol in symbols:
+                    module.imports[symbol] = imported_from
+                symbols = []
+            elif token != ",":
+                symbols.append(token)
+
+        if symbols:
+            raise self.error(f"imports of {module.name} without a FROM clause")
+
+    def parse_type_assignment(self) -> str:
+        if self.peek() == "TEXTUAL-CONVENTION":
+            # Clauses before SYNTAX only hold words and strings
+            self.skip_past("SYNTAX")
+        return self.parse_type()
+
+    def parse_type(self) -> str:
+        """
+        Parse a type, e.g. "INTEGER { up(1), down(2) }" or "OCTET STRING (SIZE (0..255))".
+
+        Returns:
+            str: The type without its tag, named numbers or constraints, e.g. "INTEGER",
+                "OCTET STRING" or "SEQUENCE OF IfEntry".
+        """
+        if self.peek() == "[":
+            self.skip_group("[", "]")
+        if self.peek() in ("IMPLICIT", "EXPLICIT"):
+            self.position += 1
+
+        token = self.next()
+        if token == "SEQUENCE" and self.peek() == "OF":
+            self.position += 1
+            syntax = f"SEQUENCE OF {self.next()}"
+        elif (token, self.peek()) in (("OCTET", "STRING"), ("OBJECT", "IDENTIFIER")):
+            syntax = f"{token} {self.next()}"
+        else:
+            syntax = token
+
+        # SEQUENCE and CHOICE members, named numbers and BITS, then constraints
+        if self.peek() == "{":
+            self.skip_group("{", "}")
+        if self.peek() == "(":
+            self.skip_group("(", ")")
+        return syntax
+
+    def parse_macro(self) -> MIBDefinition:
+        name = self.next()
+        macro = self.next()
+        definition = MIBDefinition(name, macro, ())
+        enterprise: OIDValue = ()
+
+        while self.peek() != "::=":
+            token = self.next()
+            if token == "{":
+                # INDEX, OBJECTS, DEFVAL and the like
+                self.position -= 1
+                self.skip_group("{", "}")
+            elif token == "SYNTAX" and macro == "OBJECT-TYPE" and definition.syntax is None:
+                definition.syntax = self.parse_type()
+            elif token in ("MAX-ACCESS", "ACCESS") and definition.access is None:
+                definition.access = self.next()
+            elif token == "DESCRIPTION" and definition.description is None:
+                definition.description = self.parse_string()
+            elif token in ("INDEX", "AUGMENTS"):
+                definition.is_row = True
+            elif token == "ENTERPRISE":
+                enterprise = (
+                    self.parse_oid_value() if self.peek() == "{" else (self.next(),)
+                )
+
+        self.expect("::=")
+        if macro == "TRAP-TYPE":
+            # SMIv1 traps are numbered below their enterprise, as SMIv2 maps them
+            definition.oid = enterprise + (0, self.parse_number())
+        else:
+            definition.oid = self.parse_oid_value()
+        return definition
+
+    def parse_oid_value(self) -> OIDValue:
+        self.expect("{")
+        components: List[Union[str, int]] = []
+        while self.peek() != "}":
+            token = self.next()
+            if self.peek() == "(":
+                # A named number, e.g. "org(3)"
+                self.position += 1
+                components.append(self.parse_number())
+                self.expect(")")
+            elif token.isdigit():
+                components.append(int(token))
+            elif not components:
+                components.append(token)
+            else:
+                raise self.error(f"unexpected '{token}' in OID value")
+        self.position += 1
+
+        if not components:
+            raise self.error("empty OID value")
+        return tuple(components)
+
+    def parse_number(self) -> int:
+        token = self.next()
+        if not token.isdigit():
+            self.position -= 1
+            raise self.error(f"expected a number, found '{token}'")
+        return int(token)
+
+    def parse_string(self) -> Optional[str]:
+        token = self.next()
+        if not token.startswith('"'):
+            self.position -= 1
+            raise self.error(f"expected a string, found '{token}'")
+        # Lines keep their breaks, so paragraphs stay apart, but lose their indentation
+        description = "\n".join(line.strip() for line in token[1:-1].splitlines()).strip()
+        return description or None
+
+    def skip_value(self) -> None:
+        if self.peek() == "{":
+            self.skip_group("{", "}")
+        else:
+            self.next()
+
+    def skip_past(self, token: str) -> None:
+        while self.next() != token:
+            pass
+
+    def skip_group(self, opening: str, closing: str) -> None:
+        self.expect(opening)
+        depth = 1
+        while depth:
+            token = self.next()
+            if token == opening:
+                depth += 1
+            elif token == closing:
+                depth -= 1
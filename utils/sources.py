@@ -0,0 +1,343 @@
+import abc
+import csv
+import glob
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from utils.sheet_reader import NA_VALUES, SheetReader
+
+# Sheet held by the file a single-table source is opened from. Its other sheets are
+# companion files named after it, e.g. "device.SNMP Items.csv" next to "device.csv"
+MAIN_SHEET = "MIB Data"
+
+
+class TableSource(abc.ABC):
+    """
+    A read-only source of sheets made of one file per sheet, in a single-table format.
+
+    The source is opened from the file holding the MIB Data sheet. Every file next to
+    it named "<stem>.<sheet name><extension>" holds another sheet, e.g. "SNMP Items".
+    Sheets are only read when they are requested, and only the requested columns are
+    kept. Rows are returned as dictionaries, exactly as SheetReader returns them.
+    read_records reads a sheet a column at a time, which is fastest, while iter_records
+    streams it row by row to keep memory low.
+    """
+
+    EXTENSIONS: Sequence[str] = ()
+
+    def __init__(self, path: str):
+        self.path = path
+        stem, extension = os.path.splitext(path)
+        self._sheet_paths = {MAIN_SHEET: path}
+        pattern = f"{glob.escape(stem)}.*{glob.escape(extension)}"
+        for sheet_path in sorted(glob.glob(pattern)):
+            sheet_name = sheet_path[len(stem) + 1 : -len(extension)]
+            self._sheet_paths.setdefault(sheet_name, sheet_path)
+
+    def __enter__(self) -> "TableSource":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self._sheet_paths)
+
+    def read_records(
+        self, sheet_name: str, columns: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Read the rows of a sheet as dictionaries.
+
+        Args:
+            sheet_name (str): Name of the sheet to read.
+            columns (Optional[Sequence[str]]): Columns to keep. Requested columns that are
+                missing from the sheet are filled with None. All columns are kept if omitted.
+
+        Returns:
+            List[Dict[str, Any]]: One dictionary per non-empty row.
+        """
+        header, column_values = self._read_columns(self._sheet_paths[sheet_name], columns)
+        wanted = [name for name in header if columns is None or name in columns]
+        missing_columns = [name for name in columns or () if name not in wanted]
+
+        # Values are cleaned and zipped into records a column at a time, which is several
+        # times faster than a loop over the cells
+        cleaned_columns = [
+            [
+                None if value.__class__ is str and value in NA_VALUES else value
+                for value in column_values[name]
+            ]
+            for name in wanted
+        ]
+        width = len(wanted)
+        records = [
+            dict(zip(wanted, values))
+            for values in zip(*cleaned_columns)
+            if values.count(None) != width
+        ]
+        if missing_columns:
+            for record in records:
+                record.update(dict.fromkeys(missing_columns))
+        return records
+
+    def iter_records(
+        self, sheet_name: str, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the rows of a sheet as dictionaries, without holding the whole sheet.
+
+        Args:
+            sheet_name (str): Name of the sheet to read.
+            columns (Optional[Sequence[str]]): Columns to keep. Requested columns that are
+                missing from the sheet are filled with None. All columns are kept if omitted.
+
+        Yields:
+            Dict[str, Any]: One dictionary per non-empty row.
+        """
+        if columns is None:
+            # Every row has to be seen to know the columns of some formats
+            yield from self.read_records(sheet_name)
+            return
+
+        width = len(columns)
+        for values in self._iter_rows(self._sheet_paths[sheet_name], columns):
+            values = [
+                None if value.__class__ is str and value in NA_VALUES else value
+                for value in values
+            ]
+            if values.count(None) != width:
+                yield dict(zip(columns, values))
+
+    def sheet_digest(self, sheet_name: str) -> str:
+        """
+        Hash the contents of a sheet.
+
+        Args:
+            sheet_name (str): Name of the sheet to hash.
+
+        Returns:
+            str: Hex digest of the sheet's file.
+        """
+        digest = hashlib.sha256()
+        with open(self._sheet_paths[sheet_name], "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @abc.abstractmethod
+    def _read_columns(
+        self, path: str, columns: Optional[Sequence[str]]
+    ) -> Tuple[List[str], Dict[str, List[Any]]]:
+        """
+        Read the columns of a sheet's file.
+
+        Args:
+            path (str): Path of the sheet's file.
+            columns (Optional[Sequence[str]]): Columns to read, if the format can skip
+                the others. All columns are read if omitted.
+
+        Returns:
+            Tuple containing:
+            - List of the sheet's column names, in file order
+            - Dictionary of the values of at least the requested columns, keyed by name
+        """
+
+    @abc.abstractmethod
+    def _iter_rows(self, path: str, columns: Sequence[str]) -> Iterator[Tuple[Any, ...]]:
+        """
+        Stream the values of some columns of a sheet's file, row by row.
+
+        Args:
+            path (str): Path of the sheet's file.
+            columns (Sequence[str]): Columns to read.
+
+        Yields:
+            Tuple[Any, ...]: The values of a row, in the order of columns, with None for
+                the columns missing from the file.
+        """
+
+
+class CSVSource(TableSource):
+    """
+    Sheets stored as CSV files with a header row. Every value is read as a string.
+    """
+
+    EXTENSIONS = (".csv",)
+
+    def _read_columns(
+        self, path: str, columns: Optional[Sequence[str]]
+    ) -> Tuple[List[str], Dict[str, List[Any]]]:
+        # utf-8-sig drops the byte order mark Excel writes at the start of CSV exports
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            positions = {
+                name: position
+                for position, name in enumerate(header)
+                if name and (columns is None or name in columns)
+            }
+            rows = [row for row in reader if row]
+
+        column_values = {
+            name: [row[position] if position < len(row) else None for row in rows]
+            for name, position in positions.items()
+        }
+        return [name for name in header if name], column_values
+
+    def _iter_rows(self, path: str, columns: Sequence[str]) -> Iterator[Tuple[Any, ...]]:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            positions = {name: position for position, name in enumerate(header) if name}
+            wanted = [positions.get(name) for name in columns]
+            for row in reader:
+                if row:
+                    yield tuple(
+                        row[position]
+                        if position is not None and position < len(row)
+                        else None
+                        for position in wanted
+                    )
+
+
+class JSONLinesSource(TableSource):
+    """
+    Sheets stored as JSON Lines files, one JSON object per row. Keys missing from a row
+    are read as None, and the columns are the keys of every row, in order of appearance.
+    """
+
+    EXTENSIONS = (".jsonl", ".ndjson")
+
+    def _read_columns(
+        self, path: str, columns: Optional[Sequence[str]]
+    ) -> Tuple[List[str], Dict[str, List[Any]]]:
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+        header = list(dict.fromkeys(name for row in rows for name in row))
+        column_values = {
+            name: [row.get(name) for row in rows]
+            for name in header
+            if columns is None or name in columns
+        }
+        return header, column_values
+
+    def _iter_rows(self, path: str, columns: Sequence[str]) -> Iterator[Tuple[Any, ...]]:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield tuple(row.get(name) for name in columns)
+
+
+class ParquetSource(TableSource):
+    """
+    Sheets stored as Parquet files. Only the requested columns are decoded.
+
+    Reading Parquet requires pyarrow, which is imported on first use.
+    """
+
+    EXTENSIONS = (".parquet",)
+
+    def _read_columns(
+        self, path: str, columns: Optional[Sequence[str]]
+    ) -> Tuple[List[str], Dict[str, List[Any]]]:
+        parquet_file = self._open(path)
+        header = parquet_file.schema_arrow.names
+        read_columns = [name for name in header if columns is None or name in columns]
+        table = parquet_file.read(columns=read_columns)
+        column_values = {
+            name: table.column(name).to_pylist() for name in read_columns
+        }
+        return header, column_values
+
+    def _iter_rows(self, path: str, columns: Sequence[str]) -> Iterator[Tuple[Any, ...]]:
+        parquet_file = self._open(path)
+        header = parquet_file.schema_arrow.names
+        read_columns = [name for name in columns if name in header]
+        # Row groups are decoded in batches, so only one batch is held at a time
+        for batch in parquet_file.iter_batches(batch_size=4096, columns=read_columns):
+            batch_values = {
+                name: batch.column(name).to_pylist() for name in read_columns
+            }
+            yield from zip(
+                *(
+                    batch_values[name] if name in batch_values else [None] * batch.num_rows
+                    for name in columns
+                )
+            )
+
+    @staticmethod
+    def _open(path: str) -> Any:
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError(
+                "Reading Parquet files requires pyarrow: pip install pyarrow"
+            ) from None
+        return pyarrow.parquet.ParquetFile(path)
+
+
+# Every source offers the sheet_names, read_records, iter_records and sheet_digest of
+# SheetReader
+Source = Union[SheetReader, TableSource]
+
+SOURCES = {
+    ".xlsx": SheetReader,
+    **{
+        extension: source
+        for source in (CSVSource, JSONLinesSource, ParquetSource)
+        for extension in source.EXTENSIONS
+    },
+}
+
+
+def open_source(path: str) -> Source:
+    """
+    Open the sheets of a workbook, or of a single-table source, picked by file extension.
+
+    Args:
+        path (str): Path to an .xlsx workbook, or to the MIB Data file of a CSV, JSON Lines
+            or Parquet source.
+
+    Returns:
+        Source: The source, to be used as a context manager.
+
+    Raises:
+        ValueError: If the file extension is not supported.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SOURCES:
+        raise ValueError(
+            f"Unsupported file type '{extension}' for '{path}', expected one of "
+            f"{', '.join(SOURCES)}"
+        )
+    return SOURCES[extension](path)
+
+
+def is_companion_file(path: str) -> bool:
+    """
+    Check whether a file holds a sheet of another file's source, e.g. "device.SNMP
+    Items.csv" next to "device.csv".
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        bool: Whether the file is a companion sheet file rather than a source itself.
+    """
+    stem, extension = os.path.splitext(path)
+    main_stem = os.path.splitext(stem)[0]
+    return (
+        extension.lower() in SOURCES
+        and extension.lower() != ".xlsx"
+        and main_stem != stem
+        and os.path.isfile(f"{main_stem}{extension}")
+    )
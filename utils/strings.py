@@ -0,0 +1,15 @@
+import sys
+from typing import Any
+
+
+def intern_string(value: Any) -> Any:
+    """
+    Intern a string so that equal values repeated across many objects share one copy.
+
+    Args:
+        value (Any): Value to intern. Anything other than a string is returned as is.
+
+    Returns:
+        Any: The interned string, or the value unchanged.
+    """
+    return sys.intern(value) if isinstance(value, str) else value
@@ -0,0 +1,41 @@
+import uuid
+
+from utils.config import UUID
+
+_deterministic = False
+
+
+def set_deterministic(enabled: bool) -> None:
+    """
+    Switch between random UUIDs and UUIDs derived from the objects they identify.
+
+    Args:
+        enabled (bool): Derive UUIDs deterministically instead of generating random ones.
+    """
+    global _deterministic
+    _deterministic = enabled
+
+
+def is_deterministic() -> bool:
+    return _deterministic
+
+
+def generate_uuid(*parts: str) -> str:
+    """
+    Generate the UUID of a Zabbix object.
+
+    In deterministic mode the UUID is a UUIDv5 of the given parts, so the same object in
+    the same template always gets the same UUID. Zabbix only imports version 4 UUIDs, so
+    the version and variant bits of the derived UUID are set to those of a UUIDv4.
+
+    Args:
+        *parts (str): Values identifying the object, such as the template name and item key.
+
+    Returns:
+        str: UUID as 32 hexadecimal characters.
+    """
+    if not _deterministic:
+        return uuid.uuid4().hex
+
+    derived = uuid.uuid5(uuid.UUID(UUID.NAMESPACE), "\n".join(parts))
+    return uuid.UUID(bytes=derived.bytes, version=4).hex
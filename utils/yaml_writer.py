@@ -0,0 +1,438 @@
+import functools
+import io
+import itertools
+import re
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+)
+
+import yaml
+
+# Manifests are only used by incremental runs, see _write_list
+if TYPE_CHECKING:
+    from utils.manifest import TemplateManifest
+
+# libyaml's emitter is several times faster than the pure-Python one. Both produce the
+# same text except for long double-quoted scalars, which they wrap at different points
+C_DUMPER = getattr(yaml, "CSafeDumper", None)
+PYTHON_DUMPER = yaml.SafeDumper
+LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# A string matching this has to be double-quoted: it holds characters outside printable
+# ASCII, or a line break next to a space, which a single-quoted scalar cannot represent
+_DOUBLE_QUOTED_STRING = re.compile(r"[^\n\x20-\x7e]|\n | \n")
+
+# Number of objects rendered per emitter call. Larger chunks amortize the emitter setup
+# at the cost of holding more rendered text at once
+CHUNK_SIZE = 256
+
+_TEMPLATES_MARKER = "__yaml_writer_templates__"
+_TEMPLATES_LINE = "  templates:\n"
+_ITEMS_MARKER = "__yaml_writer_items__"
+_DISCOVERY_RULES_MARKER = "__yaml_writer_discovery_rules__"
+
+
+def write_template_yaml(
+    template: Any,
+    stream: TextIO,
+    include_items: bool = True,
+    include_traps: bool = True,
+    include_discovery_rules: bool = True,
+    manifest: Optional["TemplateManifest"] = None,
+) -> int:
+    """
+    Stream the YAML representation of a template and its components to a file.
+
+    Items, traps and discovery rules are rendered and written a chunk at a time, so the
+    YAML dictionaries and text of the whole template never exist in memory at once. The
+    output is the same as dumping the complete template dictionary in one go.
+
+    Args:
+        template (Template): The Template object to convert to YAML.
+        stream (TextIO): Text stream the YAML is written to.
+        include_items (bool): Whether to include SNMP items in the YAML.
+        include_traps (bool): Whether to include SNMP traps in the YAML.
+        include_discovery_rules (bool): Whether to include discovery rules in the YAML.
+        manifest (Optional[TemplateManifest]): Manifest the YAML of newly built objects is
+            recorded in. Fragments reused from it are written as they are.
+
+    Returns:
+        int: Number of items, traps and discovery rules written.
+    """
+    return write_export_yaml(
+        [template],
+        stream,
+        include_items,
+        include_traps,
+        include_discovery_rules,
+        [manifest],
+    )
+
+
+def write_export_yaml(
+    templates: Sequence[Any],
+    stream: TextIO,
+    include_items: bool = True,
+    include_traps: bool = True,
+    include_discovery_rules: bool = True,
+    manifests: Optional[Sequence[Optional["TemplateManifest"]]] = None,
+) -> int:
+    """
+    Stream one zabbix_export document holding several templates, so they are imported
+    into Zabbix at once. Template groups shared by several templates are exported once.
+
+    Args:
+        templates (Sequence[Template]): The Template objects to convert to YAML.
+        stream (TextIO): Text stream the YAML is written to.
+        include_items (bool): Whether to include SNMP items in the YAML.
+        include_traps (bool): Whether to include SNMP traps in the YAML.
+        include_discovery_rules (bool): Whether to include discovery rules in the YAML.
+        manifests (Optional[Sequence[Optional[TemplateManifest]]]): Manifest of each
+            template, see write_template_yaml.
+
+    Returns:
+        int: Number of items, traps and discovery rules written.
+    """
+    template_yamls = [template.generate_yaml_dict() for template in templates]
+    stream.write(
+        _export_header(
+            template_yamls[0]["zabbix_export"]["version"],
+            [
+                group
+                for template_yaml in template_yamls
+                for group in template_yaml["zabbix_export"]["template_groups"]
+            ],
+        )
+    )
+
+    written = 0
+    for template, template_yaml, manifest in zip(
+        templates, template_yamls, manifests or itertools.repeat(None)
+    ):
+        written += _write_template_entry(
+            template,
+            template_yaml,
+            stream,
+            include_items,
+            include_traps,
+            include_discovery_rules,
+            manifest,
+        )
+    return written
+
+
+def render_template_entry(
+    template: Any, manifest: Optional["TemplateManifest"] = None
+) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Render a template as an entry of the templates list of an export, see write_export_files.
+
+    Args:
+        template (Template): The Template object to render.
+        manifest (Optional[TemplateManifest]): Manifest of the template.
+
+    Returns:
+        Tuple containing:
+        - The template groups the template belongs to
+        - The YAML of the template's entry
+    """
+    template_yaml = template.generate_yaml_dict()
+    stream = io.StringIO()
+    _write_template_entry(template, template_yaml, stream, True, True, True, manifest)
+    return template_yaml["zabbix_export"]["template_groups"], stream.getvalue()
+
+
+def read_template_entries(path: str) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Read the templates of an export file written by this module as an entry of another
+    export, without parsing the templates themselves.
+
+    Args:
+        path (str): Path of the export file.
+
+    Returns:
+        Tuple containing:
+        - The template groups of the export
+        - The YAML of the entries of its templates list
+
+    Raises:
+        ValueError: If the file is not a template export.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    # Nested lines are indented further, so this only matches the export's own key
+    header, templates_line, entries = text.partition(f"\n{_TEMPLATES_LINE}")
+    if not templates_line or not header.startswith("zabbix_export:"):
+        raise ValueError(f"'{path}' is not a Zabbix template export")
+
+    export = yaml.load(header, Loader=LOADER)["zabbix_export"]
+    return export.get("template_groups") or [], entries
+
+
+def write_export_files(
+    entries: Iterable[Tuple[List[Dict[str, Any]], str]],
+    path_for: Callable[[int], str],
+    max_bytes: Optional[int] = None,
+    max_templates: Optional[int] = None,
+    version: str = "7.0",
+) -> List[str]:
+    """
+    Write template entries into as few export files as the size limits allow, each a
+    complete zabbix_export document with the template groups of its templates.
+
+    Only the entries of one file are held in memory at a time.
+
+    Args:
+        entries (Iterable[Tuple[List[Dict[str, Any]], str]]): Template groups and YAML
+            of each template, from render_template_entry or read_template_entries.
+        path_for (Callable[[int], str]): Path of the n-th file, counting from 1.
+        max_bytes (Optional[int]): Size of the templates a file holds at most. A template
+            larger than that gets a file of its own.
+        max_templates (Optional[int]): Number of templates a file holds at most.
+        version (str): Zabbix export format version.
+
+    Returns:
+        List[str]: Paths of the files written.
+    """
+    paths: List[str] = []
+    chunk: List[Tuple[List[Dict[str, Any]], str]] = []
+    chunk_bytes = 0
+
+    def write_chunk() -> None:
+        path = path_for(len(paths) + 1)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(_export_header(version, [group for groups, _ in chunk for group in groups]))
+            for _, text in chunk:
+                f.write(text)
+        paths.append(path)
+
+    for groups, text in entries:
+        entry_bytes = len(text.encode("utf-8"))
+        if chunk and (
+            (max_templates is not None and len(chunk) >= max_templates)
+            or (max_bytes is not None and chunk_bytes + entry_bytes > max_bytes)
+        ):
+            write_chunk()
+            chunk, chunk_bytes = [], 0
+        chunk.append((groups, text))
+        chunk_bytes += entry_bytes
+
+    if chunk:
+        write_chunk()
+    return paths
+
+
+def _export_header(version: str, template_groups: Iterable[Dict[str, Any]]) -> str:
+    """
+    Render the start of an export, up to and including the key of its templates list.
+
+    Args:
+        version (str): Zabbix export format version.
+        template_groups (Iterable[Dict[str, Any]]): Template groups of the templates.
+            Only the first group of each name is kept.
+
+    Returns:
+        str: The YAML of the export's version and template groups.
+    """
+    groups: Dict[Any, Dict[str, Any]] = {}
+    for group in template_groups:
+        groups.setdefault(group["name"], group)
+
+    header = {
+        "zabbix_export": {
+            "version": version,
+            "template_groups": list(groups.values()),
+            "templates": _TEMPLATES_MARKER,
+        }
+    }
+    return _dump(header, _pick_dumper(header)).replace(
+        f"{_TEMPLATES_LINE[:-1]} {_TEMPLATES_MARKER}\n", _TEMPLATES_LINE
+    )
+
+
+def _write_template_entry(
+    template: Any,
+    template_yaml: Dict[str, Any],
+    stream: TextIO,
+    include_items: bool,
+    include_traps: bool,
+    include_discovery_rules: bool,
+    manifest: Optional["TemplateManifest"],
+) -> int:
+    """
+    Stream a template as an entry of the templates list of an export.
+
+    Args:
+        template (Template): The Template object to convert to YAML.
+        template_yaml (Dict[str, Any]): The template's generate_yaml_dict.
+        stream (TextIO): Text stream the YAML is written to.
+        include_items (bool): Whether to include SNMP items in the YAML.
+        include_traps (bool): Whether to include SNMP traps in the YAML.
+        include_discovery_rules (bool): Whether to include discovery rules in the YAML.
+        manifest (Optional[TemplateManifest]): Manifest of the template.
+
+    Returns:
+        int: Number of items, traps and discovery rules written.
+    """
+    items = list(template.snmp_items or []) if include_items else []
+    if include_traps and template.snmp_traps:
+        items.extend(template.snmp_traps)
+    discovery_rules = (
+        template.discovery_rules or [] if include_discovery_rules else []
+    )
+
+    # The template skeleton is rendered once with markers where the streamed lists go
+    inner_yaml_structure = template_yaml["zabbix_export"]["templates"][0]
+    inner_yaml_structure["items"] = _ITEMS_MARKER if items else []
+    if discovery_rules:
+        inner_yaml_structure["discovery_rules"] = _DISCOVERY_RULES_MARKER
+
+    entry_yaml = {"zabbix_export": {"templates": [inner_yaml_structure]}}
+    skeleton = _dump(entry_yaml, _pick_dumper(entry_yaml))
+    skeleton = skeleton[len(f"zabbix_export:\n{_TEMPLATES_LINE}") :]
+    head, items_line, rest = skeleton.partition(f"items: {_ITEMS_MARKER}\n")
+    if not items_line:
+        head, rest = "", skeleton
+    middle, discovery_rules_line, tail = rest.partition(
+        f"discovery_rules: {_DISCOVERY_RULES_MARKER}\n"
+    )
+
+    written = 0
+    stream.write(head)
+    if items_line:
+        stream.write(items_line.replace(f" {_ITEMS_MARKER}", ""))
+        written += _write_list(stream, "items", items, manifest)
+    stream.write(middle)
+    if discovery_rules_line:
+        stream.write(discovery_rules_line.replace(f" {_DISCOVERY_RULES_MARKER}", ""))
+        written += _write_list(
+            stream, "discovery_rules", discovery_rules, manifest
+        )
+    stream.write(tail)
+
+    return written
+
+
+def _write_list(
+    stream: TextIO,
+    key: str,
+    zabbix_objects: Iterable[Any],
+    manifest: Optional["TemplateManifest"] = None,
+) -> int:
+    """
+    Write the entries of one of the template's lists, rendered at their final indentation.
+
+    Each chunk is dumped inside the same nesting it has in the complete document, so line
+    wrapping and indentation match, and the nesting lines are then dropped.
+
+    Args:
+        stream (TextIO): Text stream the YAML is written to.
+        key (str): Key of the list in the template.
+        zabbix_objects (Iterable[Any]): Objects with a generate_yaml_dict method, or
+            Fragments rendered on a previous run.
+        manifest (Optional[TemplateManifest]): Manifest each newly rendered entry is
+            recorded in.
+
+    Returns:
+        int: Number of objects written.
+    """
+    # Fragments are only reused from a manifest, so runs without one never import it
+    fragment_type: Any = ()
+    if manifest is not None:
+        from utils.manifest import Fragment
+
+        fragment_type = Fragment
+    pick_entry_dumper = functools.partial(
+        _pick_entry_dumper, fragment_type=fragment_type
+    )
+
+    nesting = _dump({"zabbix_export": {"templates": [{key: []}]}})
+    prefix = nesting[: -len(f"{key}: []\n")] + f"{key}:\n"
+
+    written = 0
+    for chunk in _chunks(zabbix_objects, CHUNK_SIZE):
+        chunk_yaml = [
+            (
+                zabbix_object,
+                None
+                if isinstance(zabbix_object, fragment_type)
+                else zabbix_object.generate_yaml_dict(),
+            )
+            for zabbix_object in chunk
+        ]
+
+        # Consecutive objects are grouped by the emitter that renders them identically
+        for dumper, group in itertools.groupby(chunk_yaml, key=pick_entry_dumper):
+            group = list(group)
+            if dumper is None:
+                stream.write("".join(fragment.text for fragment, _ in group))
+                continue
+
+            entries = [entry_yaml for _, entry_yaml in group]
+            text = _dump({"zabbix_export": {"templates": [{key: entries}]}}, dumper)
+            text = text[len(prefix):]
+            stream.write(text)
+
+            if manifest is not None:
+                for (zabbix_object, _), entry_text in zip(group, _split_entries(text)):
+                    manifest.record(zabbix_object, entry_text)
+        written += len(chunk_yaml)
+    return written
+
+
+def _split_entries(text: str) -> List[str]:
+    # Every entry starts with a dash at the list's indentation. Lines inside an entry,
+    # including wrapped scalars, are always indented further
+    entry_start = text[: text.index("- ") + 2]
+    entries = text[len(entry_start):].split(f"\n{entry_start}")
+    return [f"{entry_start}{entry}\n" for entry in entries[:-1]] + [
+        f"{entry_start}{entries[-1]}"
+    ]
+
+
+def _pick_entry_dumper(entry: tuple, fragment_type: Any) -> Any:
+    zabbix_object, entry_yaml = entry
+    if isinstance(zabbix_object, fragment_type):
+        return None
+    return _pick_dumper(entry_yaml)
+
+
+def _pick_dumper(data: Dict[str, Any]) -> Any:
+    if C_DUMPER is None or _needs_double_quotes(data):
+        return PYTHON_DUMPER
+    return C_DUMPER
+
+
+def _needs_double_quotes(value: Any) -> bool:
+    if isinstance(value, str):
+        return _DOUBLE_QUOTED_STRING.search(value) is not None
+    if isinstance(value, dict):
+        return any(_needs_double_quotes(item) for item in value.values())
+    if isinstance(value, list):
+        return any(_needs_double_quotes(item) for item in value)
+    return False
+
+
+def _chunks(values: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(values)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _dump(data: Dict[str, Any], dumper: Any = PYTHON_DUMPER) -> str:
+    return yaml.dump(
+        data,
+        Dumper=dumper,
+        default_flow_style=False,
+        sort_keys=False,
+    )
@@ -1,16 +1,30 @@
-import uuid
 from typing import Any, Dict, List
 
 from utils.config import DISCOVERY_RULE
+from utils.uuid_generator import generate_uuid
 from zabbix_objects.item_prototype import ItemPrototype
 from zabbix_objects.snmp_walk_item import SNMPWalkItem
 
 
 class DiscoveryRule:
+    __slots__ = (
+        "template_name",
+        "snmp_walk_items",
+        "master_item",
+        "item_prototypes",
+        "key",
+        "description",
+        "name",
+    )
+
+    type = DISCOVERY_RULE.TYPE
+
     def __init__(self, discovery_rule_table: List[Dict[str, Any]], template_name: str):
-        self.type = DISCOVERY_RULE.TYPE
+        self.template_name = template_name
 
-        self.snmp_walk_item = SNMPWalkItem(discovery_rule_table, template_name)
+        self.snmp_walk_items = SNMPWalkItem.generate_table_walk_items(
+            discovery_rule_table, template_name
+        )
         self.master_item = self.snmp_walk_item.key
         self.item_prototypes = self._generate_item_prototypes(
             self.master_item, discovery_rule_table
@@ -19,6 +33,15 @@ class DiscoveryRule:
         self.description = self._generate_description()
         self.name = self._generate_name()
 
+    @property
+    def snmp_walk_item(self) -> SNMPWalkItem:
+        """The first walk item of the table, which the discovery rule depends on."""
+        return self.snmp_walk_items[0]
+
+    @property
+    def item_prototype_count(self) -> int:
+        return len(self.item_prototypes)
+
     def _generate_name(self) -> str:
         name = self.snmp_walk_item.name
         return name.replace("Walk", "Discovery")
@@ -32,20 +55,31 @@ class DiscoveryRule:
 
     @classmethod
     def generate_discovery_rules(
-        cls, discovery_rule_table: Dict[str, List[Dict[str, Any]]], template_name: str
+        cls, discovery_rule_tables: List[List[Dict[str, Any]]], template_name: str
     ) -> List["DiscoveryRule"]:
         return [
             DiscoveryRule(table_data, template_name)
-            for _, table_data in discovery_rule_table.items()
+            for table_data in discovery_rule_tables
         ]
 
     def _generate_item_prototypes(
         self, master_item_key: str, discovery_rule_table: List[Dict[str, Any]]
     ) -> List[ItemPrototype]:
+        # Each column depends on the walk item polling it. Columns of tables split
+        # across several walk items are spread over them
+        walk_item_keys = (
+            {
+                oid: walk_item.key
+                for walk_item in self.snmp_walk_items[1:]
+                for oid in walk_item.oids
+            }
+            if len(self.snmp_walk_items) > 1
+            else None
+        )
         # Start at 2nd index in DiscoveryRuleTable b/c the 1st entry will always be the master item
-        return [
-            ItemPrototype(entry, master_item_key) for entry in discovery_rule_table[1:]
-        ]
+        return ItemPrototype.generate_item_prototypes(
+            discovery_rule_table[1:], master_item_key, walk_item_keys
+        )
 
     def generate_yaml_dict(self) -> Dict[str, Any]:
         discovery_rule_yaml = {
@@ -54,7 +88,7 @@ class DiscoveryRule:
             "master_item": {"key": self.master_item},
             "name": self.name,
             "type": self.type,
-            "uuid": uuid.uuid4().hex,
+            "uuid": generate_uuid(self.template_name, self.key),
         }
 
         item_prototype_yaml = [
@@ -1,82 +1,75 @@
-import re
-import uuid
 from typing import Any, Dict, List, Optional
 
 from utils.config import ITEM_PROTOTYPE
+from utils.derivation import DerivedFields, derive_item_prototype_fields
+from utils.strings import intern_string
+from utils.uuid_generator import generate_uuid
 
 
 class ItemPrototype:
-    def __init__(self, item_data: Dict[str, Any], master_item_key: str):
-        self.master_item = master_item_key
-        self.mib_module = item_data.get('MIB Module')
+    # Discovery rules create an item prototype per table column, so instances keep only
+    # the derived fields in slots and share the constants below through the class
+    __slots__ = (
+        'master_item',
+        'table_key',
+        'mib_module',
+        'oid',
+        'name',
+        'description',
+        'key',
+        'value_type',
+        'trends',
+    )
+
+    history = ITEM_PROTOTYPE.HISTORY
+    type = ITEM_PROTOTYPE.TYPE
+
+    def __init__(
+        self,
+        item_data: Dict[str, Any],
+        master_item_key: str,
+        derived: Optional[DerivedFields] = None,
+        walk_item_key: Optional[str] = None,
+    ):
+        """
+        Args:
+            item_data (Dict[str, Any]): MIB entry of the table column.
+            master_item_key (str): Key of the first walk item of the table, which the
+                prototype key and UUID derive from.
+            derived (Optional[DerivedFields]): Fields derived for the prototype by
+                derive_item_prototype_fields. Derived from item_data when not given.
+            walk_item_key (Optional[str]): Key of the walk item polling the column, when
+                the table is split across several. master_item_key when not given.
+        """
+        if derived is None:
+            derived = derive_item_prototype_fields(
+                [item_data], master_item_key, ITEM_PROTOTYPE.TRENDS
+            )[0]
+
+        self.master_item = walk_item_key or master_item_key
+        self.table_key = master_item_key
+        self.mib_module = intern_string(item_data.get('MIB Module'))
         self.oid = item_data.get('OID')
-        self.raw_description = item_data.get('Description')
-        self.raw_name = item_data.get('Name')
-        self.raw_type = item_data.get('Type')
-
-        self.history = ITEM_PROTOTYPE.HISTORY
-        self.type = ITEM_PROTOTYPE.TYPE
-
-        self.name = self._preprocess_name(self.raw_name)
-        self.description = self._preprocess_description()
-        self.key = self._generate_key(master_item_key)
-        self.value_type = self._determine_value_type()
-        self.trends = self._determine_trends(ITEM_PROTOTYPE.TRENDS)
+        self.name, self.description, self.key, self.value_type, self.trends = derived
 
     @classmethod
-    def generate_item_prototypes(cls, item_prototypes: List[Dict[str, Any]], template_name: str) -> List['ItemPrototype']:
-        return [ItemPrototype(item, template_name) for item in item_prototypes]
-
-    @staticmethod
-    def _preprocess_name(raw_name: str) -> str:
-        name = re.sub(r'^[^A-Z]*', '', raw_name)
-        return re.sub(r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])', ' ', name)
-
-    def _preprocess_description(self) -> str:
-        if not self.raw_description:
-            return f"{self.mib_module}::{self.raw_name}\nOID::{self.oid}\nNo description available."
-
-        paragraphs = self.raw_description.split('\n\n')
-        processed_paragraphs = []
-        for paragraph in paragraphs:
-            paragraph = re.sub(r'\s+', ' ', paragraph.strip())
-            paragraph = paragraph.replace("'", '"')
-            processed_paragraphs.append(paragraph)
-
-        processed_description = '\n'.join(processed_paragraphs)
-
-        return f"{self.mib_module}::{self.raw_name}\nOID::{self.oid}\n{processed_description}"
-
-    def _generate_key(self, master_item_key: str) -> str:
-        key_without_walk = master_item_key.replace(".walk", "")
-        master_subkey = key_without_walk.split(".")[-1]
-        item_name = self.name.replace(' ', '-').lower()
-        final_item_name = item_name.replace(master_subkey, "")
-        key = f"{key_without_walk}.{final_item_name.replace("-", "")}"+'[{#SNMPINDEX}]'
-
-        if len(key) > 255:
-            print(f"Warning: Key '{key}' exceeds 255 characters and will be truncated.")
-            return key[:255]
-
-        return key
-
-    def _determine_value_type(self) -> Optional[str]:
-        if self.raw_type == 'DISPLAYSTRING' or self.raw_type == 'OCTET STRING':
-            return 'CHAR'
-
-        if self.raw_type == 'Integer32':
-            return None
-
-        if self.raw_type == 'Float':
-            return 'FLOAT'
-
-        return 'TEXT'
-
-    def _determine_trends(self, default_from_config: str) -> str:
-        if (self.value_type == 'FLOAT') or (self.value_type is None):
-            return default_from_config
-        else:
-            return '0'
+    def generate_item_prototypes(
+        cls,
+        item_prototypes: List[Dict[str, Any]],
+        master_item_key: str,
+        walk_item_keys: Optional[Dict[str, str]] = None,
+    ) -> List['ItemPrototype']:
+        # Names, descriptions and keys are derived for all the rows at once
+        derived_fields = derive_item_prototype_fields(
+            item_prototypes, master_item_key, ITEM_PROTOTYPE.TRENDS
+        )
+        walk_item_keys = walk_item_keys or {}
+        return [
+            ItemPrototype(
+                item, master_item_key, derived, walk_item_keys.get(item.get('OID'))
+            )
+            for item, derived in zip(item_prototypes, derived_fields)
+        ]
 
     def generate_yaml_dict(self) -> Dict[str, Any]:
         item_prototype_yaml = {
@@ -87,7 +80,9 @@ class ItemPrototype:
             'name': self.name,
             'trends': self.trends,
             'type': self.type,
-            'uuid': uuid.uuid4().hex,
+            # The table key already carries the template name, and stays the same
+            # whichever walk item polls the column
+            'uuid': generate_uuid(self.table_key, self.key),
             'value_type': self.value_type,
         }
 
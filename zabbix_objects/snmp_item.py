@@ -1,99 +1,138 @@
-import re
-import uuid
 from typing import Any, Dict, List, Optional
 
-from utils.config import SNMP_ITEM
+from utils.config import SCALAR_WALK, SNMP_ITEM
+from utils.derivation import DerivedFields, derive_item_fields
+from utils.strings import intern_string
+from utils.uuid_generator import generate_uuid
 
 
 class SNMPItem:
-    def __init__(self, item_data: Dict[str, Any], template_name: str):
-        self.mib_module = item_data.get('MIB Module')
-        self.oid = item_data.get('OID')
-        self.raw_description = item_data.get('Description')
-        self.raw_name = item_data.get('Name')
-        self.raw_type = item_data.get('Type')
-
+    # Templates hold tens of thousands of items, so instances keep only the derived
+    # fields and the delay, which a polling budget may relax, in slots and share the
+    # constants below through the class
+    __slots__ = (
+        'template_name',
+        'delay',
+        'mib_module',
+        'oid',
+        'name',
+        'description',
+        'key',
+        'value_type',
+        'trends',
+    )
+
+    history = SNMP_ITEM.HISTORY
+    type = SNMP_ITEM.TYPE
+
+    def __init__(
+        self,
+        item_data: Dict[str, Any],
+        template_name: str,
+        derived: Optional[DerivedFields] = None,
+    ):
+        """
+        Args:
+            item_data (Dict[str, Any]): MIB entry of the item.
+            template_name (str): Name of the template the item belongs to.
+            derived (Optional[DerivedFields]): Fields derived for the item by
+                derive_item_fields. Derived from item_data when not given.
+        """
+        if derived is None:
+            derived = derive_item_fields([item_data], template_name, SNMP_ITEM.TRENDS)[0]
+
+        self.template_name = template_name
         self.delay = SNMP_ITEM.DELAY
-        self.history = SNMP_ITEM.HISTORY
-        self.type = SNMP_ITEM.TYPE
+        self.mib_module = intern_string(item_data.get('MIB Module'))
+        self.oid = item_data.get('OID')
+        self.name, self.description, self.key, self.value_type, self.trends = derived
 
-        self.name = self._preprocess_name(self.raw_name)
-        self.description = self._preprocess_description()
-        self.key = self._generate_key(template_name)
-        self.value_type = self._determine_value_type()
-        self.snmp_oid = self._generate_snmp_oid()        
-        self.trends = self._determine_trends(SNMP_ITEM.TRENDS)
+    @property
+    def snmp_oid(self) -> str:
+        return self._generate_snmp_oid()
 
     @classmethod
     def generate_snmp_items(cls, snmp_items: List[Dict[str, Any]], template_name: str) -> List['SNMPItem']:
-        return [SNMPItem(item, template_name) for item in snmp_items]
-
-    @staticmethod
-    def _preprocess_name(raw_name: str) -> str:
-        name = re.sub(r'^[^A-Z]*', '', raw_name)
-        return re.sub(r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])', ' ', name)
+        # Names, descriptions and keys are derived for all the rows at once
+        derived_fields = derive_item_fields(snmp_items, template_name, SNMP_ITEM.TRENDS)
+        return [
+            SNMPItem(item, template_name, derived)
+            for item, derived in zip(snmp_items, derived_fields)
+        ]
 
     def _generate_snmp_oid(self) -> str:
         return f'get[{self.oid}]'
 
-    def _preprocess_description(self) -> str:
-        if not self.raw_description:
-            return f"{self.mib_module}::{self.raw_name}\nOID::{self.oid}\nNo description available."
-
-        paragraphs = self.raw_description.split('\n\n')
-        processed_paragraphs = []
-        for paragraph in paragraphs:
-            paragraph = re.sub(r'\s+', ' ', paragraph.strip())
-            paragraph = paragraph.replace("'", '"')
-            processed_paragraphs.append(paragraph)
-
-        processed_description = '\n'.join(processed_paragraphs)
-
-        return f"{self.mib_module}::{self.raw_name}\nOID::{self.oid}\n{processed_description}"
-
-    def _generate_key(self, template_name: str) -> str:
-        item_name = self.name.replace(' ', '-').lower()
-        key = f'{template_name.lower().replace(' ', '.')}.{item_name}.get'
+    def generate_yaml_dict(self) -> Dict[str, Any]:
+        snmp_item_yaml = {
+            'description': self.description,
+            'history': self.history,
+            'delay': self.delay,
+            'key': self.key,
+            'name': self.name,
+            'snmp_oid': self.oid,
+            'trends': self.trends,
+            'type': self.type,
+            'uuid': generate_uuid(self.template_name, self.key),
+            'value_type': self.value_type,
+        }
 
-        if len(key) > 255:
-            print(f"Warning: Key '{key}' exceeds 255 characters and will be truncated.")
-            return key[:255]
+        # Removes None/null values
+        snmp_item_yaml = {k: v for k, v in snmp_item_yaml.items() if v is not None}
 
-        return key
+        return snmp_item_yaml
 
-    def _determine_value_type(self) -> Optional[str]:
-        if self.raw_type == 'DISPLAYSTRING' or self.raw_type == 'OCTET STRING':
-            return 'CHAR'
 
-        if self.raw_type == 'Integer32':
-            return None
+class DependentSNMPItem(SNMPItem):
+    """
+    An SNMP item whose value is picked out of the walk of a ScalarWalkItem instead of
+    being polled with a GET of its own, see Template._collapse_scalar_gets.
+    """
 
-        if self.raw_type == 'Float':
-            return 'FLOAT'
+    __slots__ = ('master_item',)
 
-        return 'TEXT'
+    type = SCALAR_WALK.TYPE
 
-    def _determine_trends(self, default_from_config: str) -> str:
-        if (self.value_type == 'FLOAT') or (self.value_type is None):
-            return default_from_config
-        else:
-            return '0'
+    @classmethod
+    def from_snmp_item(cls, snmp_item: SNMPItem, master_item: str) -> 'DependentSNMPItem':
+        """
+        Turn an SNMP item into one depending on a walk item. The key, and so the UUID,
+        stays the same, so Zabbix updates the item in place on import.
+
+        Args:
+            snmp_item (SNMPItem): The SNMP item.
+            master_item (str): Key of the walk item polling the item's OID.
+
+        Returns:
+            DependentSNMPItem: The dependent item.
+        """
+        dependent_item = cls.__new__(cls)
+        for slot in SNMPItem.__slots__:
+            setattr(dependent_item, slot, getattr(snmp_item, slot))
+        dependent_item.master_item = master_item
+        return dependent_item
 
     def generate_yaml_dict(self) -> Dict[str, Any]:
-        snmp_item_yaml = {
+        dependent_item_yaml = {
             'description': self.description,
             'history': self.history,
-            'delay': self.delay,
             'key': self.key,
+            'master_item': {'key': self.master_item},
             'name': self.name,
-            'snmp_oid': self.oid,
+            # Scalars are walked with their ".0" instance
+            'preprocessing': [
+                {
+                    'type': SCALAR_WALK.PREPROCESSING,
+                    'parameters': [f'{self.oid}.0', SCALAR_WALK.VALUE_FORMAT],
+                }
+            ],
             'trends': self.trends,
             'type': self.type,
-            'uuid': uuid.uuid4().hex,
+            'uuid': generate_uuid(self.template_name, self.key),
             'value_type': self.value_type,
         }
 
         # Removes None/null values
-        snmp_item_yaml = {k: v for k, v in snmp_item_yaml.items() if v is not None}
+        dependent_item_yaml = {k: v for k, v in dependent_item_yaml.items() if v is not None}
 
-        return snmp_item_yaml
+        return dependent_item_yaml
@@ -1,54 +1,63 @@
-import re
-import uuid
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from utils.config import SNMP_TRAP
+from utils.derivation import derive_descriptions, derive_names
+from utils.strings import intern_string
+from utils.uuid_generator import generate_uuid
 
 
 class SNMPTrap:
-    def __init__(self, trap_data: Dict[str, Any], template_name: str):
-        self.mib_module = trap_data.get("MIB Module")
-        self.oid = trap_data.get("OID")
-        self.raw_description = trap_data.get("Description")
-        self.raw_name = trap_data.get("Name")
-        self.raw_type = trap_data.get("Type")
+    # Instances keep only the derived fields in slots and share the constants below
+    # through the class. The default trigger is built when the YAML is generated
+    __slots__ = ("template_name", "mib_module", "oid", "name", "key", "description")
+
+    delay = SNMP_TRAP.DELAY
+    history = SNMP_TRAP.HISTORY
+    trends = SNMP_TRAP.TRENDS
+    type = SNMP_TRAP.TYPE
+    value_type = SNMP_TRAP.VALUE_TYPE
+
+    def __init__(
+        self,
+        trap_data: Dict[str, Any],
+        template_name: str,
+        derived: Optional[Tuple[str, str]] = None,
+    ):
+        """
+        Args:
+            trap_data (Dict[str, Any]): MIB entry of the notification.
+            template_name (str): Name of the template the trap belongs to.
+            derived (Optional[Tuple[str, str]]): Name and description derived for the
+                trap. Derived from trap_data when not given.
+        """
+        if derived is None:
+            derived = self._derive_fields([trap_data])[0]
 
-        self.delay = SNMP_TRAP.DELAY
-        self.history = SNMP_TRAP.HISTORY
-        self.trends = SNMP_TRAP.TRENDS
-        self.type = SNMP_TRAP.TYPE
-        self.value_type = SNMP_TRAP.VALUE_TYPE
+        self.template_name = template_name
+        self.mib_module = intern_string(trap_data.get("MIB Module"))
+        self.oid = trap_data.get("OID")
 
-        self.name = self._preprocess_name()
+        self.name, self.description = derived
         self.key = self._generate_key()
-        self.description = self._preprocess_description()
-        self.default_trigger = self._generate_default_trigger(template_name)
+
+    @property
+    def default_trigger(self) -> Dict[str, Any]:
+        return self._generate_default_trigger(self.template_name)
 
     @classmethod
     def generate_snmp_traps(
         cls, snmp_traps: List[Dict[str, Any]], template_name: str
     ) -> List["SNMPTrap"]:
-        return [SNMPTrap(trap, template_name) for trap in snmp_traps]
-
-    def _preprocess_name(self) -> str:
-        name = re.sub(r"^[^A-Z]*", "", self.raw_name)
-        name = re.sub(r"(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])", " ", name)
-        return name.replace(" Trap", "")
-
-    def _preprocess_description(self) -> str:
-        if not self.raw_description:
-            return f"{self.mib_module}::{self.raw_name}\nOID::{self.oid}\nNo description available."
-
-        paragraphs = self.raw_description.split("\n\n")
-        processed_paragraphs = []
-        for paragraph in paragraphs:
-            paragraph = re.sub(r"\s+", " ", paragraph.strip())
-            paragraph = paragraph.replace("'", '"')
-            processed_paragraphs.append(paragraph)
-
-        processed_description = "\n".join(processed_paragraphs)
+        # Names and descriptions are derived for all the rows at once
+        return [
+            SNMPTrap(trap, template_name, derived)
+            for trap, derived in zip(snmp_traps, cls._derive_fields(snmp_traps))
+        ]
 
-        return f"{self.mib_module}::{self.raw_name}\nOID::{self.oid}\n{processed_description}"
+    @staticmethod
+    def _derive_fields(snmp_traps: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        names = derive_names([trap.get("Name") for trap in snmp_traps], remove=" Trap")
+        return list(zip(names, derive_descriptions(snmp_traps)))
 
     def _generate_key(self) -> str:
         return f'snmptrap["{self.oid}"]'
@@ -63,15 +72,16 @@ class SNMPTrap:
         Returns:
             Dict[str, Any]: Dictionary representing the default trigger.
         """
+        expression = f"length(last(/{template_name}/{self.key}))>0"
         default_trigger = {
             "description": self.description,
-            "expression": f"length(last(/{template_name}/{self.key}))>0",
+            "expression": expression,
             "manual_close": SNMP_TRAP.TRIGGER.CLOSE,
             "name": self.name,
             "priority": SNMP_TRAP.TRIGGER.PRIORITY,
             "tags": [{"tag": "snmp_trap", "value": ""}],
             "type": SNMP_TRAP.TRIGGER.TYPE,
-            "uuid": uuid.uuid4().hex,
+            "uuid": generate_uuid(template_name, expression),
         }
         return default_trigger
 
@@ -85,7 +95,7 @@ class SNMPTrap:
             "trends": self.trends,
             "triggers": [self.default_trigger],
             "type": self.type,
-            "uuid": uuid.uuid4().hex,
+            "uuid": generate_uuid(self.template_name, self.key),
             "value_type": self.value_type,
         }
 
@@ -1,73 +1,188 @@
-import uuid
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence
 
-from utils.config import SNMP_WALK_ITEM
-from zabbix_objects.snmp_item import SNMPItem
+from utils import metrics
+from utils.config import SNMP_ITEM, SNMP_WALK_ITEM
+from utils.normalization import normalize_name, slugify
+from utils.strings import intern_string
+from utils.uuid_generator import generate_uuid
+
+_OID_SEPARATOR = ", "
 
 
 class SNMPWalkItem:
-    def __init__(self, discovery_rule_table: List[Dict[str, Any]], template_name: str):
-        snmp_walk_item_data = discovery_rule_table[0]
-        self.mib_module = snmp_walk_item_data["MIB Module"]
+    # Instances keep only the derived fields and the delay, which a polling budget may
+    # relax, in slots and share the constants below through the class
+    __slots__ = (
+        "template_name",
+        "delay",
+        "mib_module",
+        "name",
+        "key",
+        "oids",
+        "snmp_oid",
+        "description",
+    )
 
+    history = SNMP_WALK_ITEM.HISTORY
+    trends = SNMP_WALK_ITEM.TRENDS
+    type = SNMP_WALK_ITEM.TYPE
+    value_type = SNMP_WALK_ITEM.VALUE_TYPE
+
+    def __init__(
+        self,
+        discovery_rule_table: List[Dict[str, Any]],
+        template_name: str,
+        columns: Optional[List[Dict[str, Any]]] = None,
+        part: int = 1,
+    ):
+        """
+        Args:
+            discovery_rule_table (List[Dict[str, Any]]): The table entry, its "Entry"
+                entry and the table columns.
+            template_name (str): Name of the template the walk item belongs to.
+            columns (Optional[List[Dict[str, Any]]]): Columns the walk item carries. All
+                the table columns if omitted, see generate_table_walk_items.
+            part (int): Number of the walk item among those of the table, from 1.
+        """
+        snmp_walk_item_data = discovery_rule_table[0]
+        if columns is None:
+            # Skipping Table and Entry
+            columns = discovery_rule_table[2:]
+        self.template_name = template_name
         self.delay = SNMP_WALK_ITEM.DELAY
-        self.history = SNMP_WALK_ITEM.HISTORY
-        self.trends = SNMP_WALK_ITEM.TRENDS
-        self.type = SNMP_WALK_ITEM.TYPE
-        self.value_type = SNMP_WALK_ITEM.VALUE_TYPE
-
-        self.name = self._generate_name(snmp_walk_item_data)
-        self.key = self._generate_key(self.name, template_name)
-        oid_string = self._parse_oids(discovery_rule_table)
-        self.snmp_oid = self._generate_snmp_oid(oid_string)
-        self.description = self._preprocess_description(discovery_rule_table)
-
-    def _parse_oids(self, discovery_rule_table: List[Dict[str, Any]]) -> str:
-        oids = [entry["OID"] for entry in discovery_rule_table]
-        oid_string = ""
-        skipped_oids = []
-
-        for oid in oids[2:]:
-            if len(oid_string) + len(oid) + 2 <= 250:  # +2 for comma and space
-                oid_string += f"{oid}, " if oid_string else oid
-            else:
-                skipped_oids.append(oid)
-
-        oid_string = oid_string.rstrip(", ")
-
-        if skipped_oids:
-            print(f"\t\tWarning: {self.name} SNMP_OID length exceeded 250 characters.")
-            print(
-                f"\tDiscovery Rule '{self.name}' is not complete. {len(skipped_oids)} OIDs were omitted."
+        self.mib_module = intern_string(snmp_walk_item_data["MIB Module"])
+
+        self.name = self._generate_name(snmp_walk_item_data, part)
+        self.key = self._generate_key(self.name, template_name, part)
+        self.oids = tuple(entry["OID"] for entry in columns)
+        self.snmp_oid = self._generate_snmp_oid(self.oids)
+        self.description = self._preprocess_description(discovery_rule_table, columns)
+
+    @classmethod
+    def generate_table_walk_items(
+        cls, discovery_rule_table: List[Dict[str, Any]], template_name: str
+    ) -> List["SNMPWalkItem"]:
+        """
+        Create the walk items polling the columns of a discovery rule table, as few as
+        fit every column within the length limit of an SNMP OID.
+
+        Args:
+            discovery_rule_table (List[Dict[str, Any]]): The table entry, its "Entry"
+                entry and the table columns.
+            template_name (str): Name of the template the walk items belong to.
+
+        Returns:
+            List[SNMPWalkItem]: The walk items, the first one carrying the first column.
+        """
+        column_groups = cls._pack_columns(discovery_rule_table[2:])
+        if len(column_groups) > 1:
+            metrics.count("split_walk_items", len(column_groups) - 1)
+            metrics.LOGGER.debug(
+                "\t\t%s: %d columns split across %d walk items.",
+                discovery_rule_table[0].get("Name"),
+                len(discovery_rule_table) - 2,
+                len(column_groups),
             )
-            print(f"\t\tSkipped OIDs: {', '.join(skipped_oids)}")
+        return [
+            cls(discovery_rule_table, template_name, columns, part)
+            for part, columns in enumerate(column_groups, 1)
+        ]
+
+    @staticmethod
+    def _pack_columns(
+        columns: List[Dict[str, Any]],
+        max_length: int = SNMP_WALK_ITEM.MAX_OIDS_LENGTH,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Pack table columns into as few groups as possible whose OIDs, joined by ", ",
+        stay within a length.
+
+        First-fit decreasing bin packing bounds the number of groups. Filling groups in
+        table order is kept whenever it needs no more, so neighbouring columns stay in
+        the same walk item.
 
-        return oid_string
+        Args:
+            columns (List[Dict[str, Any]]): The table columns.
+            max_length (int): Length of the joined OIDs of a group at most. A longer OID
+                gets a group of its own.
 
-    def _generate_snmp_oid(self, oids):
-        # Skipping Table and Entry
-        return f"walk[{oids[2:]}"
+        Returns:
+            List[List[Dict[str, Any]]]: The groups, each in table order, ordered by their
+                first column. At least one group, which is empty if there are no columns.
+        """
+        # Each OID takes its length plus a separator, which the last OID does without
+        capacity = max_length + len(_OID_SEPARATOR)
+        sizes = [len(entry["OID"]) + len(_OID_SEPARATOR) for entry in columns]
+        for position, size in enumerate(sizes):
+            if size > capacity:
+                metrics.count("oversized_walk_oids")
+                metrics.LOGGER.warning(
+                    "\t\tWarning: OID %s exceeds %d characters on its own.",
+                    columns[position]["OID"],
+                    max_length,
+                )
 
-    def _generate_name(self, snmp_walk_item: Dict[str, Any]) -> str:
-        item_name = SNMPItem._preprocess_name(snmp_walk_item.get("Name"))
-        return item_name.replace("Table", "Walk")
+        in_order: List[List[int]] = []
+        room = 0
+        for position, size in enumerate(sizes):
+            if not in_order or size > room:
+                in_order.append([])
+                room = capacity
+            in_order[-1].append(position)
+            room -= size
 
-    def _generate_key(self, item_name: str, template_name: str) -> str:
+        packed: List[List[int]] = []
+        free: List[int] = []
+        for position in sorted(range(len(sizes)), key=lambda index: -sizes[index]):
+            group = next(
+                (index for index, room in enumerate(free) if room >= sizes[position]),
+                None,
+            )
+            if group is None:
+                group = len(packed)
+                packed.append([])
+                free.append(capacity)
+            packed[group].append(position)
+            free[group] -= sizes[position]
+
+        groups = (
+            in_order
+            if len(in_order) <= len(packed)
+            else sorted(sorted(group) for group in packed)
+        )
+        return [[columns[position] for position in group] for group in groups] or [[]]
+
+    def _generate_snmp_oid(self, oids: Sequence[str]) -> str:
+        return f"walk[{_OID_SEPARATOR.join(oids)}]"
+
+    def _generate_name(self, snmp_walk_item: Dict[str, Any], part: int = 1) -> str:
+        item_name = normalize_name(snmp_walk_item.get("Name"))
+        item_name = item_name.replace("Table", "Walk")
+        return f"{item_name} {part}" if part > 1 else item_name
+
+    def _generate_key(self, item_name: str, template_name: str, part: int = 1) -> str:
         template_string = template_name.lower().replace(" ", ".")
-        item_string = item_name.replace(" Walk", "")
-        item_string = item_string.replace(" ", "-").lower()
+        if part > 1:
+            item_name = item_name[: -len(f" {part}")]
+        item_string = slugify(item_name.replace(" Walk", ""))
         key = f"{template_string}.{item_string}.walk"
+        # Further walk items of a table are numbered, and the number survives truncation
+        suffix = f".{part}" if part > 1 else ""
 
-        if len(key) > 255:
-            print(
-                f"Warning: Walk key '{key}' exceeds 255 characters and will be truncated."
+        if len(key) + len(suffix) > 255:
+            metrics.count("truncated_keys")
+            metrics.LOGGER.warning(
+                "Warning: Walk key '%s' exceeds 255 characters and will be truncated.",
+                key + suffix,
             )
-            return key[:255]
+            return key[: 255 - len(suffix)] + suffix
 
-        return key
+        return key + suffix
 
     def _preprocess_description(
-        self, discovery_rule_table: List[Dict[str, Any]]
+        self,
+        discovery_rule_table: List[Dict[str, Any]],
+        columns: List[Dict[str, Any]],
     ) -> str:
         mib_module = discovery_rule_table[0]["MIB Module"]
         table_description = discovery_rule_table[0]["Description"]
@@ -75,8 +190,7 @@ class SNMPWalkItem:
         description += (
             f"{discovery_rule_table[0]['Name']}.* {discovery_rule_table[0]['OID']}\n"
         )
-        # Skip the table entry as well as the "Entry" entry
-        for entry in discovery_rule_table[2:]:
+        for entry in columns:
             description += f"{entry['Name']} {entry['OID']}\n"
         return description.rstrip()
 
@@ -88,7 +202,7 @@ class SNMPWalkItem:
 
     def generate_yaml_dict(self) -> Dict[str, Any]:
         snmp_item_yaml = {
-            "uuid": uuid.uuid4().hex,
+            "uuid": generate_uuid(self.template_name, self.key),
             "description": self.description,
             "history": self.history,
             "delay": self.delay,
@@ -104,3 +218,63 @@ class SNMPWalkItem:
         snmp_item_yaml = {k: v for k, v in snmp_item_yaml.items() if v is not None}
 
         return snmp_item_yaml
+
+
+class ScalarWalkItem(SNMPWalkItem):
+    """
+    A walk item polling the scalars below one MIB parent in a single walk, for the
+    DependentSNMPItems that replace their GETs, see Template._collapse_scalar_gets.
+    """
+
+    # The walk returns every object below the parent, not only the collapsed scalars
+    __slots__ = ("subtree_size",)
+
+    def __init__(
+        self,
+        parent_entry: Dict[str, Any],
+        scalar_entries: List[Dict[str, Any]],
+        template_name: str,
+        subtree_size: int,
+        part: int = 1,
+    ):
+        """
+        Args:
+            parent_entry (Dict[str, Any]): MIB entry of the parent that is walked.
+            scalar_entries (List[Dict[str, Any]]): MIB entries of the collapsed scalars.
+            template_name (str): Name of the template the walk item belongs to.
+            subtree_size (int): Number of MIB objects below the parent.
+            part (int): Number telling the walk item apart from another one of the same
+                name, from 1.
+        """
+        self.template_name = template_name
+        # Walked as often as the scalars it replaces were polled
+        self.delay = SNMP_ITEM.DELAY
+        self.mib_module = intern_string(parent_entry["MIB Module"])
+
+        self.name = self._generate_name(parent_entry, part)
+        self.key = self._generate_key(self.name, template_name, part)
+        self.oids = (parent_entry["OID"],)
+        self.snmp_oid = self._generate_snmp_oid(self.oids)
+        self.description = self._preprocess_description([parent_entry], scalar_entries)
+        self.subtree_size = subtree_size
+
+    def _generate_name(self, parent_entry: Dict[str, Any], part: int = 1) -> str:
+        # Parents named after their MIB alone, e.g. "system", normalize to nothing
+        item_name = normalize_name(parent_entry.get("Name")) or parent_entry.get("Name")
+        item_name = f"{item_name} Walk"
+        return f"{item_name} {part}" if part > 1 else item_name
+
+    def _preprocess_description(
+        self,
+        parent_entries: List[Dict[str, Any]],
+        scalar_entries: List[Dict[str, Any]],
+    ) -> str:
+        parent_entry = parent_entries[0]
+        description = f"MIB = {parent_entry['MIB Module']}\n"
+        # Groups and other OBJECT IDENTIFIER nodes often have no description
+        if parent_entry["Description"]:
+            description += f"{parent_entry['Description']}\n"
+        description += f"{parent_entry['Name']}.* {parent_entry['OID']}\n"
+        for entry in scalar_entries:
+            description += f"{entry['Name']} {entry['OID']}\n"
+        return description.rstrip()
@@ -1,12 +1,25 @@
-import concurrent.futures
-import uuid
-from typing import Any, Dict, List
-
+import functools
+import math
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from utils import metrics
+from utils.config import ESTIMATE
+from utils.mib_index import MIBIndex, is_table_type
+from utils.object_builder import ObjectBuilder
+from utils.uuid_generator import generate_uuid
 from zabbix_objects.discovery_rule import DiscoveryRule
-from zabbix_objects.snmp_item import SNMPItem
+from zabbix_objects.snmp_item import DependentSNMPItem, SNMPItem
 from zabbix_objects.snmp_trap import SNMPTrap
+from zabbix_objects.snmp_walk_item import ScalarWalkItem
 from zabbix_objects.tag import Tag
 
+# Manifests are only used by incremental runs, and columnar and library indexes by
+# --low-memory and --library runs
+if TYPE_CHECKING:
+    from utils.manifest import TemplateManifest
+    from utils.mib_columns import ColumnarMIBIndex
+    from utils.mib_library import MIBLibraryIndex
+
 
 class Template:
     def __init__(
@@ -14,8 +27,33 @@ class Template:
         template_info_json: Dict[str, Any],
         snmp_item_json_list: List[Dict[str, Any]],
         snmp_trap_json_list: List[Dict[str, Any]],
-        discovery_rule_tables: Dict[str, List[Dict[str, Any]]],
+        mib_index: Union[MIBIndex, "ColumnarMIBIndex", "MIBLibraryIndex"],
+        manifest: Optional["TemplateManifest"] = None,
+        object_builder: Optional[ObjectBuilder] = None,
+        bulk_scalars_min_items: Optional[int] = None,
     ):
+        """
+        Args:
+            template_info_json (Dict[str, Any]): Row of the Template Information sheet.
+            snmp_item_json_list (List[Dict[str, Any]]): MIB entries of the SNMP items.
+            snmp_trap_json_list (List[Dict[str, Any]]): MIB entries of the SNMP traps.
+            mib_index (Union[MIBIndex, ColumnarMIBIndex, MIBLibraryIndex]): Index of the
+                MIB data, holding the discovery rule tables.
+            manifest (Optional[TemplateManifest]): Manifest of an incremental run, whose
+                unchanged rows are reused instead of rebuilt.
+            object_builder (Optional[ObjectBuilder]): Builder of the Zabbix objects, a
+                serial one if omitted.
+            bulk_scalars_min_items (Optional[int]): Walk the MIB parents of at least this
+                many SNMP items instead of polling each of them with a GET, see
+                _collapse_scalar_gets. Not used with a manifest.
+
+        Raises:
+            ValueError: If both bulk_scalars_min_items and a manifest are given.
+        """
+        # Reused rows are rendered YAML, which cannot be turned into dependent items
+        if bulk_scalars_min_items is not None and manifest is not None:
+            raise ValueError("Scalar walks are not built in incremental runs.")
+
         self.group = template_info_json.get("Group")
         self.macros = template_info_json.get("Macros")
         self.manufacturer = template_info_json.get("Manufacturer")
@@ -29,24 +67,55 @@ class Template:
             self.raw_tags, self.manufacturer, self.device
         )
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future_items = executor.submit(
-                SNMPItem.generate_snmp_items, snmp_item_json_list, self.name
-            )
-            future_traps = executor.submit(
-                SNMPTrap.generate_snmp_traps, snmp_trap_json_list, self.name
-            )
-            future_discovery_rules = executor.submit(
-                DiscoveryRule.generate_discovery_rules, discovery_rule_tables, self.name
-            )
+        discovery_rule_tables = list(mib_index.discovery_rule_tables.values())
+        builds = {
+            "item": (
+                functools.partial(SNMPItem.generate_snmp_items, template_name=self.name),
+                snmp_item_json_list,
+                len(snmp_item_json_list),
+            ),
+            "trap": (
+                functools.partial(SNMPTrap.generate_snmp_traps, template_name=self.name),
+                snmp_trap_json_list,
+                len(snmp_trap_json_list),
+            ),
+            # A discovery rule builds an item prototype for every column of its table
+            "discovery_rule": (
+                functools.partial(
+                    DiscoveryRule.generate_discovery_rules, template_name=self.name
+                ),
+                discovery_rule_tables,
+                sum(len(table_data) for table_data in discovery_rule_tables),
+            ),
+        }
 
-            self.snmp_items = future_items.result()
-            self.snmp_traps = future_traps.result()
-            self.discovery_rules = future_discovery_rules.result()
+        builder = object_builder or ObjectBuilder()
+        try:
+            built = {}
+            for kind, (build_all, rows, row_count) in builds.items():
+                if manifest is not None:
+                    # Only rows that changed since the manifest was written are rebuilt
+                    built[kind] = manifest.build_all(
+                        kind,
+                        self.name,
+                        rows,
+                        functools.partial(builder.build, build_all),
+                    )
+                else:
+                    built[kind] = builder.build(build_all, rows, row_count)
+        finally:
+            if object_builder is None:
+                builder.close()
+
+        self.snmp_items = built["item"]
+        self.snmp_traps = built["trap"]
+        self.discovery_rules = built["discovery_rule"]
+
+        if bulk_scalars_min_items is not None:
+            self._collapse_scalar_gets(mib_index, bulk_scalars_min_items)
 
         for discovery_rule in self.discovery_rules:
-            if discovery_rule.snmp_walk_item:
-                self.snmp_items.append(discovery_rule.snmp_walk_item)
+            self.snmp_items.extend(discovery_rule.snmp_walk_items)
 
         self.mib_modules = self._get_mib_modules()
         self.description = self._preprocess_description()
@@ -54,6 +123,87 @@ class Template:
     def _generate_template_name(self) -> str:
         return f"{self.manufacturer} {self.device} {self.model}"
 
+    def _collapse_scalar_gets(
+        self,
+        mib_index: Union[MIBIndex, "ColumnarMIBIndex", "MIBLibraryIndex"],
+        min_items: int,
+    ) -> None:
+        """
+        Poll the SNMP items sharing a MIB parent with one walk of the parent instead of
+        a GET each. The walk becomes a ScalarWalkItem and the items DependentSNMPItems
+        of it, and the walk items follow the SNMP items.
+
+        A parent is walked only if it has at least min_items SNMP items, is not a table
+        row and holds no table, and if the GetBulk requests walking everything below it
+        are fewer than the GETs they replace.
+
+        Args:
+            mib_index (Union[MIBIndex, ColumnarMIBIndex, MIBLibraryIndex]): Index of the
+                MIB data, giving the objects below each parent.
+            min_items (int): Number of SNMP items a parent needs at least.
+        """
+        positions_by_parent: Dict[str, List[int]] = {}
+        for position, snmp_item in enumerate(self.snmp_items):
+            if snmp_item.oid:
+                parent_oid = snmp_item.oid.rsplit(".", 1)[0]
+                positions_by_parent.setdefault(parent_oid, []).append(position)
+
+        used_keys = {snmp_item.key for snmp_item in self.snmp_items}
+        for discovery_rule in self.discovery_rules:
+            used_keys.update(item.key for item in discovery_rule.snmp_walk_items)
+
+        walk_items = []
+        collapsed = eliminated = 0
+        for parent_oid, positions in positions_by_parent.items():
+            if len(positions) < min_items:
+                continue
+            parent_entry = mib_index.get_by_oid(parent_oid)
+            row_entry = mib_index.get_by_oid(parent_oid.rsplit(".", 1)[0])
+            if parent_entry is None or (
+                row_entry is not None
+                and is_table_type(row_entry["Name"], row_entry["Type"])
+            ):
+                continue
+            subtree = mib_index.subtree(parent_oid)
+            if any(is_table_type(entry["Name"], entry["Type"]) for entry in subtree):
+                continue
+            # The walk reads every object below the parent and the first one past it
+            requests = math.ceil(len(subtree) / ESTIMATE.BULK_MAX_REPETITIONS)
+            if requests >= len(positions):
+                continue
+
+            scalar_entries = [
+                mib_index.get_by_oid(self.snmp_items[position].oid)
+                for position in positions
+            ]
+            part = 1
+            walk_item = ScalarWalkItem(
+                parent_entry, scalar_entries, self.name, len(subtree) - 1
+            )
+            # Parents of different MIBs can share a normalized name, e.g. OSPF v2 and v3
+            while walk_item.key in used_keys:
+                part += 1
+                walk_item = ScalarWalkItem(
+                    parent_entry, scalar_entries, self.name, len(subtree) - 1, part
+                )
+            used_keys.add(walk_item.key)
+            walk_items.append(walk_item)
+
+            for position in positions:
+                self.snmp_items[position] = DependentSNMPItem.from_snmp_item(
+                    self.snmp_items[position], walk_item.key
+                )
+            collapsed += len(positions)
+            eliminated += len(positions) - requests
+
+        self.snmp_items.extend(walk_items)
+        metrics.count("collapsed_snmp_items", collapsed)
+        metrics.count("eliminated_snmp_requests", eliminated)
+        print(
+            f"[{collapsed}] SNMP items collapsed into [{len(walk_items)}] walk items, "
+            f"[{eliminated}] fewer SNMP requests per poll"
+        )
+
     def _get_mib_modules(self) -> List[str]:
         """
         Get the list of MIB modules used in the template.
@@ -61,10 +211,11 @@ class Template:
         Returns:
             List[str]: List of MIB module names.
         """
-        mib_modules = set()
+        # A dict keeps the modules in first-seen order, so the description is stable across runs
+        mib_modules = {}
         for entry in self.snmp_items or self.snmp_traps or []:
             if mib_module := entry.mib_module:
-                mib_modules.add(mib_module)
+                mib_modules[mib_module] = None
 
         return list(mib_modules) or ["N/A"]
 
@@ -75,7 +226,7 @@ class Template:
 
     def generate_yaml_dict(self) -> Dict[str, Any]:
         inner_yaml_structure = {
-            "uuid": str(uuid.uuid4().hex),
+            "uuid": generate_uuid("template", self.name),
             "template": self.name,
             "name": self.name,
             "description": self.description,
@@ -91,7 +242,10 @@ class Template:
             "zabbix_export": {
                 "version": "7.0",
                 "template_groups": [
-                    {"uuid": str(uuid.uuid4().hex), "name": self.group}
+                    {
+                        "uuid": generate_uuid("template_group", self.group),
+                        "name": self.group,
+                    }
                 ],
                 "templates": [inner_yaml_structure],
             }